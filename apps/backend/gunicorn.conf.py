@@ -0,0 +1,59 @@
+# Description: Production multi-worker serving (gunicorn master + uvicorn workers)
+# Usage (from apps/backend):
+#   gunicorn -c gunicorn.conf.py src.main:app
+# Notes:
+# - WEB_CONCURRENCY workers (default: one per core)
+# - PRELOAD_APP=1 imports the app and runs src.core.preload once in the master,
+#   so read-only tables and indexes are shared copy-on-write by all workers
+# - Workers are recycled after MAX_REQUESTS (+ jitter) requests, gracefully
+# - Each worker reports to WORKER_HEALTH_DIR -> GET /api/v1/health/workers
+
+import multiprocessing
+import os
+import shutil
+
+os.environ.setdefault("WORKER_HEALTH_DIR", "/tmp/cvscan-workers")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "1").lower() in ("1", "true", "yes")
+
+# Graceful recycling (caps slow memory growth from PDF parsing)
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "200"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-" if os.getenv("ACCESS_LOG", "0") == "1" else None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Start from a clean health directory (old pids are meaningless)
+    shutil.rmtree(os.environ["WORKER_HEALTH_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["WORKER_HEALTH_DIR"], exist_ok=True)
+
+
+def when_ready(server):
+    # The app is already imported here when preload_app is on: load shared data before forking
+    if server.cfg.preload_app:
+        from src.core.preload import preload
+        server.log.info("Preloaded before fork: %s", ", ".join(preload()) or "nothing")
+
+
+def post_fork(server, worker):
+    from src.core import worker_health
+    from src.core.database import engine
+
+    worker_health.state.reset()
+    worker_health.state.max_requests = server.cfg.max_requests
+    # Never reuse DB connections inherited from the master
+    engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    from src.core import worker_health
+    worker_health.remove_heartbeat(worker.pid)
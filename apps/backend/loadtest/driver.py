@@ -0,0 +1,236 @@
+# Description: Async load driver replaying a weighted mix of API calls
+# Notes:
+# - Closed loop: `concurrency` virtual users each fire requests back to back
+# - Operations are picked by weight from the mix (upload-cv, match, match-stat, analyze-cv)
+# - Reports throughput, error count and p50/p95/p99 latency per endpoint
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_MIX: Dict[str, float] = {
+    "upload-cv": 1.0,
+    "match": 3.0,
+    "match-stat": 4.0,
+    "analyze-cv": 2.0,
+}
+
+_SKILLS = [
+    "python", "fastapi", "django", "flask", "sql", "postgresql", "docker", "kubernetes",
+    "aws", "gcp", "azure", "terraform", "react", "typescript", "nlp", "pytorch",
+    "tensorflow", "pandas", "numpy", "spark", "airflow", "kafka", "redis", "linux",
+    "git", "ci", "graphql", "rest", "microservices", "llm", "langchain", "scikit",
+]
+_FILLER = [
+    "experience", "team", "project", "delivered", "built", "designed", "led",
+    "production", "platform", "data", "pipeline", "service", "customers", "years",
+]
+
+
+def synthetic_cv(rng: random.Random, n_words: int = 300) -> str:
+    """
+    Build a plausible CV body mixing skills and filler words.
+    """
+    skills = rng.sample(_SKILLS, k=8)
+    words = [rng.choice(skills) if rng.random() < 0.3 else rng.choice(_FILLER) for _ in range(n_words)]
+    return "Candidate profile\n" + " ".join(words)
+
+
+def synthetic_job(rng: random.Random) -> Dict[str, str]:
+    skills = rng.sample(_SKILLS, k=6)
+    return {
+        "title": f"{skills[0].title()} Engineer",
+        "company": rng.choice(["Acme", "Globex", "Initech", "Umbrella"]),
+        "description": "Looking for an engineer with " + ", ".join(skills) + " experience.",
+    }
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse "upload-cv=1,match=3" into a weight map. Empty spec -> DEFAULT_MIX.
+    """
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation in mix: {name!r} (expected one of {sorted(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile on an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, status: int, elapsed_ms: float) -> None:
+        self.latencies_ms.append(elapsed_ms)
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if status == 0 or status >= 400:
+            self.errors += 1
+
+
+@dataclass
+class Fixtures:
+    """
+    Data seeded before the run. `cv_filenames` covers local and Supabase-only CVs
+    (used by match-stat); `db_cv_filenames` only those stored in the DB (used by match).
+    """
+    cv_filenames: List[str]
+    db_cv_filenames: List[str]
+    job_ids: List[str]
+    job_texts: Dict[str, str]
+
+
+class LoadDriver:
+    """
+    Replays a weighted operation mix against a running backend.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        fixtures: Fixtures,
+        mix: Optional[Dict[str, float]] = None,
+        concurrency: int = 10,
+        seed: int = 0,
+        timeout_s: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.fixtures = fixtures
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self._rng = random.Random(seed)
+        self._ops: Dict[str, Callable] = {
+            "upload-cv": self._upload_cv,
+            "match": self._match,
+            "match-stat": self._match_stat,
+            "analyze-cv": self._analyze_cv,
+        }
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in self.mix}
+        self.elapsed_s = 0.0
+        self._upload_seq = 0
+
+    # ---------- Operations ----------
+
+    async def _upload_cv(self, client: httpx.AsyncClient) -> httpx.Response:
+        self._upload_seq += 1
+        name = f"load_cv_{self._upload_seq}.txt"
+        body = synthetic_cv(self._rng).encode("utf-8")
+        return await client.post("/api/v1/upload-cv", files={"file": (name, body, "text/plain")})
+
+    async def _match(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post("/api/v1/match", json={
+            "cv_filename": self._rng.choice(self.fixtures.db_cv_filenames),
+            "job_id": self._rng.choice(self.fixtures.job_ids),
+        })
+
+    async def _match_stat(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post("/api/v1/match-stat", json={
+            "cv_filename": self._rng.choice(self.fixtures.cv_filenames),
+            "job_id": self._rng.choice(self.fixtures.job_ids),
+        })
+
+    async def _analyze_cv(self, client: httpx.AsyncClient) -> httpx.Response:
+        job_id = self._rng.choice(self.fixtures.job_ids)
+        return await client.post("/api/v1/ai/analyze-cv", json={
+            "text": synthetic_cv(self._rng, n_words=200),
+            "job": self.fixtures.job_texts.get(job_id),
+        })
+
+    # ---------- Run loop ----------
+
+    def _pick(self) -> str:
+        names = list(self.mix)
+        return self._rng.choices(names, weights=[self.mix[n] for n in names], k=1)[0]
+
+    async def _user(self, client: httpx.AsyncClient, deadline: float, max_requests: Optional[int]) -> None:
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                if self._remaining <= 0:
+                    return
+                self._remaining -= 1
+            op = self._pick()
+            start = time.perf_counter()
+            try:
+                resp = await self._ops[op](client)
+                status = resp.status_code
+            except httpx.HTTPError:
+                status = 0
+            self.stats[op].record(status, (time.perf_counter() - start) * 1000.0)
+
+    async def run(self, duration_s: float = 30.0, max_requests: Optional[int] = None) -> Dict:
+        """
+        Run until `duration_s` elapses (or `max_requests` are sent) and return the report.
+        """
+        self._remaining = max_requests if max_requests is not None else 0
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s, limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + duration_s
+            await asyncio.gather(*(self._user(client, deadline, max_requests) for _ in range(self.concurrency)))
+            self.elapsed_s = time.perf_counter() - start
+        return self.report()
+
+    def report(self) -> Dict:
+        elapsed = max(self.elapsed_s, 1e-9)
+        endpoints = {}
+        total = 0
+        for name, st in self.stats.items():
+            lat = sorted(st.latencies_ms)
+            total += len(lat)
+            endpoints[name] = {
+                "requests": len(lat),
+                "errors": st.errors,
+                "throughput_rps": round(len(lat) / elapsed, 2),
+                "p50_ms": round(percentile(lat, 50), 2),
+                "p95_ms": round(percentile(lat, 95), 2),
+                "p99_ms": round(percentile(lat, 99), 2),
+                "status_codes": {str(k): v for k, v in sorted(st.status_codes.items())},
+            }
+        return {
+            "duration_s": round(self.elapsed_s, 2),
+            "concurrency": self.concurrency,
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def format_report(report: Dict) -> str:
+    """
+    Render the report as a fixed-width table.
+    """
+    lines = [
+        f"duration={report['duration_s']}s concurrency={report['concurrency']} "
+        f"requests={report['total_requests']} throughput={report['throughput_rps']} req/s",
+        f"{'endpoint':<12} {'reqs':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for name, ep in report["endpoints"].items():
+        lines.append(
+            f"{name:<12} {ep['requests']:>7} {ep['errors']:>7} {ep['throughput_rps']:>8} "
+            f"{ep['p50_ms']:>9} {ep['p95_ms']:>9} {ep['p99_ms']:>9}"
+        )
+    return "\n".join(lines)
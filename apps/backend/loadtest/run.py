@@ -0,0 +1,228 @@
+# Description: End-to-end load-test entry point
+# Usage (from apps/backend):
+#   python -m loadtest.run --duration 30 --concurrency 20 --workers 2
+#   python -m loadtest.run --mix "match-stat=5,analyze-cv=1" --llm-latency-ms 800 --llm-error-rate 0.02
+# Notes:
+# - Starts local stubs for chat completions, embeddings and Supabase storage
+# - Runs the FastAPI app in a uvicorn subprocess against SQLite (default) or --database-url
+# - Seeds jobs and CVs, replays the mix, prints p50/p95/p99 per endpoint
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from loadtest.driver import Fixtures, LoadDriver, format_report, parse_mix, synthetic_cv, synthetic_job
+from loadtest.stubs import ChatCompletionsStub, EmbeddingsStub, StubConfig, SupabaseStorageStub
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SUPABASE_BUCKET = "cvscan-files"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def create_schema(database_url: str) -> None:
+    """
+    Create all tables on the target database (SQLite file or local Postgres).
+    Runs in a subprocess so the harness never imports the app's engine itself.
+    """
+    code = (
+        "from src.core.database import Base, engine\n"
+        "import src.models.cv_document, src.models.job, src.models.user, src.models.match_result\n"
+        "import src.models.leaderboard_entry\n"
+        "Base.metadata.create_all(bind=engine)\n"
+    )
+    env = {**os.environ, "DATABASE_URL": database_url, "PYTHONPATH": str(BACKEND_DIR)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, cwd=str(BACKEND_DIR))
+
+
+def start_app(workdir: Path, port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    """
+    Launch uvicorn with `workdir` as CWD so uploads/ and jobs/ are isolated.
+    """
+    cmd = [
+        sys.executable, "-m", "uvicorn", "src.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=str(workdir), env=env)
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout_s: float = 60.0) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"App exited during startup with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/v1/ping", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"App not ready after {timeout_s}s: {base_url}")
+
+
+def seed(
+    base_url: str,
+    workdir: Path,
+    storage: SupabaseStorageStub,
+    n_jobs: int,
+    n_local_cvs: int,
+    n_remote_cvs: int,
+    rng: random.Random,
+) -> Fixtures:
+    """
+    Create jobs (DB + jobs/<id>.json for match-stat), upload local CVs through
+    the API and park remote-only CVs in the Supabase stub.
+    """
+    job_ids: List[str] = []
+    job_texts: Dict[str, str] = {}
+    cv_filenames: List[str] = []
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+        for _ in range(n_jobs):
+            job = synthetic_job(rng)
+            resp = client.post("/api/v1/job", json=job)
+            resp.raise_for_status()
+            job_id = resp.json()["job_id"]
+            (workdir / "jobs" / f"{job_id}.json").write_text(json.dumps(job), encoding="utf-8")
+            job_ids.append(job_id)
+            job_texts[job_id] = job["description"]
+
+        for i in range(n_local_cvs):
+            name = f"seed_cv_{i}.txt"
+            body = synthetic_cv(rng).encode("utf-8")
+            resp = client.post("/api/v1/upload-cv", files={"file": (name, body, "text/plain")})
+            resp.raise_for_status()
+            cv_filenames.append(name)
+
+    db_cv_filenames = list(cv_filenames)
+    for i in range(n_remote_cvs):
+        name = f"remote_cv_{i}.txt"
+        storage.put(SUPABASE_BUCKET, name, synthetic_cv(rng).encode("utf-8"))
+        cv_filenames.append(name)
+
+    return Fixtures(
+        cv_filenames=cv_filenames,
+        db_cv_filenames=db_cv_filenames,
+        job_ids=job_ids,
+        job_texts=job_texts,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="CVScan end-to-end load test")
+    p.add_argument("--duration", type=float, default=30.0, help="Run time in seconds")
+    p.add_argument("--max-requests", type=int, default=None, help="Stop after N requests")
+    p.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual users")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    p.add_argument("--mix", default=None, help='Weighted mix, e.g. "upload-cv=1,match=3,match-stat=4,analyze-cv=2"')
+    p.add_argument("--database-url", default=None, help="Defaults to a SQLite file in the workdir")
+    p.add_argument("--workdir", default=None, help="Keep app files here instead of a temp dir")
+    p.add_argument("--jobs", type=int, default=10, help="Jobs to seed")
+    p.add_argument("--local-cvs", type=int, default=30, help="CVs uploaded before the run")
+    p.add_argument("--remote-cvs", type=int, default=10, help="CVs only available in Supabase stub")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", dest="json_path", default=None, help="Also write the report as JSON")
+    p.add_argument(
+        "--admission", action="store_true",
+        help="Keep admission control on (concurrency lanes + shedding; per-client rate limits stay off "
+             "since every virtual user shares one address)",
+    )
+    for svc in ("llm", "embed", "storage"):
+        p.add_argument(f"--{svc}-latency-ms", type=float, default=0.0)
+        p.add_argument(f"--{svc}-jitter-ms", type=float, default=0.0)
+        p.add_argument(f"--{svc}-error-rate", type=float, default=0.0)
+        p.add_argument(f"--{svc}-error-status", type=int, default=500)
+    return p
+
+
+def _stub_config(args, svc: str) -> StubConfig:
+    return StubConfig(
+        latency_ms=getattr(args, f"{svc}_latency_ms"),
+        jitter_ms=getattr(args, f"{svc}_jitter_ms"),
+        error_rate=getattr(args, f"{svc}_error_rate"),
+        error_status=getattr(args, f"{svc}_error_status"),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    rng = random.Random(args.seed)
+
+    own_workdir = args.workdir is None
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="cvscan-load-"))
+    (workdir / "jobs").mkdir(parents=True, exist_ok=True)
+    (workdir / "uploads").mkdir(parents=True, exist_ok=True)
+    database_url = args.database_url or f"sqlite:///{workdir / 'loadtest.db'}"
+
+    chat = ChatCompletionsStub(_stub_config(args, "llm")).start()
+    embed = EmbeddingsStub(_stub_config(args, "embed")).start()
+    storage = SupabaseStorageStub(_stub_config(args, "storage")).start()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "DATABASE_URL": database_url,
+        "LLM_PROVIDER": "openrouter",
+        "OPENROUTER_API_KEY": "stub-key",
+        "OPENROUTER_BASE_URL": f"{chat.url}/v1",
+        "OPENAI_API_KEY": "stub-key",
+        "OPENAI_BASE_URL": f"{embed.url}/v1",
+        "SUPABASE_URL": storage.url,
+        "SUPABASE_BUCKET": SUPABASE_BUCKET,
+        "ADMISSION_ENABLED": "1" if args.admission else "0",
+        "ADMISSION_RATE": "",
+    }
+
+    proc = None
+    try:
+        create_schema(database_url)
+        proc = start_app(workdir, port, args.workers, env)
+        wait_ready(base_url, proc)
+        fixtures = seed(base_url, workdir, storage, args.jobs, args.local_cvs, args.remote_cvs, rng)
+
+        driver = LoadDriver(base_url, fixtures, mix=parse_mix(args.mix), concurrency=args.concurrency, seed=args.seed)
+        report = asyncio.run(driver.run(duration_s=args.duration, max_requests=args.max_requests))
+        report["workers"] = args.workers
+        report["stubs"] = {
+            s.name: {"requests": s.requests, "injected_errors": s.errors} for s in (chat, embed, storage)
+        }
+        report["stubs"][storage.name]["not_modified"] = storage.not_modified
+        print(format_report(report))
+        if args.json_path:
+            Path(args.json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return 0
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        for stub in (chat, embed, storage):
+            stub.stop()
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
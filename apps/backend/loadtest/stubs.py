@@ -0,0 +1,250 @@
+# Description: Local stand-ins for the external services used by the backend
+# Notes:
+# - Chat completions (OpenAI / OpenRouter compatible): POST /v1/chat/completions
+# - Embeddings (OpenAI compatible): POST /v1/embeddings
+# - Supabase public storage: GET /storage/v1/object/public/<bucket>/<path>
+# - Each server has its own latency and error injection settings
+# - Stdlib only, so the harness runs without extra services
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+EMBEDDING_DIM = 1536
+
+
+@dataclass
+class StubConfig:
+    """
+    Latency and error injection for one stub server.
+    latency_ms +/- jitter_ms is slept before answering; error_rate in [0, 1]
+    is the share of requests answered with error_status instead.
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+
+class StubServer:
+    """
+    Threaded HTTP server running in a daemon thread.
+    Subclasses implement `handle(method, path, body)` -> (status, headers, body).
+    """
+
+    name = "stub"
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------- Request flow ----------
+
+    def _inject(self) -> Optional[int]:
+        """
+        Sleep for the configured latency, then decide whether to fail.
+        Returns the error status to send, or None.
+        """
+        cfg = self.config
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0
+            fail = cfg.error_rate > 0 and self._rng.random() < cfg.error_rate
+            if fail:
+                self.errors += 1
+        delay = max(0.0, cfg.latency_ms + jitter) / 1000.0
+        if delay:
+            time.sleep(delay)
+        return cfg.error_status if fail else None
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes):
+        return 404, {}, b""
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                error_status = server._inject()
+                if error_status is not None:
+                    status, headers, payload = error_status, {"Content-Type": "application/json"}, json.dumps(
+                        {"error": {"message": "injected failure", "type": "stub_error"}}
+                    ).encode()
+                else:
+                    status, headers, payload = server.handle(method, self.path, dict(self.headers), body)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if method != "HEAD":
+                    self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_HEAD(self):
+                self._dispatch("HEAD")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, *args):
+                # Keep load-test output readable
+                pass
+
+        return Handler
+
+
+def _json(status: int, data) -> tuple:
+    return status, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+
+class ChatCompletionsStub(StubServer):
+    """
+    OpenAI-compatible chat completions. Returns a JSON CV analysis as content,
+    derived deterministically from the prompt so repeated calls agree.
+    """
+
+    name = "chat"
+
+    def handle(self, method, path, headers, body):
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return _json(404, {"error": {"message": f"unknown route {path}"}})
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError:
+            return _json(400, {"error": {"message": "invalid JSON"}})
+        prompt = " ".join(str(m.get("content", "")) for m in req.get("messages", []))
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        content = json.dumps({
+            "score": 40 + digest[0] % 60,
+            "strengths": ["python", "fastapi"],
+            "gaps": ["kubernetes"],
+            "summary": "Stub analysis generated by the load-test harness.",
+        })
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        return _json(200, {
+            "id": f"chatcmpl-stub-{digest.hex()[:12]}",
+            "object": "chat.completion",
+            "model": req.get("model", "stub-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class EmbeddingsStub(StubServer):
+    """
+    OpenAI-compatible embeddings. Accepts strings or token-id arrays and returns
+    deterministic unit vectors seeded from the input.
+    """
+
+    name = "embeddings"
+
+    def __init__(self, *args, dim: int = EMBEDDING_DIM, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dim = dim
+
+    def _vector(self, item) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(json.dumps(item).encode()).digest()[:8], "little")
+        rng = random.Random(seed)
+        vec = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = sum(v * v for v in vec) ** 0.5 or 1.0
+        return [v / norm for v in vec]
+
+    def handle(self, method, path, headers, body):
+        if method != "POST" or not path.rstrip("/").endswith("/embeddings"):
+            return _json(404, {"error": {"message": f"unknown route {path}"}})
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError:
+            return _json(400, {"error": {"message": "invalid JSON"}})
+        inputs = req.get("input", [])
+        # A single string or a single token array is one input
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        data = [{"object": "embedding", "index": i, "embedding": self._vector(item)} for i, item in enumerate(inputs)]
+        return _json(200, {
+            "object": "list",
+            "data": data,
+            "model": req.get("model", "stub-embedding"),
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+        })
+
+
+class SupabaseStorageStub(StubServer):
+    """
+    Supabase public object storage. Objects are seeded with `put(bucket, path, data)`.
+    Responses carry an ETag; a matching If-None-Match is answered with 304.
+    """
+
+    name = "supabase"
+    _PREFIX = "/storage/v1/object/public/"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objects: Dict[str, bytes] = {}
+        self.not_modified = 0
+
+    def put(self, bucket: str, path: str, data: bytes) -> None:
+        self.objects[f"{bucket.strip('/')}/{path.lstrip('/')}"] = data
+
+    def handle(self, method, path, headers, body):
+        if method not in ("GET", "HEAD") or not path.startswith(self._PREFIX):
+            return _json(404, {"error": "not found"})
+        key = path[len(self._PREFIX):].split("?")[0]
+        data = self.objects.get(key)
+        if data is None:
+            return _json(404, {"statusCode": "404", "error": "not_found", "message": "Object not found"})
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if {k.lower(): v for k, v in headers.items()}.get("if-none-match") == etag:
+            with self._lock:
+                self.not_modified += 1
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": "application/octet-stream", "ETag": etag}, data
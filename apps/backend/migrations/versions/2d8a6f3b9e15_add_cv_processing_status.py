@@ -0,0 +1,31 @@
+"""add cv processing status
+
+Revision ID: 2d8a6f3b9e15
+Revises: 9c4f2a7e1d83
+Create Date: 2026-10-19 11:47:09.530271
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8a6f3b9e15'
+down_revision: Union[str, None] = '9c4f2a7e1d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Add background-processing state to cv_documents (existing rows are done)"""
+    op.add_column("cv_documents", sa.Column("status", sa.String(length=16), server_default="done", nullable=False))
+    op.add_column("cv_documents", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("cv_documents", sa.Column("error", sa.Text(), nullable=True))
+    op.add_column("cv_documents", sa.Column("status_updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+    op.create_index("ix_cv_documents_status", "cv_documents", ["status"], unique=False)
+
+def downgrade() -> None:
+    """Drop background-processing state"""
+    op.drop_index("ix_cv_documents_status", table_name="cv_documents")
+    op.drop_column("cv_documents", "status_updated_at")
+    op.drop_column("cv_documents", "error")
+    op.drop_column("cv_documents", "attempts")
+    op.drop_column("cv_documents", "status")
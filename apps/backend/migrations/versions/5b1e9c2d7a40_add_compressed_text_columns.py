@@ -0,0 +1,29 @@
+"""add compressed text columns
+
+Revision ID: 5b1e9c2d7a40
+Revises: 823e6f03cc59
+Create Date: 2026-10-19 10:12:31.402118
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9c2d7a40'
+down_revision: Union[str, None] = '823e6f03cc59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Add compressed copies of CV content / job descriptions; raw copies become optional"""
+    op.add_column("cv_documents", sa.Column("content_compressed", sa.LargeBinary(), nullable=True))
+    op.alter_column("cv_documents", "content", existing_type=sa.Text(), nullable=True)
+    op.add_column("jobs", sa.Column("description_compressed", sa.LargeBinary(), nullable=True))
+    op.alter_column("jobs", "description", existing_type=sa.Text(), nullable=True)
+
+def downgrade() -> None:
+    """Drop compressed copies (run `python -m src.services.text_backfill --restore-raw` first)"""
+    op.alter_column("jobs", "description", existing_type=sa.Text(), nullable=False)
+    op.drop_column("jobs", "description_compressed")
+    op.alter_column("cv_documents", "content", existing_type=sa.Text(), nullable=False)
+    op.drop_column("cv_documents", "content_compressed")
@@ -0,0 +1,42 @@
+"""add job_leaderboard table
+
+Revision ID: 6e1b7d4c2a90
+Revises: 2d8a6f3b9e15
+Create Date: 2026-10-19 13:21:44.902117
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1b7d4c2a90'
+down_revision: Union[str, None] = '2d8a6f3b9e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Create job_leaderboard table (fill it with python -m src.services.leaderboard)"""
+    op.create_table(
+        "job_leaderboard",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.String(length=36), nullable=False),
+        sa.Column("cv_id", sa.Integer(), nullable=False),
+        sa.Column("algorithm", sa.String(length=32), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("details", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "cv_id", "algorithm", name="uq_job_leaderboard_job_cv_algorithm"),
+    )
+    op.create_index("ix_job_leaderboard_id", "job_leaderboard", ["id"], unique=False)
+    op.create_index("ix_job_leaderboard_cv_id", "job_leaderboard", ["cv_id"], unique=False)
+    op.create_index(
+        "ix_job_leaderboard_job_algorithm_score", "job_leaderboard", ["job_id", "algorithm", "score"], unique=False
+    )
+
+def downgrade() -> None:
+    """Drop job_leaderboard table"""
+    op.drop_index("ix_job_leaderboard_job_algorithm_score", table_name="job_leaderboard")
+    op.drop_index("ix_job_leaderboard_cv_id", table_name="job_leaderboard")
+    op.drop_index("ix_job_leaderboard_id", table_name="job_leaderboard")
+    op.drop_table("job_leaderboard")
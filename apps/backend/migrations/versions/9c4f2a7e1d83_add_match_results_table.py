@@ -0,0 +1,42 @@
+"""add match_results table
+
+Revision ID: 9c4f2a7e1d83
+Revises: 5b1e9c2d7a40
+Create Date: 2026-10-19 11:02:54.118305
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4f2a7e1d83'
+down_revision: Union[str, None] = '5b1e9c2d7a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Create match_results table"""
+    op.create_table(
+        "match_results",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("cv_hash", sa.String(length=64), nullable=False),
+        sa.Column("job_hash", sa.String(length=64), nullable=False),
+        sa.Column("algorithm", sa.String(length=128), nullable=False),
+        sa.Column("version", sa.String(length=32), nullable=False),
+        sa.Column("result", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_match_results_id", "match_results", ["id"], unique=False)
+    op.create_index("ix_match_results_cache_key", "match_results", ["cache_key"], unique=True)
+    op.create_index("ix_match_results_cv_hash", "match_results", ["cv_hash"], unique=False)
+    op.create_index("ix_match_results_job_hash", "match_results", ["job_hash"], unique=False)
+
+def downgrade() -> None:
+    """Drop match_results table"""
+    op.drop_index("ix_match_results_job_hash", table_name="match_results")
+    op.drop_index("ix_match_results_cv_hash", table_name="match_results")
+    op.drop_index("ix_match_results_cache_key", table_name="match_results")
+    op.drop_index("ix_match_results_id", table_name="match_results")
+    op.drop_table("match_results")
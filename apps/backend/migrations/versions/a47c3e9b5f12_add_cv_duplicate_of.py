@@ -0,0 +1,25 @@
+"""add cv duplicate_of
+
+Revision ID: a47c3e9b5f12
+Revises: 6e1b7d4c2a90
+Create Date: 2026-10-19 14:05:31.270448
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a47c3e9b5f12'
+down_revision: Union[str, None] = '6e1b7d4c2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Link near-duplicate CVs to the document they resemble (filled by python -m src.services.near_duplicates)"""
+    op.add_column("cv_documents", sa.Column("duplicate_of", sa.Integer(), nullable=True))
+    op.create_index("ix_cv_documents_duplicate_of", "cv_documents", ["duplicate_of"], unique=False)
+
+def downgrade() -> None:
+    """Drop cv_documents.duplicate_of"""
+    op.drop_index("ix_cv_documents_duplicate_of", table_name="cv_documents")
+    op.drop_column("cv_documents", "duplicate_of")
@@ -0,0 +1,23 @@
+"""add job created_at
+
+Revision ID: c5d19e8f3a27
+Revises: a47c3e9b5f12
+Create Date: 2026-10-19 16:42:08.913204
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d19e8f3a27'
+down_revision: Union[str, None] = 'a47c3e9b5f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Creation time of jobs (watermark of incremental exports); existing rows get the migration time"""
+    op.add_column("jobs", sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+
+def downgrade() -> None:
+    """Drop jobs.created_at"""
+    op.drop_column("jobs", "created_at")
@@ -0,0 +1,23 @@
+"""add cv stored_name
+
+Revision ID: e3a8b6d1c094
+Revises: c5d19e8f3a27
+Create Date: 2026-10-19 18:20:44.517309
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8b6d1c094'
+down_revision: Union[str, None] = 'c5d19e8f3a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Unique name of a background upload's file under uploads/ (NULL: the file is uploads/<filename>)"""
+    op.add_column("cv_documents", sa.Column("stored_name", sa.String(length=300), nullable=True))
+
+def downgrade() -> None:
+    """Drop cv_documents.stored_name"""
+    op.drop_column("cv_documents", "stored_name")
@@ -0,0 +1,43 @@
+# Description: Bulk export of tables for analytics (streamed Parquet / CSV)
+# Endpoint:
+#   GET /api/v1/export/{table}?format=parquet|csv&columns=id,filename&since=2026-01-01T00:00:00Z
+#   tables: cv_documents, jobs, match_results, job_leaderboard
+# Notes:
+# - Streamed batch by batch with constant memory (see services/export.py)
+# - X-Export-Watermark is the created_at bound of the export (the newest one, held back by
+#   EXPORT_WATERMARK_LAG_S): pass it as `since` for the next incremental export, and dedupe
+#   exported rows on the table key (rows without created_at are part of every export)
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.services import export
+
+router = APIRouter()
+
+
+@router.get("/export/{table}")
+def export_table(
+    table: str,
+    format: Literal["parquet", "csv"] = "parquet",
+    columns: Optional[str] = Query(None, description="Comma-separated columns (default: all)"),
+    since: Optional[datetime] = Query(None, description="Only rows created after this watermark"),
+):
+    """Stream a table as Parquet or CSV."""
+    names = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    try:
+        plan = export.plan(table, format, names, since)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    headers = {"Content-Disposition": f'attachment; filename="{plan.filename}"'}
+    if plan.watermark is not None:
+        headers["X-Export-Watermark"] = plan.watermark.isoformat()
+    return StreamingResponse(export.stream(plan), media_type=export.MEDIA_TYPES[format], headers=headers)
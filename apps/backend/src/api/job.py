@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from src.core.database import get_db
 from src.models.job import Job
+from src.services.indexing import index_job, reindex_job
+from typing import Optional
 import uuid
 
 router = APIRouter()
@@ -12,8 +14,13 @@ class JobDescription(BaseModel):
     company: str
     description: str
 
+class JobUpdate(BaseModel):
+    title: Optional[str] = None
+    company: Optional[str] = None
+    description: Optional[str] = None
+
 @router.post("/job")
-def create_job(job: JobDescription, db: Session = Depends(get_db)):
+def create_job(job: JobDescription, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Store a job description directly in the PostgreSQL database."""
     job_id = str(uuid.uuid4())
 
@@ -33,6 +40,10 @@ def create_job(job: JobDescription, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    # Keep derived indexes (corpus stats, embeddings, leaderboard, ...) in sync once the response
+    # is sent: the embedding may hit the network and the leaderboard scores every CV
+    background_tasks.add_task(index_job, new_job.job_id, new_job.description)
+
     return {
         "status": "success",
         "job_id": new_job.job_id,
@@ -40,3 +51,38 @@ def create_job(job: JobDescription, db: Session = Depends(get_db)):
         "company": new_job.company,
         "message": "Job description stored successfully in database"
     }
+
+
+@router.put("/job/{job_id}")
+def update_job(job_id: str, update: JobUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Edit a stored job; a new description refreshes its embedding and candidate leaderboard (in the background)."""
+    job = db.query(Job).filter(Job.job_id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    description_changed = update.description is not None and update.description.strip() != job.description
+    if update.title is not None:
+        job.title = update.title.strip()
+    if update.company is not None:
+        job.company = update.company.strip()
+    if description_changed:
+        job.description = update.description.strip()
+
+    try:
+        db.commit()
+        db.refresh(job)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    if description_changed:
+        background_tasks.add_task(reindex_job, job.job_id, job.description)
+
+    return {
+        "status": "success",
+        "job_id": job.job_id,
+        "title": job.title,
+        "company": job.company,
+        "description_changed": description_changed,
+        "message": "Job description updated successfully"
+    }
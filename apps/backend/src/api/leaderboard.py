@@ -0,0 +1,35 @@
+# Description: Best candidates for a job, read from the materialized leaderboard
+# Endpoint:
+#   GET /api/v1/jobs/{job_id}/leaderboard?k=10
+# Notes:
+# - Maintained on write (see services/leaderboard.py): new CVs are merged in as they are
+#   stored, an edited job description rebuilds the job's board
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from src.core.database import get_db
+from src.models.job import Job
+from src.services import leaderboard
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}/leaderboard")
+def job_leaderboard(
+    job_id: str,
+    k: Optional[int] = Query(None, ge=1, le=leaderboard.LEADERBOARD_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Return the top CVs for a job by statistical match score."""
+    if db.query(Job.job_id).filter(Job.job_id == job_id).first() is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    return {
+        "job_id": job_id,
+        "algorithm": leaderboard.LEADERBOARD_ALGORITHM,
+        "size": leaderboard.LEADERBOARD_SIZE,
+        "results": leaderboard.top(db, job_id, k),
+    }
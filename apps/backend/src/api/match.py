@@ -3,12 +3,16 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from src.core.database import get_db
-from src.models.cv_document import CVDocument
+from src.models.cv_document import CVDocument, CV_DONE
 from src.models.job import Job
-from src.services.langchain_service import compute_similarity
+from src.services import match_cache, near_duplicates
+from src.services.langchain_service import embedding_backend_name, similarity_with_backend
 
 router = APIRouter()
 
+# Bump when the similarity computation changes (invalidates cached scores)
+SIMILARITY_VERSION = "1"
+
 class MatchRequest(BaseModel):
     cv_filename: str
     job_id: str
@@ -21,24 +25,52 @@ def match_cv_to_job(request: MatchRequest, db: Session = Depends(get_db)):
     cv = db.query(CVDocument).filter(CVDocument.filename == request.cv_filename).first()
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
+    if cv.status != CV_DONE:
+        # Background upload not processed yet (or failed): no extracted text to match
+        raise HTTPException(status_code=409, detail=f"CV is {cv.status}, see /api/v1/cvs/{cv.id}/status")
 
     # 2️⃣ Fetch job
     job = db.query(Job).filter(Job.job_id == request.job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job description not found")
 
-    # 3️⃣ Compute similarity score
+    # 3️⃣ Compute similarity score (cached per CV content / job content / embedding backend;
+    #    a near-duplicate CV is served the cached score of the CV it resembles, if any)
+    cv_text, job_text = cv.content, job.description
+    job_hash = match_cache.content_hash(job_text)
+    backend = embedding_backend_name()
+    algorithm = f"similarity:{backend}"
+    root_hash, _ = near_duplicates.root_hash(cv_text, cv.duplicate_of, lookup=False)
+    if root_hash is not None:
+        reused = match_cache.cache.lookup(match_cache.CacheKey(root_hash, job_hash, algorithm, SIMILARITY_VERSION))
+        if reused is not None:
+            return _response(cv, job, reused["score"], True)
+    key = match_cache.CacheKey(match_cache.content_hash(cv_text), job_hash, algorithm, SIMILARITY_VERSION)
+
+    def compute():
+        score, used = similarity_with_backend(cv_text, job_text)
+        return {"score": score, "backend": used}
+
     try:
-        score = compute_similarity(cv.content, job.description)
+        # A fallback score (OpenAI error -> word overlap) is answered but never cached under this backend.
+        # Not wrapped in a stage: similarity_with_backend times "embed" and "score" itself
+        result, cached = match_cache.cache.get_or_compute(
+            key, compute, cacheable=lambda r: r["backend"] == backend
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Similarity computation failed: {str(e)}")
 
     # 4️⃣ Return result
+    return _response(cv, job, result["score"], cached)
+
+
+def _response(cv: CVDocument, job: Job, score: float, cached: bool):
     return {
         "status": "success",
         "cv_filename": cv.filename,
         "job_title": job.title,
         "company": job.company,
         "score": score,
+        "cached": cached,
         "message": f"Similarity between CV '{cv.filename}' and job '{job.title}' at {job.company}"
     }
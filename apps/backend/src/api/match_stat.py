@@ -1,27 +1,31 @@
 # Description: FastAPI route for AI-Lite statistical matching (no LLM)
 # Endpoint: POST /api/v1/match-stat
-# Body: { "cv_filename": "...", "job_id": "..." }
-# Response: { "score": float, "details": { ... } }
+# Body: { "cv_filename": "...", "job_id": "...", "algorithm": "overlap" | "bm25" | "tfidf" }
+# Response: { "score": float, "details": { ... }, "cached": bool }
+
+from typing import Literal
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from src.services.match_stat_service import match_stat
+from src.services.match_stat_service import match_stat_async
 
 router = APIRouter()
 
 class MatchStatRequest(BaseModel):
     cv_filename: str
     job_id: str
+    algorithm: Literal["overlap", "bm25", "tfidf"] = "overlap"
 
 @router.post("/match-stat")
-def match_stat_endpoint(payload: MatchStatRequest):
+async def match_stat_endpoint(payload: MatchStatRequest):
     """
     Compute statistical match score between a CV and a job.
+    Async: a slow storage download waits on the event loop, not in a threadpool slot.
     """
     try:
-        result = match_stat(payload.cv_filename, payload.job_id)
-        # result already has {"score": .., "details": {...}}
+        result = await match_stat_async(payload.cv_filename, payload.job_id, payload.algorithm)
+        # result already has {"score": .., "details": {...}, "cached": ..}
         return result
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,44 @@
+# Description: Admin endpoints of the request profiler (mounted only when REQUEST_PROFILING=1)
+# Endpoints:
+#   POST /api/v1/admin/profiling/arm   { "path": "/api/v1/match-stat", "count": 1 }
+#   GET  /api/v1/admin/profiling/profiles
+#   GET  /api/v1/admin/profiling/profiles/{profile_id}  -> collapsed stacks (text/plain)
+# Notes:
+# - When REQUEST_PROFILING_TOKEN is set, every call needs the X-Profile-Token header
+# - Arming is per worker: with several workers, arm a count >= WEB_CONCURRENCY
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from src.core import request_profiler
+
+def require_token(x_profile_token: Optional[str] = Header(None)):
+    if request_profiler.REQUEST_PROFILING_TOKEN and x_profile_token != request_profiler.REQUEST_PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+router = APIRouter(prefix="/admin/profiling", dependencies=[Depends(require_token)])
+
+class ArmRequest(BaseModel):
+    path: str
+    count: int = Field(1, ge=1, le=100)
+
+@router.post("/arm")
+def arm_profiler(req: ArmRequest):
+    """Sample the next `count` requests whose path starts with `path`."""
+    return {"armed": request_profiler.arm(req.path, req.count)}
+
+@router.get("/profiles")
+def list_profiles():
+    """Stored profiles of this host, newest first."""
+    return {"profiles": request_profiler.list_profiles()}
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Collapsed stacks ("frame;frame;frame count"), for flamegraph.pl or speedscope."""
+    path = request_profiler.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path.read_text(encoding="utf-8")
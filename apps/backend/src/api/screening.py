@@ -0,0 +1,49 @@
+# Description: Two-stage screening of a candidate pool for a job
+# Endpoint:
+#   POST /api/v1/screening  {job_id, cv_ids?, top_k?, min_score?, prefilter?, algorithm?}
+# Notes:
+# - Every candidate gets a cheap pre-filter score; only the shortlist is analyzed by the LLM
+#   (see services/screening.py). The response reports how many LLM calls were saved.
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from src.services import screening
+from src.services.match_stat_service import ALGORITHMS
+
+router = APIRouter()
+
+
+class ScreeningRequest(BaseModel):
+    job_id: str
+    cv_ids: Optional[List[int]] = None
+    top_k: int = Field(screening.SCREENING_TOP_K, ge=1, le=screening.SCREENING_MAX_TOP_K)
+    min_score: Optional[float] = None
+    prefilter: Literal["auto", "stat", "embedding"] = "auto"
+    algorithm: str = screening.SCREENING_ALGORITHM
+    others_limit: int = Field(20, ge=0, le=200)
+
+
+@router.post("/screening")
+async def screen_candidates(req: ScreeningRequest):
+    """Pre-filter all candidates, then re-rank the shortlist with the LLM."""
+    if req.algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=422, detail=f"algorithm must be one of {ALGORITHMS}")
+    try:
+        return await screening.screen(
+            req.job_id,
+            cv_ids=req.cv_ids,
+            top_k=req.top_k,
+            min_score=req.min_score,
+            prefilter=req.prefilter,
+            algorithm=req.algorithm,
+            others_limit=req.others_limit,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except screening.LlmUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"LLM unavailable: {e}")
@@ -0,0 +1,83 @@
+# Description: Top-K semantic search over the local vector store
+# Endpoints:
+#   GET /api/v1/jobs/{job_id}/top-cvs?k=10  -> closest CVs for a job
+#   GET /api/v1/cvs/{cv_id}/top-jobs?k=10   -> closest jobs for a CV
+# Notes:
+# - Embeddings are written by the upload / job routes (see services/indexing.py);
+#   a document stored before the index existed is embedded on first lookup
+
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from src.core.database import get_db
+from src.models.cv_document import CVDocument, CV_DONE
+from src.models.job import Job
+from src.services import vector_store
+from src.services.langchain_service import embedding_backend_name
+
+router = APIRouter()
+
+
+def _query_vector(collection: str, item_id: str, text: str) -> np.ndarray:
+    """
+    Stored embedding of a document, embedding (and storing) it if missing.
+    """
+    index = vector_store.get_index(collection)
+    vector = index.get(item_id)
+    if vector is None:
+        if not vector_store.add_document(collection, item_id, text):
+            raise HTTPException(status_code=503, detail="No embedding backend available")
+        vector = index.get(item_id)
+    return vector
+
+
+@router.get("/jobs/{job_id}/top-cvs")
+def top_cvs(job_id: str, k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """Return the k CVs whose embeddings are closest to the job description."""
+    job: Optional[Job] = db.query(Job).filter(Job.job_id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    hits = vector_store.get_index("cvs").search(_query_vector("jobs", job_id, job.description), k)
+    ids = [int(cv_id) for cv_id, _ in hits]
+    filenames = dict(db.query(CVDocument.id, CVDocument.filename).filter(CVDocument.id.in_(ids)).all())
+
+    return {
+        "job_id": job_id,
+        "backend": embedding_backend_name(),
+        "results": [
+            {"cv_id": int(cv_id), "filename": filenames.get(int(cv_id)), "score": score}
+            for cv_id, score in hits
+            if int(cv_id) in filenames
+        ],
+    }
+
+
+@router.get("/cvs/{cv_id}/top-jobs")
+def top_jobs(cv_id: int, k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """Return the k jobs whose embeddings are closest to the CV."""
+    cv: Optional[CVDocument] = db.query(CVDocument).filter(CVDocument.id == cv_id).first()
+    if cv is None:
+        raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
+    if cv.status != CV_DONE:
+        # Background upload not processed yet (or failed): nothing to embed
+        raise HTTPException(status_code=409, detail=f"CV is {cv.status}, see /api/v1/cvs/{cv.id}/status")
+
+    hits = vector_store.get_index("jobs").search(_query_vector("cvs", str(cv_id), cv.content), k)
+    jobs = {
+        j.job_id: j
+        for j in db.query(Job).filter(Job.job_id.in_([job_id for job_id, _ in hits])).all()
+    }
+
+    return {
+        "cv_id": cv_id,
+        "backend": embedding_backend_name(),
+        "results": [
+            {"job_id": job_id, "title": jobs[job_id].title, "company": jobs[job_id].company, "score": score}
+            for job_id, score in hits
+            if job_id in jobs
+        ],
+    }
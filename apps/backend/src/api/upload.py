@@ -1,17 +1,28 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+import asyncio
+import os
 import shutil
 from pathlib import Path
+from uuid import uuid4
+from typing import Literal, Optional
 from sqlalchemy.orm import Session
 
-from src.utils.parsers import extract_text_from_pdf
 from src.utils.scoring import score_text
+from src.core.request_profiler import stage
 from src.core.database import SessionLocal
-from src.models.cv_document import CVDocument
+from src.models.cv_document import CVDocument, CV_DONE, CV_PENDING
+from src.services import ingestion
+from src.services.indexing import index_cv
 
 router = APIRouter()
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# "sync": extract + score before responding; "async": 202 + background processing
+UPLOAD_MODE = os.getenv("UPLOAD_MODE", "sync").lower()
+
 # Dependency for database session
 def get_db():
     db = SessionLocal()
@@ -21,43 +32,133 @@ def get_db():
         db.close()
 
 @router.post("/upload-cv")
-async def upload_cv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_cv(
+    file: UploadFile = File(...),
+    mode: Optional[Literal["sync", "async"]] = Query(None, description="Overrides UPLOAD_MODE"),
+    db: Session = Depends(get_db),
+):
     """Upload a CV, extract its content, compute a score, and store in DB."""
-    if not file.filename.endswith((".pdf", ".txt")):
+    # Client paths are not ours to follow: keep the bare file name
+    filename = Path((file.filename or "").replace("\\", "/")).name
+    if not filename.endswith((".pdf", ".txt")):
         raise HTTPException(status_code=400, detail="Only PDF or TXT files are allowed")
+    background = (mode or UPLOAD_MODE) == "async"
 
-    file_path = UPLOAD_DIR / file.filename
+    # A background upload is read later by a worker: give it a name no other upload can take
+    stored_name = f"{uuid4().hex}_{filename}" if background else filename
+    file_path = UPLOAD_DIR / stored_name
 
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save file (blocking work runs in the threadpool, never on the event loop)
+    await run_in_threadpool(_save, file.file, file_path)
 
-    # Extract text
-    if file.filename.endswith(".pdf"):
-        text = extract_text_from_pdf(str(file_path))
-    else:
-        try:
-            text = file_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error reading TXT: {e}")
+    if background:
+        return await _enqueue(filename, stored_name, db)
+
+    # Extract text (PDF extraction is bounded by PDF_MAX_PAGES / PDF_TIME_BUDGET_S / PDF_MAX_CHARS)
+    try:
+        text, truncated, extractor = await run_in_threadpool(ingestion.extract_upload, file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        file_type = "PDF" if filename.endswith(".pdf") else "TXT"
+        raise HTTPException(status_code=500, detail=f"Error reading {file_type}: {e}")
 
     # Compute score
-    score = score_text(text)
+    with stage("score"):
+        score = await run_in_threadpool(score_text, text)
+
+    # Re-submission of a stored CV? (MinHash/LSH, sub-linear)
+    with stage("dedup"):
+        duplicate = await run_in_threadpool(ingestion.find_duplicate, text)
+    duplicate_of = duplicate["cv_id"] if duplicate else None
 
     # Store in DB
     cv_doc = CVDocument(
-        filename=file.filename,
+        filename=filename,
         content=text,
-        score=score
+        score=score,
+        status=CV_DONE,
+        duplicate_of=duplicate_of,
     )
-    db.add(cv_doc)
-    db.commit()
-    db.refresh(cv_doc)
+    await run_in_threadpool(_store, db, cv_doc)
+
+    # Keep derived indexes (corpus stats, embeddings, ...) in sync; embedding may hit the network
+    await run_in_threadpool(index_cv, cv_doc.id, text, duplicate_of)
 
     return {
         "status": "success",
-        "filename": file.filename,
+        "filename": filename,
         "score": score,
         "id": cv_doc.id,
+        "truncated": truncated,
+        "extractor": extractor,
+        "near_duplicate": (
+            {"cv_id": duplicate_of, "similarity": duplicate["similarity"]} if duplicate else None
+        ),
         "message": "CV uploaded, processed, and stored successfully"
     }
+
+
+def _save(source, file_path: Path) -> None:
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
+
+def _store(db: Session, cv_doc: CVDocument) -> None:
+    db.add(cv_doc)
+    db.commit()
+    db.refresh(cv_doc)
+
+
+def _drop(db: Session, cv_doc: CVDocument, stored_name: str) -> None:
+    db.delete(cv_doc)
+    db.commit()
+    (UPLOAD_DIR / stored_name).unlink(missing_ok=True)
+
+
+async def _enqueue(filename: str, stored_name: str, db: Session) -> JSONResponse:
+    """Store a pending row for the saved file and hand it to the ingestion queue."""
+    if not ingestion.queue.running:
+        (UPLOAD_DIR / stored_name).unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail="Background processing is not available")
+
+    cv_doc = CVDocument(filename=filename, stored_name=stored_name, content=None, score=0, status=CV_PENDING)
+    await run_in_threadpool(_store, db, cv_doc)
+
+    try:
+        # On the event loop: the asyncio queue is not thread-safe
+        ingestion.queue.submit(cv_doc.id)
+    except asyncio.QueueFull:
+        # The client is told to retry: drop the row, or the retry would store the CV twice
+        await run_in_threadpool(_drop, db, cv_doc, stored_name)
+        raise HTTPException(status_code=503, detail="Upload queue is full, retry later", headers={"Retry-After": "5"})
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": CV_PENDING,
+            "filename": filename,
+            "id": cv_doc.id,
+            "status_url": f"/api/v1/cvs/{cv_doc.id}/status",
+            "message": "CV uploaded, processing in the background"
+        },
+    )
+
+
+@router.get("/cvs/{cv_id}/status")
+def cv_status(cv_id: int, db: Session = Depends(get_db)):
+    """Processing state of an uploaded CV (pending, processing, done, failed)."""
+    cv = db.query(CVDocument).filter(CVDocument.id == cv_id).first()
+    if cv is None:
+        raise HTTPException(status_code=404, detail="CV not found")
+    return {
+        "id": cv.id,
+        "filename": cv.filename,
+        "status": cv.status,
+        "attempts": cv.attempts,
+        "error": cv.error,
+        "score": cv.score if cv.status == CV_DONE else None,
+        "near_duplicate_of": cv.duplicate_of,
+        "updated_at": cv.status_updated_at.isoformat() if cv.status_updated_at else None,
+        "queue_depth": ingestion.queue.depth(),
+    }
@@ -0,0 +1,242 @@
+# Description: Admission control / load shedding (pure ASGI middleware, per worker)
+# Notes:
+# - Every request is put in a route class: "health" (never limited, never shed),
+#   "expensive" (LLM, uploads) or "cheap" (everything else)
+# - Per class: a concurrency limit with a bounded FIFO wait queue. A request that would
+#   wait longer than the class's max queue wait is shed with 503 + Retry-After (early,
+#   when recent waits already exceed it, instead of after timing out)
+# - Per client and class: a token bucket; an empty bucket answers 429 + Retry-After
+# - Config maps are "class=value" lists, e.g. ADMISSION_CONCURRENCY="expensive=4,cheap=64"
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+HEALTH, EXPENSIVE, CHEAP = "health", "expensive", "cheap"
+
+
+def _parse_map(spec: str) -> Dict[str, str]:
+    return {k.strip(): v.strip() for k, v in (item.split("=", 1) for item in spec.split(",") if "=" in item)}
+
+
+def _parse_paths(spec: str) -> List[str]:
+    return [p.strip() for p in spec.split(",") if p.strip()]
+
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1").lower() in ("1", "true", "yes")
+ADMISSION_HEALTH_PATHS = _parse_paths(os.getenv("ADMISSION_HEALTH_PATHS", "/api/v1/health,/api/v1/ping,/"))
+ADMISSION_EXPENSIVE_PATHS = _parse_paths(os.getenv("ADMISSION_EXPENSIVE_PATHS", "/api/v1/ai/,/api/v1/upload-cv,/api/v1/screening"))
+ADMISSION_CONCURRENCY = {k: int(v) for k, v in _parse_map(os.getenv("ADMISSION_CONCURRENCY", "expensive=4,cheap=64")).items()}
+ADMISSION_MAX_QUEUE = {k: int(v) for k, v in _parse_map(os.getenv("ADMISSION_MAX_QUEUE", "expensive=16,cheap=256")).items()}
+ADMISSION_MAX_WAIT_MS = {k: float(v) for k, v in _parse_map(os.getenv("ADMISSION_MAX_WAIT_MS", "expensive=2000,cheap=500")).items()}
+# rate:burst per client (requests per second; 0 disables the bucket)
+ADMISSION_RATE = {
+    k: tuple(float(x) for x in v.split(":"))
+    for k, v in _parse_map(os.getenv("ADMISSION_RATE", "expensive=0.5:5,cheap=20:40")).items()
+}
+ADMISSION_TRUST_FORWARDED = os.getenv("ADMISSION_TRUST_FORWARDED", "0").lower() in ("1", "true", "yes")
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+
+
+class Shed(Exception):
+    def __init__(self, status: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def route_class(path: str) -> str:
+    if any(path == p or (p != "/" and path.startswith(p.rstrip("/") + "/")) for p in ADMISSION_HEALTH_PATHS):
+        return HEALTH
+    if any(path.startswith(p) for p in ADMISSION_EXPENSIVE_PATHS):
+        return EXPENSIVE
+    return CHEAP
+
+
+class Lane:
+    """
+    Concurrency limit + FIFO wait queue for one route class. Slots are handed
+    directly to the oldest waiter on release, so waiters are never starved.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait_s: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.wait_ewma = 0.0
+        self.admitted = 0
+        self.shed = 0
+
+    def _observe(self, waited: float) -> None:
+        self.wait_ewma = 0.8 * self.wait_ewma + 0.2 * waited
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            self._observe(0.0)
+            return
+        if len(self.waiters) >= self.max_queue or self.wait_ewma > self.max_wait_s:
+            self.shed += 1
+            raise Shed(503, f"Server busy ({self.name} requests)", self.max_wait_s)
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        start = time.monotonic()
+        # asyncio.wait never cancels the future, so a slot handed over at the deadline is not lost
+        try:
+            await asyncio.wait([future], timeout=self.max_wait_s)
+        except asyncio.CancelledError:
+            # Client gone while queued: leave the queue, or pass on a slot already handed over
+            if future.done():
+                self.release()
+            else:
+                future.cancel()
+                self.waiters.remove(future)
+            raise
+        waited = time.monotonic() - start
+        self._observe(waited)
+        if not future.done():
+            future.cancel()
+            self.waiters.remove(future)
+            self.shed += 1
+            raise Shed(503, f"Server busy ({self.name} requests)", self.max_wait_s)
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)  # slot passes to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "wait_ewma_ms": round(self.wait_ewma * 1000, 1),
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class TokenBuckets:
+    """
+    One bucket per client for a route class: `rate` tokens/s, up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = ADMISSION_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.limited = 0
+
+    def take(self, client: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        tokens, last = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            raise Shed(429, "Too many requests", (1.0 - tokens) / self.rate)
+        self._buckets[client] = (tokens - 1.0, now)
+        if len(self._buckets) > self.max_clients:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        # Clients whose bucket has refilled carry no state worth keeping
+        full_after = self.burst / self.rate
+        self._buckets = {c: (t, last) for c, (t, last) in self._buckets.items() if now - last < full_after}
+
+
+class AdmissionController:
+    def __init__(self):
+        self.lanes: Dict[str, Lane] = {
+            name: Lane(
+                name,
+                ADMISSION_CONCURRENCY.get(name, 64),
+                ADMISSION_MAX_QUEUE.get(name, 256),
+                ADMISSION_MAX_WAIT_MS.get(name, 1000) / 1000,
+            )
+            for name in (EXPENSIVE, CHEAP)
+        }
+        self.buckets: Dict[str, TokenBuckets] = {
+            name: TokenBuckets(rate, burst) for name, (rate, burst) in ADMISSION_RATE.items() if rate > 0
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "lanes": {name: lane.snapshot() for name, lane in self.lanes.items()},
+            "rate_limited": {name: b.limited for name, b in self.buckets.items()},
+        }
+
+
+controller = AdmissionController()
+
+
+def client_id(scope) -> str:
+    if ADMISSION_TRUST_FORWARDED:
+        for key, value in scope.get("headers", []):
+            if key == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying `controller` to every HTTP request.
+    """
+
+    def __init__(self, app, admission: Optional[AdmissionController] = None):
+        self.app = app
+        self.admission = admission or controller
+
+    async def __call__(self, scope, receive, send):
+        # Preflights (answered by CORS) cost nothing and must not use up tokens or slots
+        if scope["type"] != "http" or not ADMISSION_ENABLED or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        cls = route_class(scope["path"])
+        if cls == HEALTH:
+            return await self.app(scope, receive, send)
+
+        lane = self.admission.lanes[cls]
+        try:
+            bucket = self.admission.buckets.get(cls)
+            if bucket is not None:
+                bucket.take(client_id(scope))
+            await lane.acquire()
+        except Shed as shed:
+            return await _reject(send, shed)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
+
+
+async def _reject(send, shed: Shed) -> None:
+    body = json.dumps({"detail": shed.detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": shed.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(shed.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
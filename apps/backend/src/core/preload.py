@@ -0,0 +1,103 @@
+# Description: Pre-fork preload of read-only data shared by all workers
+# Notes:
+# - Run once in the gunicorn master (preload_app) before workers fork, so the
+#   loaded tables/indexes are shared copy-on-write instead of built per worker
+# - Services register their own loaders with @register_preload
+# - Must not open sockets, threads or DB connections (they don't survive fork)
+
+from __future__ import annotations
+
+import gc
+import logging
+from typing import Callable, Dict, List
+
+from src.core.startup_profiler import profile_step
+
+logger = logging.getLogger("uvicorn.error")
+
+_LOADERS: Dict[str, Callable[[], None]] = {}
+
+
+def register_preload(name: str) -> Callable:
+    """
+    Decorator: register a zero-arg loader run by `preload()`.
+    """
+    def decorator(fn: Callable[[], None]) -> Callable[[], None]:
+        _LOADERS[name] = fn
+        return fn
+    return decorator
+
+
+@register_preload("pdf_libs")
+def _preload_pdf_libs() -> None:
+    from src.utils.parsers import load_pdf_libs
+    load_pdf_libs()
+
+
+@register_preload("text_tables")
+def _preload_text_tables() -> None:
+    # Stopwords, tokenizer regex and scoring keywords are module-level constants
+    import src.services.match_stat_service  # noqa: F401
+    import src.utils.scoring  # noqa: F401
+
+
+@register_preload("langchain_openai")
+def _preload_langchain() -> None:
+    # Import only: the client itself holds connections and is built per worker
+    from src.services import langchain_service
+    if langchain_service.USE_OPENAI:
+        import langchain_openai  # noqa: F401
+
+
+@register_preload("hashed_embeddings")
+def _preload_hashed_embeddings() -> None:
+    # Random projection matrix of the offline embedding backend (a few MB, read-only)
+    from src.services import langchain_service
+    if langchain_service.EMBEDDING_BACKEND == "hashed":
+        from src.services.hashed_embeddings import get_projection
+        get_projection()
+
+
+@register_preload("corpus_stats")
+def _preload_corpus_stats() -> None:
+    # BM25 / TF-IDF document frequencies (workers then only tail the delta log)
+    from src.services.corpus_stats import get_stats
+    get_stats()
+
+
+@register_preload("vector_store")
+def _preload_vector_store() -> None:
+    # Map the embedding matrices and build the id maps once (pages are shared, not copied)
+    from src.services.vector_store import COLLECTIONS, get_index
+    for collection in COLLECTIONS:
+        len(get_index(collection))
+
+
+@register_preload("token_corpus")
+def _preload_token_corpus() -> None:
+    # Map the CSR arrays and read the vocabulary once
+    from src.services.token_corpus import get_corpus
+    corpus = get_corpus()
+    if corpus is not None:
+        len(corpus)
+
+
+def preload(freeze: bool = True) -> List[str]:
+    """
+    Run every registered loader, then move the resulting objects to the GC's
+    permanent generation so collections in the workers don't touch (and copy)
+    the shared pages. Returns the names of loaders that succeeded.
+    """
+    done: List[str] = []
+    for name, loader in _LOADERS.items():
+        try:
+            with profile_step(name, kind="preload"):
+                loader()
+            done.append(name)
+        except Exception as e:
+            # A missing optional index must not stop the server from starting
+            logger.warning("Preload step %s failed: %s", name, e)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return done
@@ -0,0 +1,239 @@
+# Description: Opt-in per-request profiling (Server-Timing stages + sampling profiler)
+# Notes:
+# - Enabled with REQUEST_PROFILING=1; otherwise the middleware is not installed and
+#   `stage()` returns a shared no-op context manager
+# - When enabled, every response carries Server-Timing with the time spent per stage
+#   (extraction, tokenize, score, db, llm, embed) summed over all threads of the request
+# - A request is sampled when it sends "X-Profile: 1" (or the REQUEST_PROFILING_TOKEN value),
+#   or when it matches a path armed via POST /api/v1/admin/profiling/arm. A sampler thread
+#   records the stacks of all threads every REQUEST_PROFILE_INTERVAL_MS; the collapsed stacks
+#   (flamegraph.pl / speedscope format) are stored in REQUEST_PROFILE_DIR and the response
+#   names the file in X-Profile-Id
+# - The sampler sees every thread of the worker, so concurrent requests show up too
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "0").lower() in ("1", "true", "yes")
+REQUEST_PROFILING_TOKEN = os.getenv("REQUEST_PROFILING_TOKEN", "")
+REQUEST_PROFILE_DIR = Path(os.getenv("REQUEST_PROFILE_DIR", "data/profiles"))
+REQUEST_PROFILE_INTERVAL_MS = float(os.getenv("REQUEST_PROFILE_INTERVAL_MS", "5"))
+
+_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+_NOOP = nullcontext()
+
+# Leaf frames (module, function) of threads that are just waiting (dropped from samples);
+# matched by module too, so application functions named get / wait are kept
+_IDLE_FRAMES = {
+    ("selectors", "select"),
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"),
+    ("socket", "accept"),
+    ("concurrent.futures.thread", "_worker"),
+    ("asyncio.base_events", "run_forever"),
+    ("multiprocessing.connection", "poll"),
+}
+
+
+# ---------- Stages ----------
+
+@contextmanager
+def _timed(name: str, timings: Dict[str, float]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Shared by the threads of one request (to_thread copies the context, not the dict)
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start)
+
+
+def stage(name: str):
+    """
+    Time a block as one Server-Timing stage of the current request.
+    No-op (shared nullcontext) when profiling is disabled or outside a request.
+    Stages must not nest (time would be counted twice): wrap leaf work only.
+    """
+    if not REQUEST_PROFILING:
+        return _NOOP
+    timings = _timings.get()
+    if timings is None:
+        return _NOOP
+    return _timed(name, timings)
+
+
+def server_timing(timings: Dict[str, float], total_s: float) -> str:
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ---------- Sampling profiler ----------
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+class Sampler:
+    """
+    Samples the Python stacks of every other thread until `stop()`.
+    """
+
+    def __init__(self, interval_s: float = REQUEST_PROFILE_INTERVAL_MS / 1000):
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval_s):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                thread = names.get(ident) or str(ident)
+                self.stacks[";".join([thread] + stack[::-1])] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ---------- Arming (admin endpoint) ----------
+
+_armed: Dict[str, int] = {}
+_armed_lock = threading.Lock()
+
+
+def arm(path_prefix: str, count: int = 1) -> Dict[str, int]:
+    """
+    Profile the next `count` requests whose path starts with `path_prefix`.
+    """
+    with _armed_lock:
+        _armed[path_prefix] = _armed.get(path_prefix, 0) + count
+        return dict(_armed)
+
+
+def _take_armed(path: str) -> bool:
+    with _armed_lock:
+        for prefix, left in _armed.items():
+            if left > 0 and path.startswith(prefix):
+                _armed[prefix] = left - 1
+                return True
+    return False
+
+
+def _wants_profile(scope) -> bool:
+    for key, value in scope.get("headers", []):
+        if key == b"x-profile":
+            value = value.decode("latin-1")
+            return value == REQUEST_PROFILING_TOKEN if REQUEST_PROFILING_TOKEN else value in ("1", "true")
+    return _take_armed(scope["path"])
+
+
+def list_profiles() -> List[Dict]:
+    if not REQUEST_PROFILE_DIR.exists():
+        return []
+    files = sorted(REQUEST_PROFILE_DIR.glob("*.collapsed"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [{"id": p.stem, "bytes": p.stat().st_size} for p in files]
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if not re.fullmatch(r"[\w.-]+", profile_id):
+        return None
+    path = REQUEST_PROFILE_DIR / f"{profile_id}.collapsed"
+    return path if path.exists() else None
+
+
+# ---------- Middleware ----------
+
+class RequestProfilingMiddleware:
+    """
+    Pure ASGI middleware: collects stage timings for every request, samples the requested ones.
+    Only added to the app when REQUEST_PROFILING is on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        sampler = profile_id = None
+        if _wants_profile(scope):
+            slug = re.sub(r"[^\w-]+", "_", scope["path"]).strip("_") or "root"
+            profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{scope['method'].lower()}-{slug}"
+            sampler = Sampler().start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, time.perf_counter() - start).encode()))
+                if profile_id:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            if sampler is not None:
+                # Joining the sampler thread and writing the file would block the loop
+                await asyncio.to_thread(_save_profile, sampler, profile_id)
+
+
+def _save_profile(sampler: Sampler, profile_id: str) -> None:
+    sampler.stop()
+    REQUEST_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (REQUEST_PROFILE_DIR / f"{profile_id}.collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+
+
+# ---------- DB stage (SQLAlchemy events) ----------
+
+def instrument_engine(engine) -> None:
+    """
+    Time every SQL statement as the "db" stage. Installed only when profiling is on.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("request_profiler_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["request_profiler_start"].pop()
+        timings = _timings.get()
+        if timings is not None:
+            timings["db"] = timings.get("db", 0.0) + (time.perf_counter() - started)
@@ -0,0 +1,116 @@
+# Description: Single-flight coalescing of identical in-flight computations (per worker)
+# Notes:
+# - Keyed by operation + input hash (the match cache key): while one computation for a key runs,
+#   identical calls wait for it and share its result, or its exception, instead of repeating it
+# - Nothing is kept once the computation finishes, so results are never stale (caching is
+#   match_cache's job)
+# - `do` is for threadpool code (followers block on an Event), `do_async` for coroutines
+#   (followers await the leader's task; it is shielded, so a cancelled leader request does
+#   not cancel the work the others are waiting on)
+# - Per-operation counters are served by GET /api/v1/health/single-flight
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1").lower() in ("1", "true", "yes")
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    In-flight call table. Both variants return (result, coalesced).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, op: str, name: str) -> None:
+        with self._lock:
+            counters = self.stats.setdefault(op, {"executed": 0, "coalesced": 0, "errors_shared": 0})
+            counters[name] += 1
+
+    # ---------- Threads ----------
+
+    def do(self, key: str, fn: Callable[[], Any], op: str = "default") -> Tuple[Any, bool]:
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn(), False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count(op, "coalesced")
+            call.event.wait()
+            if call.error is not None:
+                self._count(op, "errors_shared")
+                raise call.error
+            return call.result, True
+
+        self._count(op, "executed")
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    # ---------- Coroutines ----------
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]], op: str = "default") -> Tuple[Any, bool]:
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn(), False
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        # Only the event loop thread touches _tasks; a task of another (closed) loop is ignored
+        leader = task is None or task.get_loop() is not loop
+        if leader:
+            self._count(op, "executed")
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._task_done(key, t))
+        else:
+            self._count(op, "coalesced")
+        try:
+            return await asyncio.shield(task), not leader
+        except Exception:
+            if not leader:
+                self._count(op, "errors_shared")
+            raise
+
+    def _task_done(self, key: str, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            task.exception()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": SINGLE_FLIGHT_ENABLED,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "operations": {op: dict(counters) for op, counters in self.stats.items()},
+            }
+
+
+flights = SingleFlight()
@@ -0,0 +1,111 @@
+# Description: Opt-in startup profiler (import + initialization time per module)
+# Notes:
+# - Enabled with STARTUP_PROFILE=1; otherwise every helper is a no-op
+# - Imports are timed by wrapping builtins.__import__ until `finish()` is called
+# - Lazy initializations (embeddings client, PDF libs, ...) are timed with `profile_step`
+
+from __future__ import annotations
+
+import builtins
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger("uvicorn.error")
+
+_lock = threading.Lock()
+_imports: Dict[str, Dict[str, float]] = {}
+_steps: List[Dict] = []
+_stack: List[List[float]] = []  # [start, child_time] per in-flight import
+_original_import = builtins.__import__
+_started_at = time.perf_counter()
+_finished_at: Optional[float] = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Relative or already-loaded imports are cheap: don't time them
+    if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+        return _original_import(name, globals, locals, fromlist, level)
+    frame = [time.perf_counter(), 0.0]
+    _stack.append(frame)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _stack.pop()
+        total = time.perf_counter() - frame[0]
+        if _stack:
+            _stack[-1][1] += total
+        if name not in _imports:
+            _imports[name] = {"inclusive_ms": total * 1000.0, "self_ms": (total - frame[1]) * 1000.0}
+
+
+def install() -> None:
+    """
+    Start timing imports. Call as early as possible in src.main.
+    """
+    if STARTUP_PROFILE and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+@contextmanager
+def profile_step(name: str, kind: str = "init") -> Iterator[None]:
+    """
+    Time one initialization step (e.g. building a client). No-op when disabled.
+    """
+    if not STARTUP_PROFILE:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _steps.append({
+                "name": name,
+                "kind": kind,
+                "ms": round((time.perf_counter() - start) * 1000.0, 2),
+                "at_ms": round((start - _started_at) * 1000.0, 2),
+            })
+
+
+def finish() -> None:
+    """
+    Stop timing imports (startup is over) and log the report.
+    """
+    global _finished_at
+    if not STARTUP_PROFILE:
+        return
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _original_import
+    _finished_at = time.perf_counter()
+    rep = report(top_n=15)
+    logger.info("Startup profile: %.1f ms until ready", rep["startup_ms"])
+    for imp in rep["imports"]:
+        logger.info("  import %-40s %8.1f ms (self %.1f ms)", imp["module"], imp["inclusive_ms"], imp["self_ms"])
+    for step in rep["steps"]:
+        logger.info("  %-6s %-40s %8.1f ms", step["kind"], step["name"], step["ms"])
+
+
+def report(top_n: int = 30) -> Dict:
+    """
+    Slowest top-level imports (by inclusive time) plus all timed steps.
+    """
+    end = _finished_at or time.perf_counter()
+    imports = sorted(_imports.items(), key=lambda kv: kv[1]["inclusive_ms"], reverse=True)[:top_n]
+    with _lock:
+        steps = list(_steps)
+    return {
+        "enabled": STARTUP_PROFILE,
+        "startup_ms": round((end - _started_at) * 1000.0, 2),
+        "imports": [
+            {"module": name, "inclusive_ms": round(t["inclusive_ms"], 2), "self_ms": round(t["self_ms"], 2)}
+            for name, t in imports
+        ],
+        "steps": steps,
+    }
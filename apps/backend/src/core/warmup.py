@@ -0,0 +1,48 @@
+# Description: Optional warm-up hook for heavy, lazily imported dependencies
+# Notes:
+# - Scheduled from the app lifespan as a background task, so it runs once the
+#   server is accepting connections instead of delaying the port bind
+# - WARMUP_ON_START=0 disables it (first request then pays the import cost)
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+from src.core import startup_profiler
+
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1").lower() in ("1", "true", "yes")
+WARMUP_DELAY_S = float(os.getenv("WARMUP_DELAY_S", "0"))
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def warm_up() -> None:
+    """
+    Import and initialize heavy modules (PDF parsers, embeddings client).
+    Safe to call more than once.
+    """
+    from src.services import langchain_service
+    from src.utils import parsers
+
+    with startup_profiler.profile_step("warm_up", kind="hook"):
+        parsers.load_pdf_libs()
+        langchain_service.get_embeddings_model()
+        if langchain_service.EMBEDDING_BACKEND == "hashed":
+            from src.services.hashed_embeddings import get_projection
+            get_projection()
+
+
+async def run_warm_up() -> None:
+    """
+    Yield to the event loop (so uvicorn binds the socket), then warm up in a thread.
+    """
+    await asyncio.sleep(WARMUP_DELAY_S)
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        # Never take the worker down: requests will retry the lazy init
+        logger.warning("Warm-up failed: %s", e)
+    finally:
+        startup_profiler.finish()
@@ -0,0 +1,146 @@
+# Description: Per-worker health tracking for multi-worker serving
+# Notes:
+# - Each worker process counts its requests in memory (ASGI middleware)
+# - If WORKER_HEALTH_DIR is set (gunicorn.conf.py does it), each worker writes a
+#   small heartbeat file there; any worker can then report on all of them
+# - Workers whose heartbeat is older than 3 intervals are reported as stale
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+WORKER_HEALTH_DIR = os.getenv("WORKER_HEALTH_DIR")
+HEARTBEAT_INTERVAL_S = float(os.getenv("WORKER_HEARTBEAT_INTERVAL_S", "5"))
+
+
+class WorkerState:
+    """
+    Counters for the current process. Reset after fork (pid changes).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.last_request_at: Optional[float] = None
+        self.max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        return {
+            "pid": self.pid,
+            "started_at": self.started_at,
+            "uptime_seconds": round(now - self.started_at, 2),
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "last_request_at": self.last_request_at,
+            "max_requests": self.max_requests,
+            "heartbeat_at": now,
+        }
+
+
+state = WorkerState()
+
+
+def _ensure_current_process() -> None:
+    if state.pid != os.getpid():
+        state.reset()
+
+
+def write_heartbeat() -> None:
+    """
+    Atomically write this worker's snapshot to WORKER_HEALTH_DIR/<pid>.json.
+    """
+    if not WORKER_HEALTH_DIR:
+        return
+    _ensure_current_process()
+    directory = Path(WORKER_HEALTH_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".{state.pid}.json.tmp"
+    tmp.write_text(json.dumps(state.snapshot()), encoding="utf-8")
+    os.replace(tmp, directory / f"{state.pid}.json")
+
+
+def remove_heartbeat(pid: Optional[int] = None) -> None:
+    if not WORKER_HEALTH_DIR:
+        return
+    try:
+        (Path(WORKER_HEALTH_DIR) / f"{pid or os.getpid()}.json").unlink()
+    except FileNotFoundError:
+        pass
+
+
+async def heartbeat_loop() -> None:
+    """
+    Keep idle workers visible: refresh the heartbeat every interval.
+    """
+    while True:
+        try:
+            write_heartbeat()
+        except OSError:
+            pass
+        await asyncio.sleep(HEARTBEAT_INTERVAL_S)
+
+
+def all_workers() -> Dict:
+    """
+    Report every worker that wrote a heartbeat (or only this one if the
+    directory is not configured).
+    """
+    _ensure_current_process()
+    if not WORKER_HEALTH_DIR:
+        return {"current_pid": state.pid, "workers": [dict(state.snapshot(), status="ok")]}
+    workers: List[Dict] = []
+    now = time.time()
+    for path in sorted(Path(WORKER_HEALTH_DIR).glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if data.get("pid") == state.pid:
+            data = state.snapshot()
+        age = now - data.get("heartbeat_at", 0)
+        data["status"] = "ok" if age <= 3 * HEARTBEAT_INTERVAL_S else "stale"
+        workers.append(data)
+    return {"current_pid": state.pid, "workers": workers}
+
+
+class WorkerStatsMiddleware:
+    """
+    Pure ASGI middleware counting requests, errors and in-flight calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        _ensure_current_process()
+        state.in_flight += 1
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            state.in_flight -= 1
+            state.requests += 1
+            state.last_request_at = time.time()
+            if status_holder["status"] >= 500:
+                state.errors += 1
@@ -1,16 +1,28 @@
 import os
 import time
+import logging
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 # Load environment variables early
 load_dotenv()
 
-# --- Routers imports ---
+# --- Startup profiler (STARTUP_PROFILE=1) times every import below ---
+from src.core import startup_profiler
+startup_profiler.install()
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from src.core.warmup import WARMUP_ON_START, run_warm_up
+from src.core import admission, request_profiler, single_flight, worker_health
+from src.services import ingestion, object_cache
+
+# --- Routers imports (heavy deps inside them are loaded lazily) ---
 import src.api.health as health
 import src.api.upload as upload
 import src.api.job as job
@@ -18,12 +30,43 @@ import src.api.match as match
 import src.api.match_stat as match_stat
 import src.api.ai_routes as ai_routes
 import src.api.auth as auth
+import src.api.search as search
+import src.api.leaderboard as leaderboard
+import src.api.screening as screening
+import src.api.export as export
+
+logger = logging.getLogger("uvicorn.error")
 
 # Track start time (for uptime endpoint)
 START_TIME = time.time()
 
+
+# --- Lifespan: warm-up runs in the background once the server is up ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = None
+    if WARMUP_ON_START:
+        warmup_task = asyncio.create_task(run_warm_up())
+    else:
+        startup_profiler.finish()
+    heartbeat_task = asyncio.create_task(worker_health.heartbeat_loop())
+    try:
+        await ingestion.queue.start()
+    except Exception as e:
+        # e.g. schema not migrated yet: sync uploads keep working
+        logger.warning("Ingestion queue not started: %s", e)
+    yield
+    await ingestion.queue.stop()
+    heartbeat_task.cancel()
+    worker_health.remove_heartbeat()
+    await object_cache.aclose()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+
+
 # --- FastAPI App ---
 app = FastAPI(
+    lifespan=lifespan,
     title="CVScan API",
     version="1.1.0",
     docs_url="/api/docs",
@@ -34,6 +77,11 @@ app = FastAPI(
     )
 )
 
+# --- Admission control: per-class concurrency + per-client rate limits, health lane never shed ---
+# Added first so it is the innermost middleware: CORS answers preflights before admission
+# and adds its headers to 429 / 503 responses
+app.add_middleware(admission.AdmissionMiddleware)
+
 # --- CORS setup ---
 origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 app.add_middleware(
@@ -44,6 +92,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Per-worker request counters (see /api/v1/health/workers) ---
+app.add_middleware(worker_health.WorkerStatsMiddleware)
+
+# --- Request profiling (REQUEST_PROFILING=1): Server-Timing + on-demand sampling ---
+if request_profiler.REQUEST_PROFILING:
+    from src.core.database import engine
+    request_profiler.instrument_engine(engine)
+    app.add_middleware(request_profiler.RequestProfilingMiddleware)
+
 # --- Routers registration ---
 app.include_router(health.router, prefix="/api/v1", tags=["system"])
 app.include_router(upload.router, prefix="/api/v1", tags=["upload"])
@@ -52,6 +109,13 @@ app.include_router(match.router, prefix="/api/v1", tags=["match-legacy"])
 app.include_router(match_stat.router, prefix="/api/v1", tags=["match-stat"])  # ✅ NEW
 app.include_router(ai_routes.router, prefix="/api/v1", tags=["ai"])
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
+app.include_router(search.router, prefix="/api/v1", tags=["search"])
+app.include_router(leaderboard.router, prefix="/api/v1", tags=["leaderboard"])
+app.include_router(screening.router, prefix="/api/v1", tags=["screening"])
+app.include_router(export.router, prefix="/api/v1", tags=["export"])
+if request_profiler.REQUEST_PROFILING:
+    import src.api.profiling as profiling
+    app.include_router(profiling.router, prefix="/api/v1", tags=["admin"])
 
 # --- Health endpoint (GET + HEAD) ---
 @app.api_route("/api/v1/health", methods=["GET", "HEAD"], include_in_schema=False)
@@ -64,6 +128,27 @@ async def health_check():
         }
     )
 
+# --- Per-worker health (multi-worker serving) ---
+@app.get("/api/v1/health/workers", include_in_schema=False)
+def workers_health():
+    return worker_health.all_workers()
+
+# --- Admission control state of this worker ---
+@app.get("/api/v1/health/admission", include_in_schema=False)
+def admission_health():
+    return admission.controller.snapshot()
+
+# --- Coalesced identical requests of this worker ---
+@app.get("/api/v1/health/single-flight", include_in_schema=False)
+def single_flight_health():
+    return single_flight.flights.snapshot()
+
+# --- Startup profile (only exposed when STARTUP_PROFILE=1) ---
+if startup_profiler.STARTUP_PROFILE:
+    @app.get("/api/v1/startup-profile", include_in_schema=False)
+    def startup_profile():
+        return startup_profiler.report()
+
 # --- Root endpoint (for Render root URL) ---
 @app.get("/", include_in_schema=False)
 def root():
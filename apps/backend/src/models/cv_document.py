@@ -1,5 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime, func
 from src.core.database import Base
+from src.utils.compression import compressed_text
+
+# Processing states (background uploads go pending -> processing -> done | failed)
+CV_PENDING = "pending"
+CV_PROCESSING = "processing"
+CV_DONE = "done"
+CV_FAILED = "failed"
 
 class CVDocument(Base):
     __tablename__ = "cv_documents"
@@ -7,5 +14,17 @@ class CVDocument(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
     score = Column(Integer, nullable=False)
-    content = Column(Text, nullable=False)
+    # Extracted text: raw copy and/or compressed copy (see src/utils/compression.py)
+    content_raw = Column("content", Text, nullable=True)
+    content_compressed = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    status = Column(String(16), nullable=False, default=CV_DONE, server_default=CV_DONE, index=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text, nullable=True)
+    status_updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Earlier CV this one near-duplicates (see services/near_duplicates.py)
+    duplicate_of = Column(Integer, nullable=True, index=True)
+    # File of a background upload under uploads/ (unique, so uploads sharing a filename do not clash)
+    stored_name = Column(String(300), nullable=True)
+
+    content = compressed_text("content_raw", "content_compressed")
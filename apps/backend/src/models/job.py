@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, String, Text, LargeBinary, DateTime, func
 from src.core.database import Base
+from src.utils.compression import compressed_text
 import uuid
 
 class Job(Base):
@@ -14,4 +15,9 @@ class Job(Base):
     )
     title = Column(String(255), nullable=False)
     company = Column(String(255), nullable=False)
-    description = Column(Text, nullable=False)
+    # Description text: raw copy and/or compressed copy (see src/utils/compression.py)
+    description_raw = Column("description", Text, nullable=True)
+    description_compressed = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    description = compressed_text("description_raw", "description_compressed")
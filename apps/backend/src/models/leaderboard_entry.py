@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, UniqueConstraint, func
+from src.core.database import Base
+
+class LeaderboardEntry(Base):
+    __tablename__ = "job_leaderboard"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), nullable=False)
+    cv_id = Column(Integer, nullable=False, index=True)
+    # Statistical algorithm the score was computed with (see services/leaderboard.py)
+    algorithm = Column(String(32), nullable=False)
+    score = Column(Float, nullable=False)
+    details = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "cv_id", "algorithm", name="uq_job_leaderboard_job_cv_algorithm"),
+        Index("ix_job_leaderboard_job_algorithm_score", "job_id", "algorithm", "score"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from src.core.database import Base
+
+class MatchResult(Base):
+    __tablename__ = "match_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # sha256 of (cv_hash, job_hash, algorithm, version, params), see services/match_cache.py
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    cv_hash = Column(String(64), nullable=False, index=True)
+    job_hash = Column(String(64), nullable=False, index=True)
+    algorithm = Column(String(128), nullable=False)
+    version = Column(String(32), nullable=False)
+    result = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,243 @@
+# Description: Corpus statistics (document frequency, average length) for BM25 / TF-IDF
+# Notes:
+# - Updated incrementally on every CV/job write (one line appended to a delta log)
+# - Persisted as snapshot + delta log so every worker can load and tail them
+# - The log is folded into a new snapshot every CORPUS_STATS_COMPACT_EVERY writes
+# - Writers serialize on an flock; readers never lock
+
+from __future__ import annotations
+
+import fcntl
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+CORPUS_STATS_DIR = Path(os.getenv("CORPUS_STATS_DIR", "data"))
+CORPUS_STATS_COMPACT_EVERY = int(os.getenv("CORPUS_STATS_COMPACT_EVERY", "1000"))
+
+_SNAPSHOT = "corpus_stats.json"
+
+
+class CorpusStats:
+    """
+    N (documents), total token count and per-term document frequency.
+    """
+
+    def __init__(self, n_docs: int = 0, total_len: int = 0, df: Optional[Dict[str, int]] = None):
+        self.n_docs = n_docs
+        self.total_len = total_len
+        self.df: Dict[str, int] = df or {}
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_len / self.n_docs if self.n_docs else 0.0
+
+    @property
+    def size_bucket(self) -> int:
+        """
+        Coarse corpus size (log scale, one step per ~19% growth): cached scores keyed by it
+        expire as the corpus grows, without missing on every new document.
+        """
+        return int(4 * math.log2(1 + self.n_docs))
+
+    def add_document(self, tokens: Iterable[str]) -> None:
+        tokens = list(tokens)
+        self.n_docs += 1
+        self.total_len += len(tokens)
+        for term in set(tokens):
+            self.df[term] = self.df.get(term, 0) + 1
+
+    def apply_delta(self, delta: Dict) -> None:
+        self.n_docs += 1
+        self.total_len += delta["len"]
+        for term in delta["terms"]:
+            self.df[term] = self.df.get(term, 0) + 1
+
+    def bm25_idf(self, term: str) -> float:
+        """
+        Okapi BM25 idf (always > 0): log(1 + (N - df + 0.5) / (df + 0.5)).
+        """
+        df = self.df.get(term, 0)
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def tfidf_idf(self, term: str) -> float:
+        """
+        Smoothed idf: log((1 + N) / (1 + df)) + 1.
+        """
+        return math.log((1.0 + self.n_docs) / (1.0 + self.df.get(term, 0))) + 1.0
+
+    def to_dict(self) -> Dict:
+        return {"n_docs": self.n_docs, "total_len": self.total_len, "df": self.df}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CorpusStats":
+        return cls(n_docs=data.get("n_docs", 0), total_len=data.get("total_len", 0), df=dict(data.get("df", {})))
+
+
+class CorpusStatsStore:
+    """
+    File-backed stats shared by all workers: snapshot (generation g) + delta
+    log for generation g. `get()` tails the log; `record()` appends to it.
+    """
+
+    def __init__(self, directory: Path = CORPUS_STATS_DIR, compact_every: int = CORPUS_STATS_COMPACT_EVERY):
+        self.directory = Path(directory)
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._stats = CorpusStats()
+        self._generation = -1
+        self._snapshot_id: Optional[tuple] = None  # (inode, mtime): changes on every replace
+        self._log_offset = 0
+        self._log_lines = 0
+
+    # ---------- Paths ----------
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.directory / _SNAPSHOT
+
+    def _log_path(self, generation: int) -> Path:
+        return self.directory / f"corpus_stats.g{generation}.log"
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "corpus_stats.lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # ---------- Reading ----------
+
+    def _load_snapshot(self) -> None:
+        try:
+            stat = self.snapshot_path.stat()
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            stat, data = None, {}
+        self._stats = CorpusStats.from_dict(data)
+        self._generation = data.get("generation", 0)
+        self._snapshot_id = (stat.st_ino, stat.st_mtime_ns) if stat else None
+        self._log_offset = 0
+        self._log_lines = 0
+
+    def _refresh(self) -> None:
+        try:
+            stat = self.snapshot_path.stat()
+            snapshot_id = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            snapshot_id = None
+        if self._generation < 0 or snapshot_id != self._snapshot_id:
+            self._load_snapshot()
+        try:
+            with open(self._log_path(self._generation), "rb") as fh:
+                fh.seek(self._log_offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return
+        # Only apply complete lines; a partial write is picked up next time
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._stats.apply_delta(json.loads(line))
+                self._log_lines += 1
+        self._log_offset += end
+
+    def get(self) -> CorpusStats:
+        """
+        Current stats (snapshot + all logged writes so far).
+        """
+        with self._lock:
+            self._refresh()
+            return self._stats
+
+    # ---------- Writing ----------
+
+    def record(self, tokens: Iterable[str]) -> None:
+        """
+        Add one document. O(unique terms of the document), independent of corpus size
+        (except for the periodic compaction).
+        """
+        tokens = list(tokens)
+        line = json.dumps({"len": len(tokens), "terms": sorted(set(tokens))}, ensure_ascii=False) + "\n"
+        with self._lock, self._write_lock():
+            self._refresh()
+            with open(self._log_path(self._generation), "a", encoding="utf-8") as fh:
+                fh.write(line)
+            self._refresh()
+            if self._log_lines >= self.compact_every:
+                self._compact()
+
+    def _compact(self) -> None:
+        """
+        Fold the log into a new snapshot (generation + 1). Caller holds the write lock.
+        """
+        self._replace_snapshot(self._stats)
+
+    def _replace_snapshot(self, stats: CorpusStats) -> None:
+        """
+        Write `stats` as snapshot generation + 1 and drop the old log. Caller holds the write lock.
+        """
+        old_log = self._log_path(self._generation)
+        data = dict(stats.to_dict(), generation=self._generation + 1)
+        tmp = self.snapshot_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.snapshot_path)
+        old_log.unlink(missing_ok=True)
+        self._load_snapshot()
+
+    def replace(self, stats: CorpusStats) -> None:
+        """
+        Overwrite the persisted stats (used by a full rebuild).
+        """
+        with self._lock, self._write_lock():
+            self._refresh()
+            self._replace_snapshot(stats)
+
+
+store = CorpusStatsStore()
+
+
+def get_stats() -> CorpusStats:
+    return store.get()
+
+
+def record_document(tokens: Iterable[str]) -> None:
+    store.record(tokens)
+
+
+def rebuild_from_db() -> CorpusStats:
+    """
+    Recompute stats from every CV and job in the DB and write them as a fresh
+    snapshot (bootstrap for an existing corpus, or repair).
+    """
+    from src.core.database import SessionLocal
+    from src.models.cv_document import CVDocument
+    from src.models.job import Job
+    from src.services.match_stat_service import tokenize
+    from src.utils.compression import read_text
+
+    stats = CorpusStats()
+    db = SessionLocal()
+    try:
+        for raw, compressed in db.query(CVDocument.content_raw, CVDocument.content_compressed).yield_per(500):
+            stats.add_document(tokenize(read_text(raw, compressed) or ""))
+        for raw, compressed in db.query(Job.description_raw, Job.description_compressed).yield_per(500):
+            stats.add_document(tokenize(read_text(raw, compressed) or ""))
+    finally:
+        db.close()
+
+    store.replace(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    # python -m src.services.corpus_stats  -> rebuild from the database
+    rebuilt = rebuild_from_db()
+    print(f"Corpus stats rebuilt: {rebuilt.n_docs} documents, {len(rebuilt.df)} terms, avgdl={rebuilt.avgdl:.1f}")
@@ -0,0 +1,99 @@
+# Description: LLM analysis of a CV against an optional job (used by /ai/analyze-cv and screening)
+# Notes:
+# - Results are cached by (CV content, job text, provider/model, prompt version, parameters);
+#   a near-duplicate of a stored CV is served that CV's cached analysis when there is one, else it is
+#   analyzed and stored under its own content (see services/near_duplicates.py)
+# - The model is asked for JSON {score, strengths, gaps, summary}; `parse_analysis` reads it back,
+#   and replies it cannot read are never cached
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import Any, Dict, Optional
+
+from src.services import match_cache, near_duplicates
+from src.services.llm.llm_service import LlmService
+
+# Bump when the prompt changes (invalidates cached analyses)
+ANALYZE_PROMPT_VERSION = "1"
+ANALYZE_MAX_TOKENS = 600
+ANALYZE_TEMPERATURE = 0.2
+
+_SYSTEM = "Return ONLY JSON, no prose outside JSON."
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_prompt(text: str, job: Optional[str] = None) -> str:
+    prompt = (
+        "You are a CV screening assistant.\n"
+        "Return a JSON object {score:int, strengths:list, gaps:list, summary:str}.\n"
+    )
+    if job:
+        prompt += f"\nJob description:\n{job}\n"
+    prompt += f"\nCandidate CV:\n{text}"
+    return prompt
+
+
+async def analyze(text: str, job: Optional[str] = None, llm: Optional[LlmService] = None) -> Dict[str, Any]:
+    """
+    Cached LLM analysis. Returns the provider result plus `cached`, and
+    `near_duplicate_of` when the cached analysis of a near-duplicate CV was used.
+    """
+    llm = llm or LlmService()
+    job_hash = match_cache.content_hash(job or "")
+    algorithm = f"analyze-cv:{type(llm.provider).__name__}:{getattr(llm.provider, 'model', '')}"
+    params = {"max_tokens": ANALYZE_MAX_TOKENS, "temperature": ANALYZE_TEMPERATURE}
+
+    # A near-duplicate of a stored CV reuses that CV's cached analysis (read only)
+    root_hash, duplicate_of = await asyncio.to_thread(near_duplicates.root_hash, text)
+    if root_hash is not None:
+        root_key = match_cache.CacheKey(root_hash, job_hash, algorithm, ANALYZE_PROMPT_VERSION, params)
+        reused = await asyncio.to_thread(match_cache.cache.lookup, root_key)
+        if reused is not None:
+            return dict(match_cache.with_cache_flag(reused, True), near_duplicate_of=duplicate_of)
+
+    key = match_cache.CacheKey(match_cache.content_hash(text), job_hash, algorithm, ANALYZE_PROMPT_VERSION, params)
+
+    async def compute():
+        return await llm.chat(
+            build_prompt(text, job),
+            system=_SYSTEM,
+            max_tokens=ANALYZE_MAX_TOKENS,
+            temperature=ANALYZE_TEMPERATURE,
+        )
+
+    # A malformed reply is answered but not cached: the next request asks the model again
+    result, cached = await match_cache.cache.get_or_compute_async(
+        key, compute, cacheable=lambda r: parse_analysis(r) is not None
+    )
+    return match_cache.with_cache_flag(result, cached)
+
+
+def parse_analysis(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    JSON object of an analysis result (code fences tolerated), or None if the model
+    did not return valid JSON.
+    """
+    content = result.get("content")
+    if not isinstance(content, str):
+        return None
+    try:
+        data = json.loads(_FENCE_RE.sub("", content.strip()))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def normalized_score(analysis: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    The analysis score in [0, 1] (the model answers on 0..100, sometimes 0..1).
+    """
+    if not analysis:
+        return None
+    try:
+        score = float(analysis.get("score"))
+    except (TypeError, ValueError):
+        return None
+    return round(max(0.0, min(1.0, score if score <= 1.0 else score / 100.0)), 4)
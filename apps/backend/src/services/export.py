@@ -0,0 +1,258 @@
+# Description: Streaming bulk export of tables as Parquet or CSV (Arrow record batches)
+# Notes:
+# - Rows are read through a server-side cursor (stream_results) EXPORT_BATCH_ROWS at a time; each
+#   batch becomes one Arrow record batch (one Parquet row group / a run of CSV lines) and its bytes
+#   are handed to the response before the next batch is fetched, so memory stays constant
+# - Column projection: only the requested columns are selected (leave out `content` / `description`
+#   to skip reading and decompressing the texts)
+# - Incremental exports: rows with since < created_at <= watermark (returned in X-Export-Watermark:
+#   pass it as `since` next time). created_at is stamped when a transaction starts, not when it
+#   commits, so the watermark is the newest created_at but at most the database clock minus
+#   EXPORT_WATERMARK_LAG_S: a row still uncommitted while an export runs falls after its watermark
+#   and goes out with the next one (unless its transaction outlives the lag)
+# - Consumers must dedupe on the table key: rows without created_at go out with every export, and
+#   re-running an export from an older `since` repeats rows
+# - pyarrow is optional: without it exports answer 503 and the rest of the app is unaffected
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import func, or_, select
+
+from src.core.database import SessionLocal
+from src.models.cv_document import CVDocument
+from src.models.job import Job
+from src.models.leaderboard_entry import LeaderboardEntry
+from src.models.match_result import MatchResult
+from src.utils.compression import read_text
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+EXPORT_WATERMARK_LAG_S = int(os.getenv("EXPORT_WATERMARK_LAG_S", "300"))
+
+FORMATS = ("parquet", "csv")
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "csv": "text/csv; charset=utf-8"}
+
+
+class ExportColumn:
+    """
+    One exported column: the selected source columns and how to turn them into a value.
+    """
+
+    def __init__(self, name: str, arrow_type: str, *sources, convert: Optional[Callable[..., Any]] = None):
+        self.name = name
+        self.arrow_type = arrow_type
+        self.sources = sources
+        self.convert = convert
+
+
+class ExportTable:
+    def __init__(self, key, created_at, columns: List[ExportColumn]):
+        self.key = key
+        self.created_at = created_at
+        self.columns = {column.name: column for column in columns}
+
+
+def _result_score(result: Optional[str]) -> Optional[float]:
+    try:
+        score = json.loads(result).get("score")
+        return float(score) if score is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+TABLES: Dict[str, ExportTable] = {
+    "cv_documents": ExportTable(CVDocument.id, CVDocument.created_at, [
+        ExportColumn("id", "int64", CVDocument.id),
+        ExportColumn("filename", "string", CVDocument.filename),
+        ExportColumn("score", "int64", CVDocument.score),
+        ExportColumn("status", "string", CVDocument.status),
+        ExportColumn("attempts", "int64", CVDocument.attempts),
+        ExportColumn("error", "string", CVDocument.error),
+        ExportColumn("duplicate_of", "int64", CVDocument.duplicate_of),
+        ExportColumn("created_at", "timestamp", CVDocument.created_at),
+        ExportColumn("status_updated_at", "timestamp", CVDocument.status_updated_at),
+        ExportColumn("content", "string", CVDocument.content_raw, CVDocument.content_compressed, convert=read_text),
+    ]),
+    "jobs": ExportTable(Job.job_id, Job.created_at, [
+        ExportColumn("job_id", "string", Job.job_id),
+        ExportColumn("title", "string", Job.title),
+        ExportColumn("company", "string", Job.company),
+        ExportColumn("created_at", "timestamp", Job.created_at),
+        ExportColumn("description", "string", Job.description_raw, Job.description_compressed, convert=read_text),
+    ]),
+    # Cached /match, /match-stat and /ai/analyze-cv results (keyed by content hashes)
+    "match_results": ExportTable(MatchResult.id, MatchResult.created_at, [
+        ExportColumn("id", "int64", MatchResult.id),
+        ExportColumn("cv_hash", "string", MatchResult.cv_hash),
+        ExportColumn("job_hash", "string", MatchResult.job_hash),
+        ExportColumn("algorithm", "string", MatchResult.algorithm),
+        ExportColumn("version", "string", MatchResult.version),
+        ExportColumn("score", "float64", MatchResult.result, convert=_result_score),
+        ExportColumn("result", "string", MatchResult.result),
+        ExportColumn("created_at", "timestamp", MatchResult.created_at),
+    ]),
+    # Statistical scores per (job, CV) kept by the leaderboards
+    "job_leaderboard": ExportTable(LeaderboardEntry.id, LeaderboardEntry.created_at, [
+        ExportColumn("id", "int64", LeaderboardEntry.id),
+        ExportColumn("job_id", "string", LeaderboardEntry.job_id),
+        ExportColumn("cv_id", "int64", LeaderboardEntry.cv_id),
+        ExportColumn("algorithm", "string", LeaderboardEntry.algorithm),
+        ExportColumn("score", "float64", LeaderboardEntry.score),
+        ExportColumn("details", "string", LeaderboardEntry.details),
+        ExportColumn("created_at", "timestamp", LeaderboardEntry.created_at),
+    ]),
+}
+
+
+def _arrow_type(name: str):
+    if name == "timestamp":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, name)()
+
+
+class ExportPlan:
+    """
+    A validated export: table, projected columns, created_at bounds.
+    """
+
+    def __init__(self, table: str, fmt: str, columns: List[ExportColumn], since: Optional[datetime], watermark: Optional[datetime]):
+        self.table = table
+        self.format = fmt
+        self.columns = columns
+        self.since = since
+        self.watermark = watermark
+
+    @property
+    def filename(self) -> str:
+        return f"{self.table}.{self.format}"
+
+    def schema(self):
+        return pa.schema([(column.name, _arrow_type(column.arrow_type)) for column in self.columns])
+
+
+def plan(table: str, fmt: str = "parquet", columns: Optional[Sequence[str]] = None, since: Optional[datetime] = None) -> ExportPlan:
+    """
+    Validate an export request and fix its watermark. Raises LookupError (unknown table),
+    ValueError (unknown format or column) or RuntimeError (pyarrow missing).
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for exports")
+    spec = TABLES.get(table)
+    if spec is None:
+        raise LookupError(f"Unknown table: {table} (exportable: {', '.join(TABLES)})")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    names = list(columns) if columns else list(spec.columns)
+    unknown = [name for name in names if name not in spec.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(unknown)}")
+
+    db = SessionLocal()
+    try:
+        newest, now = db.execute(select(func.max(spec.created_at), func.now())).one()
+    finally:
+        db.close()
+    # Rows of transactions still open may carry a created_at up to the lag in the past
+    watermark = None if newest is None else min(newest, now - timedelta(seconds=EXPORT_WATERMARK_LAG_S))
+    return ExportPlan(table, fmt, [spec.columns[name] for name in dict.fromkeys(names)], since, watermark)
+
+
+def _statement(export: ExportPlan):
+    spec = TABLES[export.table]
+    sources = [source for column in export.columns for source in column.sources]
+    statement = select(*sources)
+    if export.since is not None:
+        # Rows without created_at cannot be placed after a watermark: they go out every time
+        statement = statement.where(or_(spec.created_at.is_(None), spec.created_at > export.since))
+    if export.watermark is not None:
+        # Rows created after the watermark belong to the next export
+        statement = statement.where(or_(spec.created_at.is_(None), spec.created_at <= export.watermark))
+    return statement.order_by(spec.key)
+
+
+def record_batches(db, export: ExportPlan, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator["pa.RecordBatch"]:
+    """
+    Arrow record batches of at most `batch_rows` rows, read through a server-side cursor.
+    """
+    schema = export.schema()
+    result = db.execute(_statement(export).execution_options(stream_results=True, yield_per=batch_rows))
+    for rows in result.partitions(batch_rows):
+        arrays, position = [], 0
+        for column, field in zip(export.columns, schema):
+            width = len(column.sources)
+            if column.convert is None:
+                values = [row[position] for row in rows]
+            else:
+                values = [column.convert(*row[position:position + width]) for row in rows]
+            arrays.append(pa.array(values, type=field.type))
+            position += width
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _Chunks:
+    """
+    Write-only file object collecting what the Arrow writer produced since the last `take()`.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream(export: ExportPlan, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    Encoded export, one chunk per record batch (run by the response in a worker thread).
+    """
+    sink = _Chunks()
+    schema = export.schema()
+    if export.format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=EXPORT_PARQUET_COMPRESSION)
+    else:
+        writer = pa_csv.CSVWriter(sink, schema)
+    db = SessionLocal()
+    try:
+        for batch in record_batches(db, export, batch_rows):
+            writer.write_batch(batch)
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+        writer.close()
+        yield sink.take()
+    finally:
+        db.close()
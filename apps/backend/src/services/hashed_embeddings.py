@@ -0,0 +1,98 @@
+# Description: Offline dense embeddings (hashing trick + fixed random projection)
+# Notes:
+# - Features: word uni/bi-grams and character n-grams of each word ("<word>" padded)
+# - Each feature is hashed (crc32, stable across processes) into HASH_EMBED_BUCKETS signed
+#   buckets, weighted 1 + log(tf), then projected to HASH_EMBED_DIM dims with a fixed
+#   +-1/sqrt(dim) matrix drawn from HASH_EMBED_SEED
+# - Deterministic, NumPy only, no model download: same text -> same vector on every worker
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+HASH_EMBED_DIM = int(os.getenv("HASH_EMBED_DIM", "256"))
+HASH_EMBED_BUCKETS = 1 << int(os.getenv("HASH_EMBED_BUCKETS_LOG2", "14"))
+HASH_EMBED_SEED = int(os.getenv("HASH_EMBED_SEED", "1337"))
+HASH_EMBED_CHAR_NGRAMS = tuple(int(n) for n in os.getenv("HASH_EMBED_CHAR_NGRAMS", "3,4,5").split(","))
+HASH_EMBED_WORD_NGRAMS = int(os.getenv("HASH_EMBED_WORD_NGRAMS", "2"))
+
+_WORD_RE = re.compile(r"\w+")
+
+_projection: Optional[np.ndarray] = None
+_projection_lock = threading.Lock()
+
+
+def backend_name() -> str:
+    """
+    Vector store directory name; includes the parameters that change the vectors.
+    """
+    return f"hashed-d{HASH_EMBED_DIM}-b{HASH_EMBED_BUCKETS}-s{HASH_EMBED_SEED}"
+
+
+def get_projection() -> np.ndarray:
+    """
+    The (buckets x dim) float32 projection, built once per process (or in the pre-fork preload).
+    """
+    global _projection
+    if _projection is None:
+        with _projection_lock:
+            if _projection is None:
+                rng = np.random.default_rng(HASH_EMBED_SEED)
+                signs = rng.integers(0, 2, size=(HASH_EMBED_BUCKETS, HASH_EMBED_DIM), dtype=np.int8)
+                _projection = ((signs * 2 - 1) / np.sqrt(HASH_EMBED_DIM)).astype(np.float32)
+    return _projection
+
+
+def _hash(feature: str) -> int:
+    """
+    Signed bucket: +(bucket + 1) or -(bucket + 1), the sign taken from the top hash bit.
+    """
+    h = zlib.crc32(feature.encode("utf-8"))
+    bucket = (h & (HASH_EMBED_BUCKETS - 1)) + 1
+    return bucket if h & 0x80000000 else -bucket
+
+
+@lru_cache(maxsize=100_000)
+def _word_features(word: str) -> Tuple[int, ...]:
+    """
+    Hashed features of one word: the word itself and its character n-grams.
+    Cached, since vocabularies repeat far more than they grow.
+    """
+    padded = f"<{word}>"
+    features = [_hash("w:" + word)]
+    for n in HASH_EMBED_CHAR_NGRAMS:
+        features.extend(_hash(f"c{n}:" + padded[i:i + n]) for i in range(len(padded) - n + 1))
+    return tuple(features)
+
+
+def _features(text: str) -> List[int]:
+    words = _WORD_RE.findall(text.lower())
+    features: List[int] = []
+    for word in words:
+        features.extend(_word_features(word))
+    for n in range(2, HASH_EMBED_WORD_NGRAMS + 1):
+        features.extend(_hash(f"w{n}:" + " ".join(words[i:i + n])) for i in range(len(words) - n + 1))
+    return features
+
+
+def embed(text: str) -> np.ndarray:
+    """
+    L2-normalized float32 vector of HASH_EMBED_DIM dims (all zeros for empty text).
+    """
+    features = np.asarray(_features(text), dtype=np.int64)
+    if not len(features):
+        return np.zeros(HASH_EMBED_DIM, dtype=np.float32)
+    signed = np.bincount(np.abs(features) - 1, weights=np.sign(features), minlength=HASH_EMBED_BUCKETS)
+    nz = np.flatnonzero(signed)
+    # Sublinear tf keeps long CVs from being dominated by their most repeated terms
+    weights = (np.sign(signed[nz]) * (1.0 + np.log(np.abs(signed[nz])))).astype(np.float32)
+    vector = weights @ get_projection()[nz]
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
@@ -0,0 +1,86 @@
+# Description: Index maintenance run whenever a CV or a job is written
+# Notes:
+# - Called by the upload and job routes after the DB commit; the job routes run it as a
+#   background task after the response, so a leaderboard is briefly stale after a job write
+# - Failures are logged, never raised: indexes are derived data and can be rebuilt
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from src.services import corpus_stats, leaderboard, near_duplicates, token_corpus, vector_store
+from src.services.match_stat_service import tokenize
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def index_cv(cv_id: int, text: str, duplicate_of: Optional[int] = None) -> None:
+    """
+    Update derived indexes for a newly stored CV. A near-duplicate (`duplicate_of`)
+    reuses the embedding of the CV it resembles.
+    """
+    tokens = tokenize(text)
+    try:
+        corpus_stats.record_document(tokens)
+    except Exception as e:
+        logger.warning("Corpus stats update failed for CV %s: %s", cv_id, e)
+    try:
+        token_corpus.add_document("cv", cv_id, tokens)
+    except Exception as e:
+        logger.warning("Token corpus update failed for CV %s: %s", cv_id, e)
+    try:
+        near_duplicates.add_document(cv_id, tokens, text, duplicate_of)
+    except Exception as e:
+        logger.warning("Near-duplicate index update failed for CV %s: %s", cv_id, e)
+    try:
+        if duplicate_of is None or not vector_store.copy_document("cvs", str(duplicate_of), str(cv_id)):
+            vector_store.add_document("cvs", str(cv_id), text)
+    except Exception as e:
+        logger.warning("Vector store update failed for CV %s: %s", cv_id, e)
+    try:
+        leaderboard.record_cv(cv_id, text)
+    except Exception as e:
+        logger.warning("Leaderboard update failed for CV %s: %s", cv_id, e)
+
+
+def index_job(job_id: str, text: str) -> None:
+    """
+    Update derived indexes for a newly stored job description.
+    """
+    tokens = tokenize(text)
+    try:
+        corpus_stats.record_document(tokens)
+    except Exception as e:
+        logger.warning("Corpus stats update failed for job %s: %s", job_id, e)
+    try:
+        token_corpus.add_document("job", job_id, tokens)
+    except Exception as e:
+        logger.warning("Token corpus update failed for job %s: %s", job_id, e)
+    try:
+        vector_store.add_document("jobs", str(job_id), text)
+    except Exception as e:
+        logger.warning("Vector store update failed for job %s: %s", job_id, e)
+    try:
+        leaderboard.rebuild_job(job_id, text)
+    except Exception as e:
+        logger.warning("Leaderboard rebuild failed for job %s: %s", job_id, e)
+
+
+def reindex_job(job_id: str, text: str) -> None:
+    """
+    Update derived indexes after a job description was edited.
+    Corpus stats are append-only and keep counting the old text until the next rebuild.
+    """
+    try:
+        token_corpus.add_document("job", job_id, tokenize(text))
+    except Exception as e:
+        logger.warning("Token corpus update failed for job %s: %s", job_id, e)
+    try:
+        vector_store.add_document("jobs", str(job_id), text)
+    except Exception as e:
+        logger.warning("Vector store update failed for job %s: %s", job_id, e)
+    try:
+        leaderboard.rebuild_job(job_id, text)
+    except Exception as e:
+        logger.warning("Leaderboard rebuild failed for job %s: %s", job_id, e)
@@ -0,0 +1,232 @@
+# Description: Background processing of uploaded CVs (extraction, scoring, indexing)
+# Notes:
+# - The upload route stores the raw file under a unique name (cv_documents.stored_name) + a
+#   "pending" CVDocument row and enqueues its id
+# - INGEST_CONCURRENCY asyncio workers per app worker; the blocking work runs in threads
+# - A row is claimed with a conditional UPDATE (pending -> processing), so several app
+#   workers can share the same rows without double-processing
+# - Failures are retried INGEST_MAX_RETRIES times with exponential backoff; unreadable
+#   files fail immediately. The state lives in the DB, so it survives restarts: pending
+#   rows, and processing rows idle for INGEST_STALE_AFTER_S, are picked up on startup
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.database import SessionLocal
+from src.models.cv_document import CVDocument, CV_DONE, CV_FAILED, CV_PENDING, CV_PROCESSING
+from src.services import near_duplicates
+from src.services.indexing import index_cv
+from src.services.match_stat_service import tokenize
+from src.utils.parsers import extract_pdf_document
+from src.utils.scoring import score_text
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF_S = float(os.getenv("INGEST_RETRY_BACKOFF_S", "1"))
+INGEST_STALE_AFTER_S = float(os.getenv("INGEST_STALE_AFTER_S", "600"))
+
+UPLOAD_DIR = Path("uploads")
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PermanentError(Exception):
+    """Processing failed in a way a retry cannot fix (e.g. unreadable PDF)."""
+
+
+def find_duplicate(text: str) -> Optional[Dict]:
+    """
+    Near-duplicate of an extracted CV among the stored ones (see services/near_duplicates.py).
+    Never fails the upload.
+    """
+    try:
+        return near_duplicates.find_duplicate(tokenize(text))
+    except Exception as e:
+        logger.warning("Near-duplicate lookup failed: %s", e)
+        return None
+
+
+def extract_upload(file_path: Path) -> Tuple[str, bool, Optional[str]]:
+    """
+    Extract text from an uploaded file. Returns (text, truncated, extractor).
+    Raises ValueError for unreadable PDFs.
+    """
+    if file_path.name.endswith(".pdf"):
+        extraction = extract_pdf_document(str(file_path))
+        return extraction.text, extraction.truncated, extraction.backend
+    return file_path.read_text(encoding="utf-8", errors="ignore"), False, None
+
+
+# ---------- One document (runs in a worker thread) ----------
+
+def _claim(cv_id: int) -> Optional[str]:
+    """
+    pending -> processing. Returns the name of the uploaded file under UPLOAD_DIR, or None
+    if another worker has it.
+    """
+    db = SessionLocal()
+    try:
+        claimed = (
+            db.query(CVDocument)
+            .filter(CVDocument.id == cv_id, CVDocument.status == CV_PENDING)
+            .update({"status": CV_PROCESSING, "attempts": CVDocument.attempts + 1}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return None
+        stored_name, filename = db.query(CVDocument.stored_name, CVDocument.filename).filter(CVDocument.id == cv_id).one()
+        # Rows queued before stored_name existed: the file was saved under the client filename
+        return stored_name or filename
+    finally:
+        db.close()
+
+
+def _finish(cv_id: int, values: Dict) -> None:
+    db = SessionLocal()
+    try:
+        cv = db.query(CVDocument).filter(CVDocument.id == cv_id).first()
+        if cv is not None:
+            for key, value in values.items():
+                setattr(cv, key, value)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _fail(cv_id: int, error: str) -> None:
+    """
+    Mark a row failed, unless a worker finished it in the meantime.
+    """
+    db = SessionLocal()
+    try:
+        db.query(CVDocument).filter(CVDocument.id == cv_id, CVDocument.status != CV_DONE).update(
+            {"status": CV_FAILED, "error": error}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def process_cv(cv_id: int) -> Optional[str]:
+    """
+    Claim, extract, score and store one CV. Returns the final status
+    (None if the row was not pending). Raises on retryable errors.
+    """
+    stored_name = _claim(cv_id)
+    if stored_name is None:
+        return None
+    # Once claimed, every failure hands the row back: failed, or pending for a retry
+    try:
+        try:
+            text, _, _ = extract_upload(UPLOAD_DIR / stored_name)
+        except ValueError as e:
+            raise PermanentError(str(e)) from e
+        duplicate = find_duplicate(text)
+        duplicate_of = duplicate["cv_id"] if duplicate else None
+        _finish(cv_id, {
+            "content": text, "score": score_text(text), "duplicate_of": duplicate_of, "status": CV_DONE, "error": None,
+        })
+    except PermanentError as e:
+        _finish(cv_id, {"status": CV_FAILED, "error": str(e)})
+        raise
+    except Exception as e:
+        # Back to pending so the retry (or another worker) can claim it again
+        _finish(cv_id, {"status": CV_PENDING, "error": str(e)})
+        raise
+    index_cv(cv_id, text, duplicate_of)
+    return CV_DONE
+
+
+# ---------- Queue ----------
+
+class IngestionQueue:
+    """
+    Bounded asyncio queue drained by INGEST_CONCURRENCY tasks. Created in the app lifespan.
+    """
+
+    def __init__(self, concurrency: int = INGEST_CONCURRENCY, max_size: int = INGEST_QUEUE_SIZE):
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self, recover: bool = True) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        if recover:
+            for cv_id in await asyncio.to_thread(recoverable_ids):
+                self.submit(cv_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, cv_id: int) -> None:
+        """
+        Enqueue a pending row. Raises asyncio.QueueFull when the queue is at capacity
+        (the caller drops the row and answers 503).
+        """
+        if self._queue is None:
+            raise RuntimeError("Ingestion queue is not running")
+        self._queue.put_nowait(cv_id)
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            cv_id = await self._queue.get()
+            try:
+                await self._process_with_retries(cv_id)
+            except Exception as e:
+                logger.warning("Ingestion worker %d: CV %s failed: %s", n, cv_id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _process_with_retries(self, cv_id: int) -> None:
+        for attempt in range(INGEST_MAX_RETRIES + 1):
+            try:
+                status = await asyncio.to_thread(process_cv, cv_id)
+                if status is None and attempt > 0:
+                    # The failed attempt did not hand the row back to pending
+                    raise RuntimeError(f"CV {cv_id} could not be claimed again for a retry")
+                return
+            except PermanentError:
+                raise
+            except Exception as e:
+                if attempt == INGEST_MAX_RETRIES:
+                    await asyncio.to_thread(_fail, cv_id, str(e))
+                    raise
+                await asyncio.sleep(INGEST_RETRY_BACKOFF_S * 2 ** attempt)
+
+
+def recoverable_ids() -> List[int]:
+    """
+    Rows to (re)enqueue at startup: pending ones, and processing ones whose worker died.
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=INGEST_STALE_AFTER_S)
+    db = SessionLocal()
+    try:
+        db.query(CVDocument).filter(
+            CVDocument.status == CV_PROCESSING, CVDocument.status_updated_at < stale_before
+        ).update({"status": CV_PENDING}, synchronize_session=False)
+        db.commit()
+        return [cv_id for (cv_id,) in db.query(CVDocument.id).filter(CVDocument.status == CV_PENDING).order_by(CVDocument.id)]
+    finally:
+        db.close()
+
+
+queue = IngestionQueue()
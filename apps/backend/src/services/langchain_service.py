@@ -1,23 +1,84 @@
 import os
 import re
+import threading
 import numpy as np
 from collections import Counter
+from typing import Tuple
 
-# Try to load OpenAI if API key exists
+from src.core.request_profiler import stage
+from src.core.startup_profiler import profile_step
+
+# OpenAI embeddings are used only if an API key exists.
+# The client (and langchain_openai itself) is built lazily on first use.
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-USE_OPENAI = False
+USE_OPENAI = bool(OPENAI_API_KEY)
+
+# Similarity / vector store backend: "openai", "hashed" (offline, see hashed_embeddings.py),
+# "bow" (word-count cosine, no dense vectors) or "auto" (openai if a key is set, else bow)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+
 embeddings_model = None
+_embeddings_lock = threading.Lock()
 
-if OPENAI_API_KEY:
+
+def get_embeddings_model():
+    """
+    Return the OpenAI embeddings client, importing langchain_openai on first call.
+    Returns None (and disables OpenAI) if the key is missing or the import fails.
+    """
+    global embeddings_model, USE_OPENAI
+    if embeddings_model is not None or not USE_OPENAI:
+        return embeddings_model
+    with _embeddings_lock:
+        if embeddings_model is None and USE_OPENAI:
+            try:
+                with profile_step("langchain_openai.OpenAIEmbeddings"):
+                    from langchain_openai import OpenAIEmbeddings
+                    embeddings_model = OpenAIEmbeddings(
+                        model="text-embedding-3-small",
+                        api_key=OPENAI_API_KEY,
+                        base_url=os.getenv("OPENAI_BASE_URL"),
+                    )
+            except Exception:
+                USE_OPENAI = False
+    return embeddings_model
+
+
+def _backend() -> str:
+    if EMBEDDING_BACKEND == "auto":
+        return "openai" if USE_OPENAI else "bow"
+    return EMBEDDING_BACKEND
+
+
+def embedding_backend_name() -> str:
+    """
+    Name of the active embedding backend (vector store files are kept per backend).
+    """
+    backend = _backend()
+    if backend == "hashed":
+        from src.services import hashed_embeddings
+        return hashed_embeddings.backend_name()
+    return backend
+
+
+def embed_text(text: str):
+    """
+    Dense float32 embedding of `text`, or None if no embedding backend is available.
+    """
+    backend = _backend()
+    if backend == "hashed":
+        from src.services import hashed_embeddings
+        return hashed_embeddings.embed(text)
+    if backend != "openai":
+        return None
+    model = get_embeddings_model()
+    if model is None:
+        return None
     try:
-        from langchain_openai import OpenAIEmbeddings
-        embeddings_model = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            api_key=OPENAI_API_KEY
-        )
-        USE_OPENAI = True
+        with stage("embed"):
+            return np.asarray(model.embed_query(text), dtype=np.float32)
     except Exception:
-        USE_OPENAI = False
+        return None
 
 
 def simple_vectorize(text: str):
@@ -28,35 +89,54 @@ def simple_vectorize(text: str):
 def compute_similarity(text1: str, text2: str) -> float:
     """
     Compute similarity between two texts.
+    - Uses hashed local embeddings if EMBEDDING_BACKEND=hashed
     - Uses OpenAI embeddings if available
     - Otherwise falls back to simple word overlap
     """
-    if USE_OPENAI and embeddings_model:
+    return similarity_with_backend(text1, text2)[0]
+
+
+def similarity_with_backend(text1: str, text2: str) -> Tuple[float, str]:
+    """
+    compute_similarity plus the backend that actually produced the score: the OpenAI
+    backend falls back to "bow" on any API error (quota, timeout).
+    """
+    backend = _backend()
+    if backend == "hashed":
+        from src.services import hashed_embeddings
+        with stage("embed"):
+            v1, v2 = hashed_embeddings.embed(text1), hashed_embeddings.embed(text2)
+        return round(float(np.dot(v1, v2)), 2), hashed_embeddings.backend_name()
+
+    model = get_embeddings_model() if backend == "openai" else None
+    if model is not None:
         try:
-            vec1 = embeddings_model.embed_query(text1)
-            vec2 = embeddings_model.embed_query(text2)
+            with stage("embed"):
+                vec1 = model.embed_query(text1)
+                vec2 = model.embed_query(text2)
 
             v1 = np.array(vec1)
             v2 = np.array(vec2)
 
             score = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-            return round(float(score), 2)
+            return round(float(score), 2), "openai"
         except Exception:
             # fallback if API quota error or any failure
             pass
 
     # --- fallback similarity (no API key or error) ---
-    vec1 = simple_vectorize(text1)
-    vec2 = simple_vectorize(text2)
+    with stage("score"):
+        vec1 = simple_vectorize(text1)
+        vec2 = simple_vectorize(text2)
 
-    common = set(vec1.keys()) & set(vec2.keys())
-    dot = sum(vec1[w] * vec2[w] for w in common)
+        common = set(vec1.keys()) & set(vec2.keys())
+        dot = sum(vec1[w] * vec2[w] for w in common)
 
-    norm1 = np.sqrt(sum(v**2 for v in vec1.values()))
-    norm2 = np.sqrt(sum(v**2 for v in vec2.values()))
+        norm1 = np.sqrt(sum(v**2 for v in vec1.values()))
+        norm2 = np.sqrt(sum(v**2 for v in vec2.values()))
 
     if norm1 == 0 or norm2 == 0:
-        return 0.0
+        return 0.0, "bow"
 
     score = dot / (norm1 * norm2)
-    return round(float(score), 2)
+    return round(float(score), 2), "bow"
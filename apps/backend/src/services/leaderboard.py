@@ -0,0 +1,208 @@
+# Description: Materialized top-K candidate leaderboard per job (statistical score)
+# Notes:
+# - Stored in the job_leaderboard table, at most LEADERBOARD_SIZE rows per job and algorithm,
+#   so GET /jobs/{job_id}/leaderboard is an indexed read instead of a scan over all CVs
+# - A new CV is scored once against every job; it is inserted only where it beats the
+#   current K-th entry
+# - A new or edited job description rebuilds that job's leaderboard (one pass over the CVs)
+# - Documents are scored on their token corpus rows (services/token_corpus.py), so neither
+#   pass reads or tokenizes stored texts; a document missing from the corpus is added on the way
+# - Ties keep the older CV, so incremental updates and rebuilds give the same ranking
+# - Every job in the jobs table counts as open (there is no job status yet)
+# Usage (fill / refresh all leaderboards): python -m src.services.leaderboard [--batch-size 500]
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.core.database import SessionLocal
+from src.models.cv_document import CVDocument, CV_DONE
+from src.models.job import Job
+from src.models.leaderboard_entry import LeaderboardEntry
+from src.services import token_corpus
+from src.services.match_stat_service import ALGORITHMS
+from src.utils.compression import read_text
+
+LEADERBOARD_ENABLED = os.getenv("LEADERBOARD_ENABLED", "1").lower() in ("1", "true", "yes")
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "50"))
+LEADERBOARD_ALGORITHM = os.getenv("LEADERBOARD_ALGORITHM", "overlap")
+
+if LEADERBOARD_ALGORITHM not in ALGORITHMS:
+    raise ValueError(f"LEADERBOARD_ALGORITHM must be one of {ALGORITHMS}")
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _score(cv, job) -> Tuple[float, str]:
+    result = token_corpus.score_terms(cv, job, algorithm=LEADERBOARD_ALGORITHM)
+    return result["score"], json.dumps(result["details"], ensure_ascii=False)
+
+
+# ---------- Writes ----------
+
+def _prune(db, job_id: str) -> None:
+    """
+    Keep the best LEADERBOARD_SIZE rows of a job (concurrent writers may briefly exceed it).
+    """
+    extra = [
+        entry_id
+        for (entry_id,) in db.query(LeaderboardEntry.id)
+        .filter(LeaderboardEntry.job_id == job_id, LeaderboardEntry.algorithm == LEADERBOARD_ALGORITHM)
+        .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.cv_id)
+        .offset(LEADERBOARD_SIZE)
+    ]
+    if extra:
+        db.query(LeaderboardEntry).filter(LeaderboardEntry.id.in_(extra)).delete(synchronize_session=False)
+
+
+def record_cv(cv_id: int, text: str) -> int:
+    """
+    Score a newly stored CV against every job and insert it into the leaderboards
+    it qualifies for. Returns the number of leaderboards it entered.
+    """
+    if not LEADERBOARD_ENABLED:
+        return 0
+    cv_terms = token_corpus.document_terms("cv", cv_id, text)
+    db = SessionLocal()
+    try:
+        # (entries, lowest score) per job, in one grouped query
+        current = {
+            job_id: (count, lowest)
+            for job_id, count, lowest in db.query(
+                LeaderboardEntry.job_id, func.count(LeaderboardEntry.id), func.min(LeaderboardEntry.score)
+            )
+            .filter(LeaderboardEntry.algorithm == LEADERBOARD_ALGORITHM, LeaderboardEntry.cv_id != cv_id)
+            .group_by(LeaderboardEntry.job_id)
+        }
+        # Idempotent if the CV is indexed again
+        db.query(LeaderboardEntry).filter(
+            LeaderboardEntry.cv_id == cv_id, LeaderboardEntry.algorithm == LEADERBOARD_ALGORITHM
+        ).delete(synchronize_session=False)
+
+        entered: List[str] = []
+        job_ids = [job_id for (job_id,) in db.query(Job.job_id)]
+        for start in range(0, len(job_ids), 500):
+            for job_id, job_terms in token_corpus.load_terms(db, "job", job_ids[start:start + 500]).items():
+                score, details = _score(cv_terms, job_terms)
+                count, lowest = current.get(job_id, (0, None))
+                # Strictly better than the K-th entry: on ties the older CV keeps its place
+                if count < LEADERBOARD_SIZE or score > lowest:
+                    db.add(LeaderboardEntry(
+                        job_id=job_id, cv_id=cv_id, algorithm=LEADERBOARD_ALGORITHM, score=score, details=details
+                    ))
+                    entered.append(job_id)
+        db.flush()
+        for job_id in entered:
+            if current.get(job_id, (0, None))[0] >= LEADERBOARD_SIZE:
+                _prune(db, job_id)
+        db.commit()
+        return len(entered)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def rebuild_job(job_id: str, text: str, batch_size: int = 500) -> int:
+    """
+    Recompute a job's leaderboard from all processed CVs (new or edited description).
+    Returns the number of entries stored.
+    """
+    if not LEADERBOARD_ENABLED:
+        return 0
+    job_terms = token_corpus.document_terms("job", job_id, text)
+    # Min-heap of (score, -cv_id, details): the root is the entry to evict
+    best: List[Tuple[float, int, str]] = []
+    db = SessionLocal()
+    try:
+        last = None
+        while True:
+            query = db.query(CVDocument.id).filter(CVDocument.status == CV_DONE)
+            if last is not None:
+                query = query.filter(CVDocument.id > last)
+            cv_ids = [cv_id for (cv_id,) in query.order_by(CVDocument.id).limit(batch_size)]
+            if not cv_ids:
+                break
+            for cv_id, cv_terms in token_corpus.load_terms(db, "cv", cv_ids).items():
+                score, details = _score(cv_terms, job_terms)
+                item = (score, -cv_id, details)
+                if len(best) < LEADERBOARD_SIZE:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            last = cv_ids[-1]
+
+        db.query(LeaderboardEntry).filter(
+            LeaderboardEntry.job_id == job_id, LeaderboardEntry.algorithm == LEADERBOARD_ALGORITHM
+        ).delete(synchronize_session=False)
+        db.add_all(
+            LeaderboardEntry(job_id=job_id, cv_id=-neg_id, algorithm=LEADERBOARD_ALGORITHM, score=score, details=details)
+            for score, neg_id, details in best
+        )
+        db.commit()
+        return len(best)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ---------- Reads ----------
+
+def top(db, job_id: str, k: Optional[int] = None) -> List[Dict]:
+    """
+    Best entries of a job, with the CV filename.
+    """
+    rows = (
+        db.query(LeaderboardEntry.cv_id, CVDocument.filename, LeaderboardEntry.score, LeaderboardEntry.details)
+        .join(CVDocument, CVDocument.id == LeaderboardEntry.cv_id)
+        .filter(LeaderboardEntry.job_id == job_id, LeaderboardEntry.algorithm == LEADERBOARD_ALGORITHM)
+        .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.cv_id)
+        .limit(min(k or LEADERBOARD_SIZE, LEADERBOARD_SIZE))
+        .all()
+    )
+    return [
+        {
+            "rank": rank,
+            "cv_id": cv_id,
+            "filename": filename,
+            "score": score,
+            "details": json.loads(details) if details else None,
+        }
+        for rank, (cv_id, filename, score, details) in enumerate(rows, start=1)
+    ]
+
+
+def rebuild_all(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Rebuild every job's leaderboard (after enabling the feature or changing the algorithm).
+    """
+    db = SessionLocal()
+    try:
+        jobs = [(job_id, read_text(raw, compressed) or "") for job_id, raw, compressed in
+                db.query(Job.job_id, Job.description_raw, Job.description_compressed)]
+    finally:
+        db.close()
+    result: Dict[str, int] = {}
+    for job_id, text in jobs:
+        result[job_id] = rebuild_job(job_id, text, batch_size)
+        logger.info("leaderboard %s: %d entries", job_id, result[job_id])
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the per-job candidate leaderboards")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    result = rebuild_all(args.batch_size)
+    print(f"Leaderboards rebuilt: {len(result)} jobs, {sum(result.values())} entries")
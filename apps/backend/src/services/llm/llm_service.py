@@ -2,6 +2,7 @@ import os
 from typing import Dict, Any
 
 # --- Corrected imports using absolute package path ---
+from src.core.request_profiler import stage
 from src.services.llm.llm_interface import LlmProvider
 from src.services.llm.openai_provider import OpenAIProvider
 from src.services.llm.openrouter_provider import OpenRouterProvider
@@ -23,4 +24,5 @@ class LlmService:
         temperature: float = 0.2,
     ) -> Dict[str, Any]:
         """Unified entry point for LLM chat interaction"""
-        return await self.provider.chat(prompt, system, max_tokens, temperature)
+        with stage("llm"):
+            return await self.provider.chat(prompt, system, max_tokens, temperature)
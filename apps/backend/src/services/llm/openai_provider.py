@@ -8,7 +8,8 @@ class OpenAIProvider(LlmProvider):
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.model = os.getenv("OPENAI_MODEL", "gpt-5-mini")
-        self.base_url = "https://api.openai.com/v1/chat/completions"
+        base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        self.base_url = f"{base_url.rstrip('/')}/chat/completions"
 
         if not self.api_key:
             raise RuntimeError("OPENAI_API_KEY not set")
@@ -8,7 +8,8 @@ class OpenRouterProvider(LlmProvider):
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.model = os.getenv("OPENROUTER_MODEL", "openai/gpt-4.1-mini")
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+        self.base_url = f"{base_url.rstrip('/')}/chat/completions"
         self.referrer = os.getenv("OPENROUTER_REFERRER", "http://localhost:4000")
         self.title = os.getenv("OPENROUTER_TITLE", "CVScan")
 
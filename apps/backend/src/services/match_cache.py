@@ -0,0 +1,223 @@
+# Description: Cache of match / analysis results (in-process LRU in front of the match_results table)
+# Notes:
+# - Key = sha256(CV content hash, job content hash, algorithm, algorithm version, parameters)
+# - Content-addressed: editing either document changes its hash, so stale entries are never hit;
+#   bumping an algorithm version (or changing a parameter) does the same for code changes
+# - Only successful results are stored; DB errors degrade to a cache miss, never a failed request
+# - bm25 / tfidf keys carry a log-scale corpus size bucket (CorpusStats.size_bucket): their
+#   results are kept while the corpus grows by less than ~19%, then recomputed
+# - A miss is computed once per worker even under a burst of identical requests: concurrent
+#   callers with the same key share the in-flight computation (core/single_flight.py) and
+#   are reported as cached
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from src.core.single_flight import flights
+
+MATCH_CACHE_ENABLED = os.getenv("MATCH_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+MATCH_CACHE_PERSIST = os.getenv("MATCH_CACHE_PERSIST", "1").lower() in ("1", "true", "yes")
+MATCH_CACHE_LRU_SIZE = int(os.getenv("MATCH_CACHE_LRU_SIZE", "2048"))
+
+logger = logging.getLogger("uvicorn.error")
+
+# Per-worker counters
+stats: Dict[str, int] = {"lru_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+class CacheKey:
+    """
+    Identity of one result. `key` is the stored digest.
+    """
+
+    def __init__(self, cv_hash: str, job_hash: str, algorithm: str, version: str, params: Optional[Dict] = None):
+        self.cv_hash = cv_hash
+        self.job_hash = job_hash
+        self.algorithm = algorithm
+        self.version = version
+        # Operation name for metrics ("similarity", "match-stat", "analyze-cv")
+        self.operation = algorithm.split(":", 1)[0]
+        raw = json.dumps([cv_hash, job_hash, algorithm, version, params or {}], sort_keys=True)
+        self.key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MatchCache:
+    """
+    LRU (per worker) backed by the match_results table (shared by all workers).
+    """
+
+    def __init__(self, max_size: int = MATCH_CACHE_LRU_SIZE):
+        self.max_size = max_size
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- LRU ----------
+
+    def _lru_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+            return value
+
+    def _lru_put(self, key: str, value: Dict) -> None:
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    # ---------- Table ----------
+
+    def _db_get(self, key: str) -> Optional[Dict]:
+        from src.core.database import SessionLocal
+        from src.models.match_result import MatchResult
+
+        db = SessionLocal()
+        try:
+            row = db.query(MatchResult.result).filter(MatchResult.cache_key == key).first()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.warning("Match cache lookup failed: %s", e)
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: CacheKey, value: Dict) -> None:
+        from src.core.database import SessionLocal
+        from src.models.match_result import MatchResult
+
+        db = SessionLocal()
+        try:
+            db.add(MatchResult(
+                cache_key=key.key,
+                cv_hash=key.cv_hash,
+                job_hash=key.job_hash,
+                algorithm=key.algorithm,
+                version=key.version,
+                result=json.dumps(value, ensure_ascii=False),
+            ))
+            db.commit()
+        except Exception as e:
+            # Unique violation: another worker stored it first
+            db.rollback()
+            logger.debug("Match cache store skipped: %s", e)
+        finally:
+            db.close()
+
+    # ---------- Lookups ----------
+
+    def get(self, key: CacheKey) -> Optional[Dict]:
+        value = self._lru_get(key.key)
+        if value is not None:
+            stats["lru_hits"] += 1
+            return value
+        if MATCH_CACHE_PERSIST:
+            value = self._db_get(key.key)
+            if value is not None:
+                stats["db_hits"] += 1
+                self._lru_put(key.key, value)
+                return value
+        stats["misses"] += 1
+        return None
+
+    def lookup(self, key: Optional[CacheKey]) -> Optional[Dict]:
+        """
+        Read-only lookup, e.g. of a near-duplicate's root entry (None if caching is disabled).
+        """
+        if key is None or not MATCH_CACHE_ENABLED:
+            return None
+        return self.get(key)
+
+    def put(self, key: CacheKey, value: Dict) -> None:
+        self._lru_put(key.key, value)
+        if MATCH_CACHE_PERSIST:
+            self._db_put(key, value)
+
+    def _lru_hit(self, key: CacheKey) -> Optional[Dict]:
+        if not MATCH_CACHE_ENABLED:
+            return None
+        value = self._lru_get(key.key)
+        if value is not None:
+            stats["lru_hits"] += 1
+        return value
+
+    def get_or_compute(
+        self, key: CacheKey, compute: Callable[[], Dict], cacheable: Optional[Callable[[Dict], bool]] = None
+    ) -> Tuple[Dict, bool]:
+        """
+        (result, served_from_cache). The caller must not mutate the returned dict.
+        A result for which `cacheable` returns False (e.g. a degraded fallback) is returned
+        but not stored.
+        """
+        value = self._lru_hit(key)
+        if value is not None:
+            return value, True
+
+        def load() -> Tuple[Dict, bool]:
+            if not MATCH_CACHE_ENABLED:
+                return compute(), False
+            value = self.get(key)
+            if value is not None:
+                return value, True
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.put(key, value)
+            return value, False
+
+        (value, cached), coalesced = flights.do(key.key, load, key.operation)
+        return value, cached or coalesced
+
+    async def get_or_compute_async(
+        self,
+        key: CacheKey,
+        compute: Callable[[], Awaitable[Dict]],
+        cacheable: Optional[Callable[[Dict], bool]] = None,
+    ) -> Tuple[Dict, bool]:
+        """
+        Async variant: table reads/writes run in a worker thread.
+        """
+        value = self._lru_hit(key)
+        if value is not None:
+            return value, True
+
+        async def load() -> Tuple[Dict, bool]:
+            if not MATCH_CACHE_ENABLED:
+                return await compute(), False
+            value = await asyncio.to_thread(self.get, key)
+            if value is not None:
+                return value, True
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                await asyncio.to_thread(self.put, key, value)
+            return value, False
+
+        (value, cached), coalesced = await flights.do_async(key.key, load, key.operation)
+        return value, cached or coalesced
+
+cache = MatchCache()
+
+
+def with_cache_flag(result: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+    """
+    Copy of a result with the response-level `cached` flag.
+    """
+    return dict(result, cached=cached)
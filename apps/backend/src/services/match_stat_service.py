@@ -1,30 +1,24 @@
 # Description: Lightweight statistical matching (no LLM, no paid deps)
 # Notes:
 # - Extracts text from CV (local uploads/ or public Supabase URL) and job JSON (jobs/<job_id>.json)
+# - Supabase objects go through services/object_cache.py (pooled client, ETag-revalidated disk cache)
 # - Cleans + tokenizes FR/EN
-# - Scores with shared keyword ratio -> returns 0.60..0.95
+# - Scores with shared keyword ratio, BM25 or TF-IDF (corpus stats) -> returns 0.60..0.95
 
 from __future__ import annotations
 
 import os
-import io
 import re
 import json
+import math
+import asyncio
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 
-# Optional PDF libs (already in project according to constraints)
-try:
-    import pdfplumber  # preferred
-except Exception:
-    pdfplumber = None
-
-try:
-    from PyPDF2 import PdfReader
-except Exception:
-    PdfReader = None
+from src.core.request_profiler import stage
+from src.services import match_cache, object_cache
+from src.services.corpus_stats import CorpusStats, get_stats
+from src.utils.parsers import PDF_MAX_CHARS, PDF_MAX_PAGES, PdfExtraction, extract_pdf_best
 
 # Project-relative default dirs (keep consistent with existing code)
 UPLOAD_DIR = Path("uploads")
@@ -34,6 +28,15 @@ JOBS_DIR = Path("jobs")
 SUPABASE_URL = os.getenv("SUPABASE_URL")  # e.g., https://xyzcompany.supabase.co
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "cvscan-files")  # bucket name (public)
 
+# Scoring algorithms selectable per request
+ALGORITHMS = ("overlap", "bm25", "tfidf")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Bump when scoring or extraction changes: cached results of older versions are no longer used
+MATCH_STAT_VERSION = "1"
+# Bump when tokenize() changes: token corpus snapshots of older versions are no longer read
+TOKENIZER_VERSION = "1"
+
 # Minimal FR/EN stopwords (short list – pragmatic and robust)
 _STOPWORDS: Set[str] = {
     # EN
@@ -80,67 +83,110 @@ def extract_cv_text(cv_filename: str) -> str:
     1) Local uploads/<cv_filename> if exists
     2) Else public Supabase URL (no auth), built as:
        {SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{cv_filename}
-    Supported types: .pdf (via pdfplumber or PyPDF2), .txt/.md/.json (plain text)
+    Supported types: .pdf (via the extractor cascade in utils.parsers), .txt/.md/.json (plain text)
+    """
+    return extract_cv(cv_filename)[0]
+
+
+def extract_cv(cv_filename: str) -> Tuple[str, Dict]:
+    """
+    Same as extract_cv_text, also returns extraction metadata:
+    {"truncated": stopped early on a page/time/size limit, "reason": which limit,
+    "extractor": winning PDF backend or None}.
     """
     local_path = UPLOAD_DIR / cv_filename
     if local_path.exists():
         return _extract_from_local_file(local_path)
 
     # Try public Supabase (no secret key required)
-    if not SUPABASE_URL:
-        raise FileNotFoundError(
-            f"CV not found locally and SUPABASE_URL is not set. Tried: {local_path}"
-        )
-    public_url = _build_supabase_public_url(cv_filename)
-    content, filename = _fetch_bytes(public_url, fallback_name=cv_filename)
-
-    if filename.lower().endswith(".pdf") or cv_filename.lower().endswith(".pdf"):
-        return _extract_from_pdf_bytes(content)
-    elif filename.lower().endswith((".txt", ".md", ".json")) or cv_filename.lower().endswith((".txt", ".md", ".json")):
-        try:
-            return content.decode("utf-8", errors="ignore")
-        except Exception:
-            return content.decode("latin-1", errors="ignore")
-    else:
-        # Best-effort: try as text
-        try:
-            return content.decode("utf-8", errors="ignore")
-        except Exception:
-            return content.decode("latin-1", errors="ignore")
-
-
-def compute_match_score(cv_text: str, job_text: str, top_n: int = 15) -> Dict:
-    """
-    Clean + tokenize both texts, compute common words and ratio, then map to [0.60, 0.95].
-    Returns dict with score and details.
+    content, filename = _fetch_bytes(_remote_cv_url(cv_filename), fallback_name=cv_filename)
+    return _extract_from_bytes(content, filename)
+
+
+async def extract_cv_async(cv_filename: str) -> Tuple[str, Dict]:
+    """
+    Async variant of extract_cv: the Supabase download awaits the pooled async
+    client; file reads and PDF extraction run in a worker thread.
+    """
+    content = await _load_cv_bytes(cv_filename)
+    return await asyncio.to_thread(_extract_from_bytes, content, cv_filename)
+
+
+async def _load_cv_bytes(cv_filename: str) -> bytes:
     """
-    cv_tokens = tokenize(cv_text)
-    job_tokens = tokenize(job_text)
+    Raw CV file: local uploads/ first, else Supabase (pooled client + object cache).
+    """
+    local_path = UPLOAD_DIR / cv_filename
+    if local_path.exists():
+        return await asyncio.to_thread(local_path.read_bytes)
+    return await object_cache.fetch_bytes(_remote_cv_url(cv_filename))
+
 
-    set_cv = set(cv_tokens)
-    set_job = set(job_tokens)
+def compute_match_score(
+    cv_text: str,
+    job_text: str,
+    top_n: int = 15,
+    algorithm: str = "overlap",
+    stats: Optional[CorpusStats] = None,
+) -> Dict:
+    """
+    Clean + tokenize both texts, compute a [0, 1] match ratio, then map to [0.60, 0.95].
+    Algorithms:
+    - "overlap": share of job keywords found in the CV
+    - "bm25": BM25 of the CV for the job keywords, normalized by its upper bound
+    - "tfidf": cosine of TF-IDF vectors
+    bm25/tfidf use corpus statistics (document frequency, average length).
+    Returns dict with score and details.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    with stage("tokenize"):
+        cv_tokens = tokenize(cv_text)
+        job_tokens = tokenize(job_text)
+    return score_tokens(cv_tokens, job_tokens, top_n=top_n, algorithm=algorithm, stats=stats)
+
+
+def score_tokens(
+    cv_tokens: List[str],
+    job_tokens: List[str],
+    top_n: int = 15,
+    algorithm: str = "overlap",
+    stats: Optional[CorpusStats] = None,
+) -> Dict:
+    """
+    compute_match_score on already tokenized texts (lets callers scoring one
+    document against many reuse the tokens).
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    with stage("tokenize"):
+        freq_cv = _freq(cv_tokens)
+        freq_job = _freq(job_tokens)
 
-    common = set_cv.intersection(set_job)
+    common = set(freq_cv).intersection(freq_job)
     n_common = len(common)
-    n_job = len(set_job)
-    n_cv = len(set_cv)
+    n_job = len(freq_job)
+    n_cv = len(freq_cv)
+
+    with stage("score"):
+        if algorithm == "overlap":
+            ratio = n_common / max(1, n_job)
+            # Rank top common by frequency in CV + Job
+            weights = {w: freq_cv[w] + freq_job[w] for w in common}
+        elif algorithm == "bm25":
+            ratio, weights = _bm25(freq_cv, len(cv_tokens), freq_job, stats or get_stats())
+        else:
+            ratio, weights = _tfidf(freq_cv, freq_job, stats or get_stats())
 
-    ratio = n_common / max(1, n_job)
     raw_score = 0.60 + 0.35 * ratio
     score = max(0.60, min(0.95, raw_score))
 
-    # Rank top common by frequency in CV + Job
-    freq_cv = _freq(cv_tokens)
-    freq_job = _freq(job_tokens)
-    scored_common = []
-    for w in common:
-        scored_common.append((w, freq_cv.get(w, 0) + freq_job.get(w, 0)))
-    scored_common.sort(key=lambda t: t[1], reverse=True)
-    top_common = [w for (w, _) in scored_common[:top_n]]
+    top_common = sorted(common, key=lambda w: weights.get(w, 0), reverse=True)[:top_n]
 
     return {
         "score": round(score, 4),
         "details": {
+            "algorithm": algorithm,
             "n_common": n_common,
             "n_job_tokens": n_job,
             "n_cv_tokens": n_cv,
@@ -150,13 +196,53 @@ def compute_match_score(cv_text: str, job_text: str, top_n: int = 15) -> Dict:
     }
 
 
-def match_stat(cv_filename: str, job_id: str) -> Dict:
+def match_stat(cv_filename: str, job_id: str, algorithm: str = "overlap") -> Dict:
     """
     Orchestrate the full pipeline: load texts, then compute score.
     """
-    cv_text = extract_cv_text(cv_filename)
+    cv_text, meta = extract_cv(cv_filename)
     job_text = load_job_text(job_id)
-    return compute_match_score(cv_text, job_text)
+    result = compute_match_score(cv_text, job_text, algorithm=algorithm)
+    result["details"].update(_cv_details(meta))
+    return result
+
+
+async def match_stat_async(cv_filename: str, job_id: str, algorithm: str = "overlap") -> Dict:
+    """
+    Async variant of match_stat (used by the /match-stat route).
+    Results are cached by (CV bytes, job text, algorithm): a hit skips extraction and scoring.
+    Extraction errors propagate (nothing is cached); a CV cut short by the time budget is
+    scored but not cached, since how much was read depends on the load at the time.
+    """
+    content = await _load_cv_bytes(cv_filename)
+    job_text = await asyncio.to_thread(load_job_text, job_id)
+    params = {"pdf_max_pages": PDF_MAX_PAGES, "pdf_max_chars": PDF_MAX_CHARS, "bm25_k1": BM25_K1, "bm25_b": BM25_B}
+    stats = None
+    if algorithm != "overlap":
+        # bm25 / tfidf depend on the corpus: their entries expire as it grows
+        stats = await asyncio.to_thread(get_stats)
+        params["corpus_size"] = stats.size_bucket
+    key = match_cache.CacheKey(
+        match_cache.content_hash(content),
+        match_cache.content_hash(job_text),
+        f"match-stat:{algorithm}",
+        MATCH_STAT_VERSION,
+        params,
+    )
+
+    def score() -> Dict:
+        cv_text, meta = _extract_from_bytes(content, cv_filename)
+        result = compute_match_score(cv_text, job_text, algorithm=algorithm, stats=stats)
+        result["details"].update(_cv_details(meta))
+        return result
+
+    async def compute() -> Dict:
+        return await asyncio.to_thread(score)
+
+    result, cached = await match_cache.cache.get_or_compute_async(
+        key, compute, cacheable=lambda r: r["details"]["cv_truncated_by"] != "time_budget"
+    )
+    return match_cache.with_cache_flag(result, cached)
 
 
 # ---------- Internal utilities ----------
@@ -172,93 +258,82 @@ def _build_supabase_public_url(cv_filename: str) -> str:
     return f"{base}/storage/v1/object/public/{bucket}/{path}"
 
 
+def _remote_cv_url(cv_filename: str) -> str:
+    if not SUPABASE_URL:
+        raise FileNotFoundError(
+            f"CV not found locally and SUPABASE_URL is not set. Tried: {UPLOAD_DIR / cv_filename}"
+        )
+    return _build_supabase_public_url(cv_filename)
+
+
 def _fetch_bytes(url: str, fallback_name: Optional[str] = None) -> Tuple[bytes, str]:
     """
     Fetch bytes from URL, return (content, filename_guess).
-    Uses only stdlib (urllib).
+    Pooled client + ETag-revalidated disk cache (see object_cache).
     """
-    headers = {
-        "User-Agent": "CVScan-MatchStat/1.0"
-    }
-    req = Request(url, headers=headers)
+    content = object_cache.fetch_bytes_sync(url)
+    # filename hint from URL (best-effort)
+    filename = fallback_name or url.split("?")[0].split("/")[-1] or "file"
+    return content, filename
+
+
+def _extract_from_bytes(content: bytes, filename: str) -> Tuple[str, Dict]:
+    """
+    Extract text from downloaded bytes. Returns (text, meta).
+    """
+    if filename.lower().endswith(".pdf"):
+        return _with_meta(_extract_from_pdf_bytes(content))
+    # .txt/.md/.json or unknown: best-effort as text
     try:
-        with urlopen(req, timeout=20) as resp:
-            content = resp.read()
-            # filename hint from URL (best-effort)
-            filename = fallback_name or url.split("?")[0].split("/")[-1] or "file"
-            return content, filename
-    except HTTPError as e:
-        raise FileNotFoundError(f"HTTP error fetching CV: {url} -> {e.code}") from e
-    except URLError as e:
-        raise ConnectionError(f"Network error fetching CV: {url} -> {e}") from e
+        return content.decode("utf-8", errors="ignore"), _TEXT_META
+    except Exception:
+        return content.decode("latin-1", errors="ignore"), _TEXT_META
 
 
-def _extract_from_local_file(path: Path) -> str:
+def _extract_from_local_file(path: Path) -> Tuple[str, Dict]:
     """
-    Extract text from local file path.
+    Extract text from local file path. Returns (text, meta).
     """
     name = path.name.lower()
     if name.endswith(".pdf"):
-        return _extract_from_pdf_path(path)
-    elif name.endswith((".txt", ".md", ".json")):
-        return path.read_text(encoding="utf-8", errors="ignore")
-    else:
-        # Best-effort as text
-        return path.read_text(encoding="utf-8", errors="ignore")
-
-
-def _extract_from_pdf_path(path: Path) -> str:
-    """
-    Extract text from local PDF using pdfplumber or PyPDF2.
-    """
-    if pdfplumber:
-        try:
-            text_parts: List[str] = []
-            with pdfplumber.open(str(path)) as pdf:
-                for page in pdf.pages:
-                    txt = page.extract_text() or ""
-                    text_parts.append(txt)
-            return "\n".join(text_parts)
-        except Exception:
-            pass
-    if PdfReader:
-        try:
-            reader = PdfReader(str(path))
-            parts = []
-            for page in reader.pages:
-                parts.append(page.extract_text() or "")
-            return "\n".join(parts)
-        except Exception:
-            pass
-    # Fallback
-    return ""
-
-
-def _extract_from_pdf_bytes(content: bytes) -> str:
-    """
-    Extract text from PDF bytes using pdfplumber or PyPDF2.
-    """
-    if pdfplumber:
-        try:
-            text_parts: List[str] = []
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                for page in pdf.pages:
-                    txt = page.extract_text() or ""
-                    text_parts.append(txt)
-            return "\n".join(text_parts)
-        except Exception:
-            pass
-    if PdfReader:
-        try:
-            reader = PdfReader(io.BytesIO(content))
-            parts = []
-            for page in reader.pages:
-                parts.append(page.extract_text() or "")
-            return "\n".join(parts)
-        except Exception:
-            pass
-    # Fallback
-    return ""
+        return _with_meta(_extract_from_pdf_path(path))
+    # .txt/.md/.json or unknown: best-effort as text
+    return path.read_text(encoding="utf-8", errors="ignore"), _TEXT_META
+
+
+_TEXT_META = {"truncated": False, "reason": None, "extractor": None}
+
+
+def _with_meta(result: PdfExtraction) -> Tuple[str, Dict]:
+    return result.text, {"truncated": result.truncated, "reason": result.reason, "extractor": result.backend}
+
+
+def _cv_details(meta: Dict) -> Dict:
+    return {"cv_truncated": meta["truncated"], "cv_truncated_by": meta["reason"], "cv_extractor": meta["extractor"]}
+
+
+def _extract_from_pdf_path(path: Path) -> PdfExtraction:
+    """
+    Extract text from local PDF (extractor cascade).
+    """
+    return _extract_pdf(path)
+
+
+def _extract_from_pdf_bytes(content: bytes) -> PdfExtraction:
+    """
+    Extract text from PDF bytes (extractor cascade).
+    """
+    return _extract_pdf(content)
+
+
+def _extract_pdf(source) -> PdfExtraction:
+    """
+    Page-streaming extraction (bounded by PDF_MAX_PAGES / PDF_TIME_BUDGET_S /
+    PDF_MAX_CHARS) through the extractor cascade: fastest backend first,
+    layout-aware ones only if the text fails the quality check. Errors propagate:
+    an empty text would score (and be cached) as a real result.
+    """
+    return extract_pdf_best(source)
 
 
 def clean(text: str) -> str:
@@ -279,6 +354,43 @@ def tokenize(text: str) -> List[str]:
     return tokens
 
 
+def _bm25(
+    freq_cv: Dict[str, int], dl: int, freq_job: Dict[str, int], stats: CorpusStats
+) -> Tuple[float, Dict[str, float]]:
+    """
+    BM25 of the CV (document) for the job's unique terms (query), divided by
+    its upper bound sum(idf * (k1 + 1)) so the ratio lies in [0, 1).
+    Returns (ratio, per-term contribution).
+    """
+    avgdl = stats.avgdl or dl or 1
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * dl / avgdl)
+    weights: Dict[str, float] = {}
+    score = upper = 0.0
+    for term in freq_job:
+        idf = stats.bm25_idf(term)
+        upper += idf * (BM25_K1 + 1.0)
+        tf = freq_cv.get(term)
+        if tf:
+            weights[term] = idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+            score += weights[term]
+    return (score / upper if upper else 0.0), weights
+
+
+def _tfidf(
+    freq_cv: Dict[str, int], freq_job: Dict[str, int], stats: CorpusStats
+) -> Tuple[float, Dict[str, float]]:
+    """
+    Cosine similarity of TF-IDF vectors. Returns (cosine, per-term dot contribution).
+    """
+    idf = {t: stats.tfidf_idf(t) for t in set(freq_cv) | set(freq_job)}
+    norm_cv = math.sqrt(sum((tf * idf[t]) ** 2 for t, tf in freq_cv.items()))
+    norm_job = math.sqrt(sum((tf * idf[t]) ** 2 for t, tf in freq_job.items()))
+    if not norm_cv or not norm_job:
+        return 0.0, {}
+    weights = {t: freq_cv[t] * freq_job[t] * idf[t] ** 2 for t in freq_cv if t in freq_job}
+    return sum(weights.values()) / (norm_cv * norm_job), weights
+
+
 def _freq(tokens: List[str]) -> Dict[str, int]:
     """
     Simple frequency counter.
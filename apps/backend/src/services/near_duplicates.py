@@ -0,0 +1,345 @@
+# Description: Near-duplicate CV detection (MinHash signatures + LSH banding)
+# Notes:
+# - Shingles are NEAR_DUP_SHINGLE_SIZE consecutive tokenize() tokens; a signature is
+#   NEAR_DUP_NUM_PERM uint32 min-hashes (512 bytes with the default 128)
+# - Signatures are appended to <dir>/signatures.u32 (memory-mapped by every worker) with a
+#   docs.ids line "cv_id root_id content_hash" per row; the LSH band buckets are rebuilt in
+#   memory from the mapped rows, so a lookup only compares the few colliding documents
+# - Bands/rows are derived from NEAR_DUP_THRESHOLD; candidates are kept when their estimated
+#   Jaccard similarity is >= the threshold
+# - A near-duplicate points at the first version it resembles (its root): its embedding is
+#   copied and the root's cached results are served for it when present (see root_hash)
+# Usage (index CVs stored before this existed): python -m src.services.near_duplicates
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.match_stat_service import TOKENIZER_VERSION, tokenize
+
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1").lower() in ("1", "true", "yes")
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+NEAR_DUP_SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", "3"))
+NEAR_DUP_SEED = int(os.getenv("NEAR_DUP_SEED", "1"))
+NEAR_DUP_DIR = Path(os.getenv("NEAR_DUP_DIR", "data/minhash"))
+# Serve a near-duplicate the cached scores / analyses of its root document
+NEAR_DUP_REUSE_RESULTS = os.getenv("NEAR_DUP_REUSE_RESULTS", "1").lower() in ("1", "true", "yes")
+
+_PRIME = (1 << 31) - 1
+
+logger = logging.getLogger("uvicorn.error")
+
+
+# ---------- Signatures ----------
+
+def _permutations(num_perm: int = NEAR_DUP_NUM_PERM, seed: int = NEAR_DUP_SEED) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+_PERMUTATIONS = _permutations()
+
+
+def shingles(tokens: List[str], size: int = NEAR_DUP_SHINGLE_SIZE) -> np.ndarray:
+    """
+    crc32 of every run of `size` consecutive tokens (the whole text if shorter), deduplicated.
+    """
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    runs = [" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))]
+    return np.unique(np.fromiter((zlib.crc32(r.encode("utf-8")) for r in runs), dtype=np.uint64, count=len(runs)))
+
+
+def signature(tokens: List[str]) -> Optional[np.ndarray]:
+    """
+    MinHash signature (uint32, one value per permutation), None for an empty text.
+    """
+    x = shingles(tokens)
+    if not len(x):
+        return None
+    a, b = _PERMUTATIONS
+    # (a * x + b) mod p with a, x < 2^31: no uint64 overflow
+    hashed = (a[:, None] * (x[None, :] % _PRIME) + b[:, None]) % _PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def lsh_params(num_perm: int = NEAR_DUP_NUM_PERM, threshold: float = NEAR_DUP_THRESHOLD) -> Tuple[int, int]:
+    """
+    (bands, rows per band): the longest bands whose S-curve midpoint (1/b)^(1/r) stays
+    0.1 below the threshold, so pairs at the threshold collide with high probability.
+    """
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    good = [(b, r) for b, r in options if (1.0 / b) ** (1.0 / r) <= threshold - 0.1]
+    return max(good, key=lambda br: br[1]) if good else options[0]
+
+
+# ---------- Index ----------
+
+class MinHashIndex:
+    """
+    Append-only signature matrix + LSH buckets (per worker) for stored CVs.
+    """
+
+    def __init__(self, directory: Path, num_perm: int = NEAR_DUP_NUM_PERM, threshold: float = NEAR_DUP_THRESHOLD):
+        self.directory = Path(directory)
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[int] = []
+        self._id_to_row: Dict[int, int] = {}
+        self._roots: Dict[int, int] = {}
+        self._hashes: Dict[int, str] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._ids_offset = 0
+
+    @property
+    def _signatures_path(self) -> Path:
+        return self.directory / "signatures.u32"
+
+    @property
+    def _ids_path(self) -> Path:
+        return self.directory / "docs.ids"
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _refresh(self) -> None:
+        """
+        Pick up signatures appended by any worker since the last call.
+        """
+        try:
+            with open(self._ids_path, "rb") as fh:
+                fh.seek(self._ids_offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return
+        start = len(self._ids)
+        for line in chunk[:end].decode("utf-8").splitlines():
+            cv_id, root, digest = line.split(" ")
+            self._id_to_row[int(cv_id)] = len(self._ids)
+            self._roots[int(cv_id)] = int(root)
+            self._hashes[int(cv_id)] = digest
+            self._ids.append(int(cv_id))
+        self._ids_offset += end
+        # Signatures are written before their id line
+        self._matrix = np.memmap(
+            self._signatures_path, dtype=np.uint32, mode="r", shape=(len(self._ids), self.num_perm)
+        )
+        for row in range(start, len(self._ids)):
+            for band, key in zip(self._buckets, self._band_keys(self._matrix[row])):
+                band.setdefault(key, []).append(row)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._id_to_row)
+
+    def __contains__(self, cv_id: int) -> bool:
+        with self._lock:
+            self._refresh()
+            return cv_id in self._id_to_row
+
+    def add(self, cv_id: int, sig: np.ndarray, root: Optional[int] = None, digest: str = "") -> None:
+        """
+        Store a CV's signature; `root` is the document it near-duplicates (itself if none).
+        """
+        sig = np.asarray(sig, dtype=np.uint32).ravel()
+        if sig.shape[0] != self.num_perm:
+            raise ValueError(f"Signature length {sig.shape[0]} != {self.num_perm}")
+        with self._lock, self._write_lock():
+            self._refresh()
+            # Drop a signature whose id line was never written (writer died in between)
+            committed = len(self._ids) * self.num_perm * 4
+            if self._signatures_path.exists() and self._signatures_path.stat().st_size > committed:
+                os.truncate(self._signatures_path, committed)
+            with open(self._signatures_path, "ab") as fh:
+                fh.write(sig.tobytes())
+            with open(self._ids_path, "ab") as fh:
+                fh.write(f"{int(cv_id)} {int(root if root is not None else cv_id)} {digest or '-'}\n".encode("utf-8"))
+            self._refresh()
+
+    def query(self, sig: np.ndarray, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Stored CVs whose estimated Jaccard similarity is >= the threshold, best first.
+        """
+        with self._lock:
+            self._refresh()
+            if self._matrix is None:
+                return []
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(band.get(key, ()))
+            rows = sorted(
+                r for r in candidates
+                if self._id_to_row.get(self._ids[r]) == r and self._ids[r] != exclude
+            )
+            if not rows:
+                return []
+            similarity = (np.asarray(self._matrix[rows]) == sig).mean(axis=1)
+            hits = [(self._ids[r], round(float(s), 4)) for r, s in zip(rows, similarity) if s >= self.threshold]
+        return sorted(hits, key=lambda hit: (-hit[1], hit[0]))
+
+    def root(self, cv_id: int) -> int:
+        with self._lock:
+            self._refresh()
+            return self._roots.get(cv_id, cv_id)
+
+    def content_hash(self, cv_id: int) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            digest = self._hashes.get(cv_id)
+            return digest if digest and digest != "-" else None
+
+
+_index: Optional[MinHashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> MinHashIndex:
+    """
+    Index of this worker; signatures of other parameters live in other directories.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            name = f"p{NEAR_DUP_NUM_PERM}-k{NEAR_DUP_SHINGLE_SIZE}-s{NEAR_DUP_SEED}-t{TOKENIZER_VERSION}"
+            _index = MinHashIndex(NEAR_DUP_DIR / name)
+        return _index
+
+
+# ---------- Upload path ----------
+
+def find_duplicate(tokens: List[str], exclude: Optional[int] = None) -> Optional[Dict]:
+    """
+    Best stored near-duplicate of a text: {"cv_id": its root, "matched": the most similar
+    version, "similarity"}, or None.
+    """
+    if not NEAR_DUP_ENABLED:
+        return None
+    sig = signature(tokens)
+    if sig is None:
+        return None
+    index = get_index()
+    hits = index.query(sig, exclude=exclude)
+    if not hits:
+        return None
+    matched, similarity = hits[0]
+    return {"cv_id": index.root(matched), "matched": matched, "similarity": similarity}
+
+
+def add_document(cv_id: int, tokens: List[str], text: str, duplicate_of: Optional[int] = None) -> bool:
+    """
+    Store the signature of a newly stored CV. Returns False for an empty text.
+    """
+    if not NEAR_DUP_ENABLED:
+        return False
+    sig = signature(tokens)
+    if sig is None:
+        return False
+    get_index().add(cv_id, sig, root=duplicate_of, digest=hashlib.sha256(text.encode("utf-8")).hexdigest())
+    return True
+
+
+def root_hash(text: str, duplicate_of: Optional[int] = None, lookup: bool = True) -> Tuple[Optional[str], Optional[int]]:
+    """
+    (content hash, CV id) of the root document `text` near-duplicates, or (None, None).
+    The root's cached results may be read for `text`, never written: a result computed from
+    `text` is stored under its own hash. Stored CVs pass their `duplicate_of` and lookup=False.
+    """
+    if not (NEAR_DUP_ENABLED and NEAR_DUP_REUSE_RESULTS):
+        return None, None
+    if duplicate_of is None:
+        if not lookup:
+            return None, None
+        match = find_duplicate(tokenize(text))
+        if match is None:
+            return None, None
+        duplicate_of = match["cv_id"]
+    digest = get_index().content_hash(duplicate_of)
+    if digest is None or digest == hashlib.sha256(text.encode("utf-8")).hexdigest():
+        return None, None
+    return digest, duplicate_of
+
+
+# ---------- Backfill ----------
+
+def backfill(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Index processed CVs missing from the index, oldest first, detecting near-duplicates
+    among them. Returns counts of indexed documents and duplicates found.
+    """
+    from src.core.database import SessionLocal
+    from src.models.cv_document import CVDocument, CV_DONE
+    from src.utils.compression import read_text
+
+    index = get_index()
+    counts = {"indexed": 0, "duplicates": 0}
+    last = None
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(CVDocument.id, CVDocument.content_raw, CVDocument.content_compressed).filter(
+                CVDocument.status == CV_DONE
+            )
+            if last is not None:
+                query = query.filter(CVDocument.id > last)
+            rows = query.order_by(CVDocument.id).limit(batch_size).all()
+            if not rows:
+                break
+            for cv_id, raw, compressed in rows:
+                if cv_id in index:
+                    continue
+                text = read_text(raw, compressed) or ""
+                tokens = tokenize(text)
+                duplicate = find_duplicate(tokens, exclude=cv_id)
+                if duplicate is not None:
+                    db.query(CVDocument).filter(CVDocument.id == cv_id).update(
+                        {"duplicate_of": duplicate["cv_id"]}, synchronize_session=False
+                    )
+                    counts["duplicates"] += 1
+                if add_document(cv_id, tokens, text, duplicate["cv_id"] if duplicate else None):
+                    counts["indexed"] += 1
+            db.commit()
+            last = rows[-1][0]
+        finally:
+            db.close()
+        logger.info("near-duplicate backfill: %d indexed, %d duplicates", counts["indexed"], counts["duplicates"])
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index stored CVs for near-duplicate detection")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    result = backfill(args.batch_size)
+    print(f"Near-duplicate backfill done: {result['indexed']} indexed, {result['duplicates']} duplicates")
@@ -0,0 +1,184 @@
+# Description: Pooled HTTP fetch of storage objects (Supabase public URLs) with an on-disk cache
+# Notes:
+# - One httpx client per worker (per event loop for the async one): connections are kept alive
+#   and reused instead of a new TCP/TLS handshake per CV
+# - Cached objects are revalidated with If-None-Match; a 304 costs a round-trip, not a download
+# - FETCH_MAX_CONCURRENT_DOWNLOADS bounds in-flight downloads per worker
+# - If storage is unreachable, a cached copy is served (stale) instead of failing the request
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+OBJECT_CACHE_DIR = Path(os.getenv("OBJECT_CACHE_DIR", "data/object_cache"))
+OBJECT_CACHE_ENABLED = os.getenv("OBJECT_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+FETCH_TIMEOUT_S = float(os.getenv("FETCH_TIMEOUT_S", "20"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+FETCH_MAX_CONCURRENT_DOWNLOADS = int(os.getenv("FETCH_MAX_CONCURRENT_DOWNLOADS", "8"))
+
+_HEADERS = {"User-Agent": "CVScan-MatchStat/1.0"}
+
+logger = logging.getLogger("uvicorn.error")
+
+# Counters (per worker), e.g. for load-test reports
+stats: Dict[str, int] = {"downloads": 0, "not_modified": 0, "stale": 0}
+
+
+# ---------- Disk cache ----------
+
+def _cache_paths(url: str) -> Tuple[Path, Path]:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return OBJECT_CACHE_DIR / f"{key}.bin", OBJECT_CACHE_DIR / f"{key}.json"
+
+
+def _cached(url: str) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    (etag, content) of the cached copy, or (None, None).
+    """
+    if not OBJECT_CACHE_ENABLED:
+        return None, None
+    data_path, meta_path = _cache_paths(url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        return meta.get("etag"), data_path.read_bytes()
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+
+def _store(url: str, etag: Optional[str], content: bytes) -> None:
+    """
+    Write content then metadata (each atomically); objects without an ETag are not cached.
+    """
+    if not OBJECT_CACHE_ENABLED or not etag:
+        return
+    data_path, meta_path = _cache_paths(url)
+    try:
+        OBJECT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        for path, payload in (
+            (data_path, content),
+            (meta_path, json.dumps({"url": url, "etag": etag, "size": len(content)}).encode("utf-8")),
+        ):
+            tmp = path.with_suffix(path.suffix + suffix)
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Object cache write failed for %s: %s", url, e)
+
+
+def _request_headers(etag: Optional[str]) -> Dict[str, str]:
+    return dict(_HEADERS, **({"If-None-Match": etag} if etag else {}))
+
+
+def _handle_response(url: str, response: httpx.Response, cached: Optional[bytes]) -> bytes:
+    if response.status_code == 304 and cached is not None:
+        stats["not_modified"] += 1
+        return cached
+    if response.status_code >= 400:
+        raise FileNotFoundError(f"HTTP error fetching CV: {url} -> {response.status_code}")
+    stats["downloads"] += 1
+    _store(url, response.headers.get("etag"), response.content)
+    return response.content
+
+
+def _serve_stale(url: str, cached: Optional[bytes], error: Exception) -> bytes:
+    if cached is None:
+        raise ConnectionError(f"Network error fetching CV: {url} -> {error}") from error
+    stats["stale"] += 1
+    logger.warning("Storage unreachable, serving cached copy of %s: %s", url, error)
+    return cached
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_CONNECTIONS)
+
+
+# ---------- Async client (async routes) ----------
+
+_async_state: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient, asyncio.Semaphore]] = None
+
+
+def _get_async_state() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """
+    Client + download semaphore of the running loop (recreated if the loop changed,
+    e.g. after a fork or in tests).
+    """
+    global _async_state
+    loop = asyncio.get_running_loop()
+    if _async_state is None or _async_state[0] is not loop:
+        client = httpx.AsyncClient(timeout=FETCH_TIMEOUT_S, limits=_limits(), follow_redirects=True)
+        _async_state = (loop, client, asyncio.Semaphore(FETCH_MAX_CONCURRENT_DOWNLOADS))
+    return _async_state[1], _async_state[2]
+
+
+async def fetch_bytes(url: str) -> bytes:
+    """
+    GET `url` through the pooled async client, revalidating any cached copy.
+    Raises FileNotFoundError on HTTP errors, ConnectionError if unreachable and not cached.
+    """
+    etag, cached = await asyncio.to_thread(_cached, url)
+    client, semaphore = _get_async_state()
+    async with semaphore:
+        try:
+            response = await client.get(url, headers=_request_headers(etag))
+        except httpx.TransportError as e:
+            return _serve_stale(url, cached, e)
+    # Off the loop: a fresh download is written to the disk cache
+    return await asyncio.to_thread(_handle_response, url, response, cached)
+
+
+async def aclose() -> None:
+    """
+    Close the async client (app shutdown).
+    """
+    global _async_state
+    if _async_state is not None and _async_state[0] is asyncio.get_running_loop():
+        await _async_state[1].aclose()
+    _async_state = None
+
+
+# ---------- Sync client (scripts, threadpool callers) ----------
+
+_sync_client: Optional[httpx.Client] = None
+_sync_lock = threading.Lock()
+_sync_semaphore = threading.BoundedSemaphore(FETCH_MAX_CONCURRENT_DOWNLOADS)
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(timeout=FETCH_TIMEOUT_S, limits=_limits(), follow_redirects=True)
+    return _sync_client
+
+
+def fetch_bytes_sync(url: str) -> bytes:
+    """
+    Blocking variant of `fetch_bytes` (same cache, pooled sync client).
+    """
+    etag, cached = _cached(url)
+    with _sync_semaphore:
+        try:
+            response = _get_sync_client().get(url, headers=_request_headers(etag))
+        except httpx.TransportError as e:
+            return _serve_stale(url, cached, e)
+    return _handle_response(url, response, cached)
+
+
+def reset() -> None:
+    """
+    Drop the pooled clients without closing them (tests, or a forked child).
+    """
+    global _sync_client, _async_state
+    _sync_client = None
+    _async_state = None
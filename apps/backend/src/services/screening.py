@@ -0,0 +1,253 @@
+# Description: Two-stage candidate screening (cheap pre-filter over the pool, LLM re-rank of the shortlist)
+# Notes:
+# - Stage 1 scores every candidate: the statistical matcher on token corpus rows ("stat"), or the
+#   cosine of stored embeddings ("embedding"); "auto" uses embeddings when the job has one and at
+#   least SCREENING_MIN_EMBEDDING_COVERAGE of the pool does. Nothing is embedded on the request
+#   path: CVs without a vector are scored by the statistical matcher (its [0, 1] ratio)
+# - Stage 2 sends only the best top_k (optionally only those >= min_score) to the LLM, at most
+#   SCREENING_LLM_CONCURRENCY at a time, through the cached analysis (services/cv_analysis.py)
+# - final_score = SCREENING_LLM_WEIGHT * LLM score + (1 - weight) * pre-filter score, both in [0, 1];
+#   a failed analysis keeps the candidate with its pre-filter score and the error
+# - llm_calls_saved = pool size - LLM requests actually sent (cache hits cost nothing)
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.database import SessionLocal
+from src.core.request_profiler import stage
+from src.models.cv_document import CVDocument, CV_DONE
+from src.models.job import Job
+from src.services import cv_analysis, token_corpus, vector_store
+from src.services.corpus_stats import get_stats
+from src.services.langchain_service import embedding_backend_name
+from src.services.llm.llm_service import LlmService
+from src.utils.compression import read_text
+
+SCREENING_TOP_K = int(os.getenv("SCREENING_TOP_K", "10"))
+SCREENING_MAX_TOP_K = int(os.getenv("SCREENING_MAX_TOP_K", "50"))
+SCREENING_MAX_POOL = int(os.getenv("SCREENING_MAX_POOL", "5000"))
+SCREENING_LLM_CONCURRENCY = int(os.getenv("SCREENING_LLM_CONCURRENCY", "4"))
+SCREENING_LLM_WEIGHT = float(os.getenv("SCREENING_LLM_WEIGHT", "0.7"))
+SCREENING_ALGORITHM = os.getenv("SCREENING_ALGORITHM", "bm25")
+SCREENING_MIN_EMBEDDING_COVERAGE = float(os.getenv("SCREENING_MIN_EMBEDDING_COVERAGE", "0.9"))
+
+# (cv_id, pre-filter score as reported, pre-filter score in [0, 1])
+Scored = Tuple[int, float, float]
+
+
+class LlmUnavailable(Exception):
+    """No LLM provider is configured."""
+
+
+# ---------- Stage 1 ----------
+
+def _pool(db, cv_ids: Optional[List[int]]) -> List[int]:
+    """
+    Processed CVs of the pool (all of them by default). Raises ValueError above SCREENING_MAX_POOL.
+    """
+    query = db.query(CVDocument.id).filter(CVDocument.status == CV_DONE)
+    if cv_ids is not None:
+        query = query.filter(CVDocument.id.in_(set(cv_ids)))
+    ids = [cv_id for (cv_id,) in query.order_by(CVDocument.id).limit(SCREENING_MAX_POOL + 1)]
+    if len(ids) > SCREENING_MAX_POOL:
+        raise ValueError(f"Candidate pool exceeds {SCREENING_MAX_POOL} CVs; pass cv_ids")
+    return ids
+
+
+def stat_prefilter(db, job_id: str, job_text: str, cv_ids: List[int], algorithm: str) -> List[Scored]:
+    """
+    Statistical match score of every CV (token corpus rows, no text is re-tokenized).
+    """
+    job = token_corpus.document_terms("job", job_id, job_text)
+    stats = get_stats()
+    scored: List[Scored] = []
+    for start in range(0, len(cv_ids), 500):
+        for cv_id, terms in token_corpus.load_terms(db, "cv", cv_ids[start:start + 500]).items():
+            result = token_corpus.score_terms(terms, job, top_n=0, algorithm=algorithm, stats=stats)
+            scored.append((cv_id, result["score"], result["details"]["ratio_job_to_cv"]))
+    return scored
+
+
+def embedding_prefilter(job_id: str, cv_ids: List[int]) -> Optional[Tuple[List[Scored], List[int]]]:
+    """
+    Cosine between the job's stored embedding and every CV that has one (nothing is embedded
+    here). Returns (scored, CV ids without a vector), or None if the job has no vector.
+    """
+    query = vector_store.get_index("jobs").get(job_id)
+    if query is None:
+        return None
+    cvs = vector_store.get_index("cvs")
+    vectors: Dict[int, np.ndarray] = {}
+    missing = []
+    for cv_id in cv_ids:
+        vector = cvs.get(str(cv_id))
+        if vector is None:
+            missing.append(cv_id)
+        else:
+            vectors[cv_id] = vector
+
+    if not vectors:
+        return [], missing
+    ids = list(vectors)
+    with stage("score"):
+        scores = np.stack([vectors[cv_id] for cv_id in ids]) @ query
+    return [(cv_id, round(float(s), 4), max(0.0, min(1.0, float(s)))) for cv_id, s in zip(ids, scores)], missing
+
+
+def _prefilter(
+    job_id: str, cv_ids: Optional[List[int]], method: str, algorithm: str
+) -> Tuple[Dict, List[Scored], Dict[int, str], str]:
+    """
+    Runs in a worker thread. Returns (prefilter description, scored pool best first,
+    filenames, job text). Raises LookupError for an unknown job.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        if job is None:
+            raise LookupError(f"Job not found: {job_id}")
+        job_text = job.description or ""
+        pool = _pool(db, cv_ids)
+
+        scored = None
+        if method in ("auto", "embedding"):
+            embedded = embedding_prefilter(job_id, pool)
+            if embedded is not None:
+                scored, missing = embedded
+                coverage = 1.0 - len(missing) / len(pool) if pool else 1.0
+                # "auto" only ranks by embeddings when enough of the pool has one
+                if method == "auto" and coverage < SCREENING_MIN_EMBEDDING_COVERAGE:
+                    scored = None
+            if scored is not None:
+                if missing:
+                    # CVs without a vector get the statistical ratio, on the same [0, 1] scale
+                    scored += [
+                        (cv_id, round(normalized, 4), normalized)
+                        for cv_id, _, normalized in stat_prefilter(db, job_id, job_text, missing, algorithm)
+                    ]
+                described = {
+                    "method": "embedding",
+                    "backend": embedding_backend_name(),
+                    "stat_scored": len(missing),
+                    "algorithm": algorithm,
+                }
+        if scored is None:
+            scored = stat_prefilter(db, job_id, job_text, pool, algorithm)
+            described = {"method": "stat", "algorithm": algorithm}
+
+        # Best first; ties keep the older CV first
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        filenames = dict(db.query(CVDocument.id, CVDocument.filename).filter(CVDocument.id.in_(pool)).all())
+        return described, scored, filenames, job_text
+    finally:
+        db.close()
+
+
+def _cv_texts(cv_ids: List[int]) -> Dict[int, str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(CVDocument.id, CVDocument.content_raw, CVDocument.content_compressed).filter(
+            CVDocument.id.in_(cv_ids)
+        )
+        return {cv_id: read_text(raw, compressed) or "" for cv_id, raw, compressed in rows}
+    finally:
+        db.close()
+
+
+# ---------- Stage 2 ----------
+
+async def _review(candidates: List[Dict], texts: Dict[int, str], job_text: str, concurrency: int) -> None:
+    """
+    LLM analysis of each shortlisted candidate, `concurrency` at a time (fills the dicts in place).
+    """
+    try:
+        llm = LlmService()
+    except RuntimeError as e:
+        raise LlmUnavailable(str(e)) from e
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def review(candidate: Dict) -> None:
+        async with semaphore:
+            try:
+                result = await cv_analysis.analyze(texts.get(candidate["cv_id"], ""), job_text, llm)
+            except Exception as e:
+                candidate.update(llm_score=None, analysis=None, cached=False, error=str(e))
+                return
+        analysis = cv_analysis.parse_analysis(result)
+        candidate.update(
+            llm_score=cv_analysis.normalized_score(analysis),
+            analysis=analysis if analysis is not None else result.get("content"),
+            cached=result["cached"],
+            error=None,
+        )
+
+    await asyncio.gather(*(review(candidate) for candidate in candidates))
+
+
+def _final_score(candidate: Dict) -> float:
+    if candidate.get("llm_score") is None:
+        return candidate["prefilter_normalized"]
+    return round(
+        SCREENING_LLM_WEIGHT * candidate["llm_score"]
+        + (1.0 - SCREENING_LLM_WEIGHT) * candidate["prefilter_normalized"],
+        4,
+    )
+
+
+async def screen(
+    job_id: str,
+    cv_ids: Optional[List[int]] = None,
+    top_k: int = SCREENING_TOP_K,
+    min_score: Optional[float] = None,
+    prefilter: str = "auto",
+    algorithm: str = SCREENING_ALGORITHM,
+    others_limit: int = 20,
+    concurrency: int = SCREENING_LLM_CONCURRENCY,
+) -> Dict:
+    """
+    Screen a candidate pool for a job. Raises LookupError (unknown job), ValueError
+    (pool too large) or LlmUnavailable.
+    """
+    # Stage timings come from inside (db, score, embed); stages do not nest
+    described, scored, filenames, job_text = await asyncio.to_thread(
+        _prefilter, job_id, cv_ids, prefilter, algorithm
+    )
+
+    def entry(rank: int, item: Scored) -> Dict:
+        cv_id, score, normalized = item
+        return {
+            "cv_id": cv_id,
+            "filename": filenames.get(cv_id),
+            "prefilter_rank": rank,
+            "prefilter_score": score,
+            "prefilter_normalized": round(normalized, 4),
+        }
+
+    ranked = [entry(rank, item) for rank, item in enumerate(scored, start=1)]
+    shortlist = [c for c in ranked[:top_k] if min_score is None or c["prefilter_score"] >= min_score]
+    others = ranked[len(shortlist):]
+
+    if shortlist:
+        texts = await asyncio.to_thread(_cv_texts, [c["cv_id"] for c in shortlist])
+        await _review(shortlist, texts, job_text, concurrency)
+    for candidate in shortlist:
+        candidate["final_score"] = _final_score(candidate)
+    shortlist.sort(key=lambda c: (-c["final_score"], c["prefilter_rank"]))
+
+    llm_calls = sum(1 for c in shortlist if not c.get("cached"))
+    return {
+        "job_id": job_id,
+        "prefilter": described,
+        "pool_size": len(ranked),
+        "shortlisted": len(shortlist),
+        "llm_calls": llm_calls,
+        "llm_cached": len(shortlist) - llm_calls,
+        "llm_calls_saved": len(ranked) - llm_calls,
+        "results": shortlist,
+        "others": others[:others_limit],
+    }
@@ -0,0 +1,98 @@
+# Description: Background batch migration of CV content / job descriptions to compressed storage
+# Notes:
+# - Keyset pagination by primary key, one commit per batch, so it can run next to live
+#   traffic, be interrupted and resumed at any time (rows already compressed are skipped)
+# - --drop-raw also clears the uncompressed copy; on PostgreSQL the space is returned to
+#   the OS only after VACUUM FULL / pg_repack of the table
+# - --restore-raw writes the raw copy back (needed before downgrading the migration)
+# Usage: python -m src.services.text_backfill [--batch-size 500] [--drop-raw] [--sleep 0.1]
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from typing import Dict, Optional
+
+from src.utils.compression import TEXT_COMPRESSION, compress_text, decompress_text
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _tables():
+    from src.models.cv_document import CVDocument
+    from src.models.job import Job
+
+    # (model, primary key, raw column, compressed column)
+    return (
+        (CVDocument, CVDocument.id, CVDocument.content_raw, CVDocument.content_compressed),
+        (Job, Job.job_id, Job.description_raw, Job.description_compressed),
+    )
+
+
+def backfill(
+    batch_size: int = 500,
+    drop_raw: bool = False,
+    restore_raw: bool = False,
+    codec: Optional[str] = None,
+    sleep_s: float = 0.0,
+) -> Dict[str, int]:
+    """
+    Convert every row in batches. Returns the number of rows updated per table.
+    """
+    from src.core.database import SessionLocal
+
+    codec = codec or (TEXT_COMPRESSION if TEXT_COMPRESSION in ("zstd", "zlib") else "zstd")
+    updated: Dict[str, int] = {}
+    for model, pk, raw, compressed in _tables():
+        if restore_raw:
+            pending = raw.is_(None) & compressed.isnot(None)
+        elif drop_raw:
+            pending = raw.isnot(None)
+        else:
+            pending = compressed.is_(None) & raw.isnot(None)
+
+        count, last = 0, None
+        while True:
+            db = SessionLocal()
+            try:
+                query = db.query(pk, raw, compressed).filter(pending)
+                if last is not None:
+                    query = query.filter(pk > last)
+                rows = query.order_by(pk).limit(batch_size).all()
+                if not rows:
+                    break
+                for key, raw_value, compressed_value in rows:
+                    if restore_raw:
+                        values = {raw: decompress_text(compressed_value)}
+                    else:
+                        values = {}
+                        if compressed_value is None:
+                            values[compressed] = compress_text(raw_value, codec)
+                        if drop_raw:
+                            values[raw] = None
+                    db.query(model).filter(pk == key).update(values, synchronize_session=False)
+                db.commit()
+                count += len(rows)
+                last = rows[-1][0]
+            finally:
+                db.close()
+            logger.info("text backfill %s: %d rows", model.__tablename__, count)
+            if sleep_s:
+                # Leave I/O headroom for live traffic
+                time.sleep(sleep_s)
+        updated[model.__tablename__] = count
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress stored CV content and job descriptions")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--codec", choices=("zstd", "zlib"), default=None)
+    parser.add_argument("--drop-raw", action="store_true", help="clear the uncompressed copy")
+    parser.add_argument("--restore-raw", action="store_true", help="write the uncompressed copy back")
+    parser.add_argument("--sleep", type=float, default=0.0, help="pause between batches (seconds)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    result = backfill(args.batch_size, args.drop_raw, args.restore_raw, args.codec, args.sleep)
+    print("Text backfill done: " + ", ".join(f"{table}={n}" for table, n in result.items()))
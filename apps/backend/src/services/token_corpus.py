@@ -0,0 +1,483 @@
+# Description: Integer-id token corpus (vocabulary + CSR term arrays), memory-mapped by every worker
+# Notes:
+# - vocab.txt maps tokens to int32 ids (line number = id, append-only)
+# - Each document is one CSR row: sorted unique term ids (terms.i32) and their counts
+#   (counts.i32) between offsets[row] and offsets[row + 1] (offsets.i64); docs.ids names
+#   the rows ("cv:<id>", "job:<id>"), re-adding a name supersedes its older row
+# - 8 bytes per distinct term per document instead of a list of Python strings; the arrays
+#   are mapped read-only, so all workers share one copy through the page cache
+# - Files live in a versioned directory named by TOKEN_CORPUS_DIR/CURRENT. A snapshot built
+#   with another tokenizer version is never read: the next write starts a new version
+# - `score` is compute_match_score on two rows (numpy intersection, no sets or dicts)
+# - Writers serialize on an flock; readers re-map when the files grow or CURRENT changes
+# Usage (rebuild a compact snapshot from the DB): python -m src.services.token_corpus [--keep 2]
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.core.request_profiler import stage
+from src.services.corpus_stats import CorpusStats, get_stats
+from src.services.match_stat_service import ALGORITHMS, BM25_B, BM25_K1, TOKENIZER_VERSION, score_tokens, tokenize
+
+TOKEN_CORPUS_ENABLED = os.getenv("TOKEN_CORPUS_ENABLED", "1").lower() in ("1", "true", "yes")
+TOKEN_CORPUS_DIR = Path(os.getenv("TOKEN_CORPUS_DIR", "data/token_corpus"))
+
+logger = logging.getLogger("uvicorn.error")
+
+# One document: (sorted unique term ids, counts)
+Row = Tuple[np.ndarray, np.ndarray]
+
+
+def encode_counts(tokens: List[str], term_ids: Dict[str, int]) -> Row:
+    """
+    CSR row of a token list; every token must be in `term_ids`.
+    """
+    counts: Dict[int, int] = {}
+    for t in tokens:
+        i = term_ids[t]
+        counts[i] = counts.get(i, 0) + 1
+    ids = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.int32, count=len(counts))
+    order = np.argsort(ids, kind="stable")
+    return ids[order], values[order]
+
+
+class TokenCorpus:
+    """
+    Vocabulary + CSR rows of every indexed document (current version of TOKEN_CORPUS_DIR).
+    """
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, version: Optional[str]) -> None:
+        self.version = version
+        self._compatible: Optional[bool] = None
+        self._current_mtime: Optional[int] = None
+        self._terms: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._vocab_offset = 0
+        self._keys: List[str] = []
+        self._key_to_row: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._term_array: Optional[np.ndarray] = None
+        self._count_array: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    # ---------- Files ----------
+
+    @property
+    def _current_path(self) -> Path:
+        return self.base_dir / "CURRENT"
+
+    def _path(self, name: str, version: Optional[str] = None) -> Path:
+        return self.base_dir / (version or self.version) / name
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.base_dir / ".lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _create_version(self) -> str:
+        """
+        New empty version directory, made current. Caller holds the write lock.
+        """
+        existing = [int(p.name[1:]) for p in self.base_dir.glob("v*") if p.name[1:].isdigit()]
+        version = f"v{max(existing, default=0) + 1}"
+        directory = self.base_dir / version
+        directory.mkdir(parents=True)
+        (directory / "meta.json").write_text(json.dumps({"tokenizer": TOKENIZER_VERSION}), encoding="utf-8")
+        (directory / "offsets.i64").write_bytes(np.zeros(1, dtype=np.int64).tobytes())
+        for name in ("vocab.txt", "docs.ids", "terms.i32", "counts.i32"):
+            (directory / name).touch()
+        _write_atomic(self._current_path, version)
+        return version
+
+    # ---------- Reading ----------
+
+    def _refresh(self) -> None:
+        """
+        Follow CURRENT and pick up rows appended by any worker since the last call.
+        """
+        try:
+            mtime = os.stat(self._current_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._current_mtime:
+            version = self._current_path.read_text(encoding="utf-8").strip()
+            if version != self.version:
+                self._reset(version)
+            self._current_mtime = mtime
+        if self.version is None or not self._usable():
+            return
+        try:
+            if os.stat(self._path("docs.ids")).st_size == self._keys_offset:
+                return
+        except FileNotFoundError:
+            return
+
+        # Order matches the writer: vocab, terms/counts, offsets, then the row name (commit point)
+        with open(self._path("docs.ids"), "rb") as fh:
+            fh.seek(self._keys_offset)
+            chunk = fh.read()
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return
+        self._read_vocab()
+        for key in chunk[:end].decode("utf-8").splitlines():
+            self._key_to_row[key] = len(self._keys)
+            self._keys.append(key)
+        self._keys_offset += end
+        n = len(self._keys)
+        self._offsets = np.memmap(self._path("offsets.i64"), dtype=np.int64, mode="r", shape=(n + 1,))
+        size = int(self._offsets[n])
+        if size:
+            self._term_array = np.memmap(self._path("terms.i32"), dtype=np.int32, mode="r", shape=(size,))
+            self._count_array = np.memmap(self._path("counts.i32"), dtype=np.int32, mode="r", shape=(size,))
+        else:
+            self._term_array = self._count_array = np.zeros(0, dtype=np.int32)
+
+    def _usable(self) -> bool:
+        """
+        True if the current version was built with this tokenizer.
+        """
+        if self._compatible is None:
+            try:
+                meta = json.loads(self._path("meta.json").read_text(encoding="utf-8"))
+                self._compatible = meta.get("tokenizer") == TOKENIZER_VERSION
+            except FileNotFoundError:
+                self._compatible = False
+        return self._compatible
+
+    def _read_vocab(self) -> None:
+        with open(self._path("vocab.txt"), "rb") as fh:
+            fh.seek(self._vocab_offset)
+            chunk = fh.read()
+        end = chunk.rfind(b"\n") + 1
+        for term in chunk[:end].decode("utf-8").splitlines():
+            self._term_ids[term] = len(self._terms)
+            self._terms.append(term)
+        self._vocab_offset += end
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._key_to_row)
+
+    def row(self, key: str) -> Optional[Row]:
+        """
+        (term ids, counts) of a document as read-only views of the mapped arrays, or None.
+        """
+        with self._lock:
+            self._refresh()
+            index = self._key_to_row.get(key)
+            if index is None:
+                return None
+            start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+            return self._term_array[start:end], self._count_array[start:end]
+
+    def term(self, term_id: int) -> str:
+        return self._terms[term_id]
+
+    def vocabulary_size(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._terms)
+
+    # ---------- Writing ----------
+
+    def add(self, key: str, tokens: List[str]) -> Row:
+        """
+        Append one document; new tokens get the next ids. A previous row with the same key is superseded.
+        """
+        with self._lock, self._write_lock():
+            self._refresh()
+            if self.version is None or not self._usable():
+                self._reset(self._create_version())
+                self._refresh()
+            row = self._append(key, tokens)
+            self._refresh()
+            return row
+
+    def ensure(self, key: str, tokens: List[str]) -> Row:
+        """
+        Row of `key` if it already holds exactly these tokens, else add them.
+        """
+        with self._lock:
+            self._refresh()
+            index = self._key_to_row.get(key)
+            if index is not None and all(t in self._term_ids for t in tokens):
+                ids, counts = encode_counts(tokens, self._term_ids)
+                start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+                row = self._term_array[start:end], self._count_array[start:end]
+                if np.array_equal(ids, row[0]) and np.array_equal(counts, row[1]):
+                    return row
+        return self.add(key, tokens)
+
+    def _append(self, key: str, tokens: List[str]) -> Row:
+        """
+        Caller holds both locks and has refreshed.
+        """
+        if "\n" in key:
+            raise ValueError("Document keys cannot contain newlines")
+        # Drop what a writer that died before its commit point left behind
+        n = len(self._keys)
+        size = int(self._offsets[n]) if self._offsets is not None else 0
+        for name, length in (("offsets.i64", (n + 1) * 8), ("terms.i32", size * 4), ("counts.i32", size * 4)):
+            if os.path.getsize(self._path(name)) > length:
+                os.truncate(self._path(name), length)
+        self._read_vocab()
+        new_terms = [t for t in dict.fromkeys(tokens) if t not in self._term_ids]
+        if new_terms:
+            with open(self._path("vocab.txt"), "ab") as fh:
+                fh.write("".join(f"{t}\n" for t in new_terms).encode("utf-8"))
+            self._read_vocab()
+        ids, counts = encode_counts(tokens, self._term_ids)
+        with open(self._path("terms.i32"), "ab") as fh:
+            fh.write(ids.tobytes())
+        with open(self._path("counts.i32"), "ab") as fh:
+            fh.write(counts.tobytes())
+        end = size + len(ids)
+        with open(self._path("offsets.i64"), "ab") as fh:
+            fh.write(np.array([end], dtype=np.int64).tobytes())
+        with open(self._path("docs.ids"), "ab") as fh:
+            fh.write(f"{key}\n".encode("utf-8"))
+        return ids, counts
+
+    # ---------- Scoring ----------
+
+    def _idf(self, ids: np.ndarray, algorithm: str, stats: CorpusStats) -> np.ndarray:
+        lookup = stats.bm25_idf if algorithm == "bm25" else stats.tfidf_idf
+        return np.fromiter((lookup(self._terms[i]) for i in ids), dtype=np.float64, count=len(ids))
+
+    def score(
+        self,
+        cv: Row,
+        job: Row,
+        top_n: int = 15,
+        algorithm: str = "overlap",
+        stats: Optional[CorpusStats] = None,
+    ) -> Dict:
+        """
+        Same result as match_stat_service.compute_match_score, computed on two rows.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        cv_ids, cv_counts = cv
+        job_ids, job_counts = job
+        common, i_cv, i_job = np.intersect1d(cv_ids, job_ids, assume_unique=True, return_indices=True)
+        n_common, n_job, n_cv = len(common), len(job_ids), len(cv_ids)
+
+        if algorithm == "overlap":
+            ratio = n_common / max(1, n_job)
+            weights = cv_counts[i_cv].astype(np.float64) + job_counts[i_job]
+        elif algorithm == "bm25":
+            stats = stats or get_stats()
+            dl = int(cv_counts.sum())
+            avgdl = stats.avgdl or dl or 1
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * dl / avgdl)
+            idf_job = self._idf(job_ids, algorithm, stats)
+            upper = float(idf_job.sum()) * (BM25_K1 + 1.0)
+            tf = cv_counts[i_cv].astype(np.float64)
+            weights = idf_job[i_job] * tf * (BM25_K1 + 1.0) / (tf + norm)
+            ratio = float(weights.sum()) / upper if upper else 0.0
+        else:
+            stats = stats or get_stats()
+            idf_cv = self._idf(cv_ids, algorithm, stats)
+            idf_job = self._idf(job_ids, algorithm, stats)
+            norm_cv = math.sqrt(float(((cv_counts * idf_cv) ** 2).sum()))
+            norm_job = math.sqrt(float(((job_counts * idf_job) ** 2).sum()))
+            if not norm_cv or not norm_job:
+                ratio, weights = 0.0, np.zeros(len(common))
+            else:
+                weights = cv_counts[i_cv].astype(np.float64) * job_counts[i_job] * idf_cv[i_cv] ** 2
+                ratio = float(weights.sum()) / (norm_cv * norm_job)
+
+        score = max(0.60, min(0.95, 0.60 + 0.35 * ratio))
+        top = np.argsort(-weights, kind="stable")[:top_n]
+        return {
+            "score": round(score, 4),
+            "details": {
+                "algorithm": algorithm,
+                "n_common": n_common,
+                "n_job_tokens": n_job,
+                "n_cv_tokens": n_cv,
+                "ratio_job_to_cv": round(ratio, 4),
+                "top_common": [self._terms[int(common[i])] for i in top],
+            },
+        }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+_corpus: Optional[TokenCorpus] = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> Optional[TokenCorpus]:
+    """
+    Shared corpus of this worker, or None when TOKEN_CORPUS_ENABLED is off.
+    """
+    global _corpus
+    if not TOKEN_CORPUS_ENABLED:
+        return None
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = TokenCorpus(TOKEN_CORPUS_DIR)
+        return _corpus
+
+
+def add_document(kind: str, doc_id, tokens: List[str]) -> None:
+    corpus = get_corpus()
+    if corpus is not None:
+        corpus.add(f"{kind}:{doc_id}", tokens)
+
+
+# ---------- Scoring stored documents ----------
+
+# Scoring input: a corpus row, or a token list when the corpus is disabled
+Terms = Union[Row, List[str]]
+
+
+def document_terms(kind: str, doc_id, text: str) -> Terms:
+    """
+    Corpus row of a document for this text (added if missing or outdated), or its
+    tokens when the token corpus is disabled.
+    """
+    corpus = get_corpus()
+    if corpus is None:
+        return tokenize(text)
+    return corpus.ensure(f"{kind}:{doc_id}", tokenize(text))
+
+
+def load_terms(db, kind: str, doc_ids: Sequence) -> Dict:
+    """
+    document_terms for many stored documents ("cv" / "job"); their texts are read
+    (in one query) only for those missing from the corpus.
+    """
+    from src.models.cv_document import CVDocument
+    from src.models.job import Job
+    from src.utils.compression import read_text
+
+    corpus = get_corpus()
+    out: Dict = {}
+    missing = []
+    for doc_id in doc_ids:
+        row = corpus.row(f"{kind}:{doc_id}") if corpus is not None else None
+        if row is None:
+            missing.append(doc_id)
+        else:
+            out[doc_id] = row
+    if missing:
+        if kind == "cv":
+            pk, raw, compressed = CVDocument.id, CVDocument.content_raw, CVDocument.content_compressed
+        else:
+            pk, raw, compressed = Job.job_id, Job.description_raw, Job.description_compressed
+        for doc_id, raw_value, compressed_value in db.query(pk, raw, compressed).filter(pk.in_(missing)):
+            out[doc_id] = document_terms(kind, doc_id, read_text(raw_value, compressed_value) or "")
+    return out
+
+
+def score_terms(
+    cv: Terms,
+    job: Terms,
+    top_n: int = 15,
+    algorithm: str = "overlap",
+    stats: Optional[CorpusStats] = None,
+) -> Dict:
+    """
+    compute_match_score on two document_terms results.
+    """
+    corpus = get_corpus()
+    if corpus is None:
+        # Times its own "tokenize" / "score" stages
+        return score_tokens(cv, job, top_n=top_n, algorithm=algorithm, stats=stats)
+    with stage("score"):
+        return corpus.score(cv, job, top_n=top_n, algorithm=algorithm, stats=stats)
+
+
+# ---------- Snapshot rebuild ----------
+
+def build_snapshot(batch_size: int = 500, keep: int = 2) -> Tuple[str, int]:
+    """
+    Write every processed CV and job into a new version (no superseded rows, current
+    tokenizer), switch CURRENT to it and delete versions beyond the newest `keep`.
+    Writes from the app wait for the lock meanwhile. Returns (version, documents).
+    """
+    from src.core.database import SessionLocal
+    from src.models.cv_document import CVDocument, CV_DONE
+    from src.models.job import Job
+    from src.utils.compression import read_text
+
+    corpus = TokenCorpus(TOKEN_CORPUS_DIR)
+    count = 0
+    with corpus._write_lock():
+        corpus._reset(corpus._create_version())
+        corpus._refresh()
+        sources = (
+            ("cv", CVDocument.id, CVDocument.content_raw, CVDocument.content_compressed, CVDocument.status == CV_DONE),
+            ("job", Job.job_id, Job.description_raw, Job.description_compressed, None),
+        )
+        for kind, pk, raw, compressed, condition in sources:
+            last = None
+            while True:
+                db = SessionLocal()
+                try:
+                    query = db.query(pk, raw, compressed)
+                    if condition is not None:
+                        query = query.filter(condition)
+                    if last is not None:
+                        query = query.filter(pk > last)
+                    rows = query.order_by(pk).limit(batch_size).all()
+                finally:
+                    db.close()
+                if not rows:
+                    break
+                for doc_id, raw_value, compressed_value in rows:
+                    corpus._append(f"{kind}:{doc_id}", tokenize(read_text(raw_value, compressed_value) or ""))
+                    corpus._refresh()
+                count += len(rows)
+                last = rows[-1][0]
+                logger.info("token corpus %s: %d documents", corpus.version, count)
+
+        versions = sorted(
+            (p for p in TOKEN_CORPUS_DIR.glob("v*") if p.name[1:].isdigit()), key=lambda p: int(p.name[1:])
+        )
+        for old in versions[:-keep] if keep > 0 else []:
+            # Workers still mapping it keep their (unlinked) pages until they re-map
+            shutil.rmtree(old, ignore_errors=True)
+    return corpus.version, count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the token corpus snapshot from the database")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep", type=int, default=2, help="versions to keep on disk")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    version, count = build_snapshot(args.batch_size, args.keep)
+    print(f"Token corpus {version}: {count} documents")
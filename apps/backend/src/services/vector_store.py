@@ -0,0 +1,302 @@
+# Description: Local dense-vector store for CV / job embeddings with top-K search
+# Notes:
+# - One index per (embedding backend, collection): <dir>/<backend>/<collection>.f32 + .ids
+# - .f32 is a raw float32 row matrix (L2-normalized rows), memory-mapped read-only by every worker
+# - .ids lists the id of each row (append-only); re-adding an id supersedes its older row
+# - Search is vectorized brute force up to VECTOR_ANN_THRESHOLD rows, IVF (k-means lists) above
+# - Writers serialize on an flock; readers just re-map when the files grow
+# - Each row is appended before its id; a writer first cuts any tail a crashed writer left
+#   between the two appends, so row n always belongs to id line n
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+VECTOR_STORE_DIR = Path(os.getenv("VECTOR_STORE_DIR", "data/vectors"))
+VECTOR_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "50000"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+# Rebuild the IVF lists once the index has grown by this factor
+VECTOR_IVF_REBUILD_GROWTH = float(os.getenv("VECTOR_IVF_REBUILD_GROWTH", "1.5"))
+
+COLLECTIONS = ("cvs", "jobs")
+
+
+class VectorIndex:
+    """
+    Append-only float32 matrix + id map for one collection.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self.directory = Path(directory)
+        self.name = name
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._ids_offset = 0
+        self._ivf: Optional[Dict] = None
+
+    # ---------- Files ----------
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / f"{self.name}.f32"
+
+    @property
+    def _ids_path(self) -> Path:
+        return self.directory / f"{self.name}.ids"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / f"{self.name}.meta.json"
+
+    def _ivf_path(self, part: str) -> Path:
+        return self.directory / f"{self.name}.ivf.{part}.npy"
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{self.name}.lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # ---------- Reading ----------
+
+    def _refresh(self) -> None:
+        """
+        Pick up rows appended by any worker since the last call.
+        """
+        if self.dim is None:
+            try:
+                self.dim = json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"]
+            except FileNotFoundError:
+                return
+        try:
+            with open(self._ids_path, "rb") as fh:
+                fh.seek(self._ids_offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return
+        for line in chunk[:end].decode("utf-8").splitlines():
+            self._id_to_row[line] = len(self._ids)
+            self._ids.append(line)
+        self._ids_offset += end
+        # Rows are written before their ids, so the matrix always covers every id
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self.dim))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._id_to_row)
+
+    def get(self, item_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            row = self._id_to_row.get(item_id)
+            return None if row is None else np.array(self._matrix[row])
+
+    # ---------- Writing ----------
+
+    def add(self, item_id: str, vector: np.ndarray) -> None:
+        """
+        Append one (L2-normalized) vector; a previous row with the same id is superseded.
+        """
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec = vec / norm
+        if "\n" in item_id:
+            raise ValueError("Vector ids cannot contain newlines")
+        with self._lock, self._write_lock():
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vec.shape[0])
+                self._meta_path.write_text(json.dumps({"dim": self.dim}), encoding="utf-8")
+            elif vec.shape[0] != self.dim:
+                raise ValueError(f"Vector dim {vec.shape[0]} != index dim {self.dim}")
+            self._drop_unfinished_write()
+            with open(self._vectors_path, "ab") as fh:
+                fh.write(vec.astype(np.float32).tobytes())
+            with open(self._ids_path, "ab") as fh:
+                fh.write(f"{item_id}\n".encode("utf-8"))
+            self._refresh()
+
+    def _drop_unfinished_write(self) -> None:
+        """
+        A writer that died between its two appends leaves a row without an id (or half a row,
+        or half an id line): cut both files back to the last complete id, or every later id
+        would map to the wrong row. Caller holds the write lock, after _refresh.
+        """
+        rows_size = len(self._ids) * self.dim * 4
+        if self._vectors_path.exists() and self._vectors_path.stat().st_size > rows_size:
+            os.truncate(self._vectors_path, rows_size)
+        if self._ids_path.exists() and self._ids_path.stat().st_size > self._ids_offset:
+            os.truncate(self._ids_path, self._ids_offset)
+
+    # ---------- Search ----------
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (id, cosine) for `query`. Brute force below VECTOR_ANN_THRESHOLD rows, IVF above.
+        """
+        q = np.asarray(query, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(q))
+        if norm:
+            q = q / norm
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or not len(self._ids):
+                return []
+            if q.shape[0] != self.dim:
+                raise ValueError(f"Query dim {q.shape[0]} != index dim {self.dim}")
+            n = len(self._ids)
+            if n <= VECTOR_ANN_THRESHOLD:
+                rows = None
+            else:
+                rows = self._ivf_candidates(q)
+            ids, id_to_row, matrix = self._ids, self._id_to_row, self._matrix
+
+        if rows is None:
+            scores = matrix @ q
+            rows = np.arange(n)
+        else:
+            scores = matrix[rows] @ q
+        # Over-fetch a little: superseded rows and `exclude` are filtered afterwards
+        want = min(len(rows), k + 8 + (len(ids) - len(id_to_row)))
+        top = np.argpartition(-scores, want - 1)[:want] if want < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+        results: List[Tuple[str, float]] = []
+        for i in top:
+            row = int(rows[i])
+            item_id = ids[row]
+            if id_to_row.get(item_id) != row or item_id == exclude:
+                continue
+            results.append((item_id, round(float(scores[i]), 4)))
+            if len(results) == k:
+                break
+        return results
+
+    # ---------- IVF (large collections) ----------
+
+    def _ivf_candidates(self, q: np.ndarray) -> np.ndarray:
+        """
+        Rows in the VECTOR_IVF_NPROBE lists nearest to `q`, plus rows added after the
+        lists were built. Caller holds self._lock.
+        """
+        n = len(self._ids)
+        if self._ivf is None or n > self._ivf["n_indexed"] * VECTOR_IVF_REBUILD_GROWTH:
+            self._ivf = self._load_or_build_ivf(n)
+        ivf = self._ivf
+        nprobe = min(VECTOR_IVF_NPROBE, len(ivf["centroids"]))
+        nearest = np.argpartition(-(ivf["centroids"] @ q), nprobe - 1)[:nprobe]
+        parts = [ivf["order"][ivf["offsets"][c]:ivf["offsets"][c + 1]] for c in nearest]
+        parts.append(np.arange(ivf["n_indexed"], n))
+        return np.concatenate(parts)
+
+    def _load_or_build_ivf(self, n: int) -> Dict:
+        with self._write_lock():
+            try:
+                centroids = np.load(self._ivf_path("centroids"), mmap_mode="r")
+                assign = np.load(self._ivf_path("assign"), mmap_mode="r")
+                if n <= len(assign) * VECTOR_IVF_REBUILD_GROWTH:
+                    return _ivf_lists(centroids, assign)
+            except (FileNotFoundError, ValueError):
+                pass
+            centroids, assign = build_ivf(np.asarray(self._matrix[:n]))
+            for part, arr in (("centroids", centroids), ("assign", assign)):
+                tmp = self._ivf_path(part).with_suffix(".tmp.npy")
+                np.save(tmp, arr)
+                os.replace(tmp, self._ivf_path(part))
+            return _ivf_lists(centroids, assign)
+
+
+def build_ivf(matrix: np.ndarray, n_lists: Optional[int] = None, iters: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means on (a sample of) the rows. Returns (centroids, list id per row).
+    """
+    n = len(matrix)
+    n_lists = n_lists or max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    sample = matrix[rng.choice(n, size=min(n, 50 * n_lists), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(iters):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[labels == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    assign = np.empty(n, dtype=np.int32)
+    for start in range(0, n, 65536):
+        assign[start:start + 65536] = np.argmax(matrix[start:start + 65536] @ centroids.T, axis=1)
+    return centroids.astype(np.float32), assign
+
+
+def _ivf_lists(centroids: np.ndarray, assign: np.ndarray) -> Dict:
+    order = np.argsort(assign, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+    return {"centroids": np.asarray(centroids), "order": order, "offsets": offsets, "n_indexed": len(assign)}
+
+
+# ---------- Module-level registry ----------
+
+_indexes: Dict[Tuple[str, str], VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(collection: str, backend: Optional[str] = None) -> VectorIndex:
+    """
+    Index for a collection ("cvs" / "jobs") under the active embedding backend.
+    Vectors of different backends have different dims and are never mixed.
+    """
+    from src.services.langchain_service import embedding_backend_name
+
+    if collection not in COLLECTIONS:
+        raise ValueError(f"Unknown collection: {collection}")
+    backend = backend or embedding_backend_name()
+    key = (backend, collection)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = VectorIndex(VECTOR_STORE_DIR / backend, collection)
+        return _indexes[key]
+
+
+def copy_document(collection: str, source_id: str, item_id: str) -> bool:
+    """
+    Store the vector of `source_id` under `item_id` too (near-duplicates: no embedding call).
+    Returns False if the source has no vector.
+    """
+    index = get_index(collection)
+    vector = index.get(str(source_id))
+    if vector is None:
+        return False
+    index.add(str(item_id), vector)
+    return True
+
+
+def add_document(collection: str, item_id: str, text: str) -> bool:
+    """
+    Embed `text` and store it. Returns False if no embedding backend is available.
+    """
+    from src.services.langchain_service import embed_text
+
+    vector = embed_text(text)
+    if vector is None:
+        return False
+    get_index(collection).add(str(item_id), vector)
+    return True
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core import database
+from src.core.database import Base
+# Registers every table on Base.metadata
+from src.models import cv_document, job, leaderboard_entry, match_result, user  # noqa: F401
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Temporary SQLite database with every table. sqlite_db(*modules) returns its sessionmaker,
+    installed as SessionLocal of src.core.database and of each module that imported it by name.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path}/t.db")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+
+    def install(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "SessionLocal", factory)
+        return factory
+
+    yield install
+    engine.dispose()
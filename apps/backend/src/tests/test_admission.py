@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core import admission
+from src.core.admission import AdmissionController, AdmissionMiddleware, Lane, Shed, TokenBuckets
+
+
+def test_route_classes():
+    assert admission.route_class("/api/v1/health/workers") == "health"
+    assert admission.route_class("/") == "health"
+    assert admission.route_class("/api/v1/ai/analyze-cv") == "expensive"
+    assert admission.route_class("/api/v1/match-stat") == "cheap"
+
+
+def test_token_bucket_limits_each_client():
+    buckets = TokenBuckets(rate=1.0, burst=2)
+    buckets.take("a", now=0.0)
+    buckets.take("a", now=0.0)
+    with pytest.raises(Shed) as exc:
+        buckets.take("a", now=0.0)
+    assert exc.value.status == 429 and exc.value.retry_after == 1
+    buckets.take("b", now=0.0)  # other clients are unaffected
+    buckets.take("a", now=1.0)  # refilled
+
+
+def test_lane_queues_then_sheds_on_wait():
+    async def main():
+        lane = Lane("expensive", limit=1, max_queue=1, max_wait_s=0.05)
+        await lane.acquire()
+        # Second request waits for the slot and gets it on release
+        waiter = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        # Third finds the queue full
+        with pytest.raises(Shed) as exc:
+            await lane.acquire()
+        assert exc.value.status == 503
+        lane.release()
+        await waiter
+        assert lane.active == 1
+        # Fourth waits past max_wait_s and is shed
+        with pytest.raises(Shed):
+            await lane.acquire()
+        lane.release()
+        assert lane.active == 0 and not lane.waiters
+
+    asyncio.run(main())
+
+
+def test_middleware_sheds_expensive_routes_but_not_health(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_CONCURRENCY", {"expensive": 1, "cheap": 8})
+    monkeypatch.setattr(admission, "ADMISSION_MAX_QUEUE", {"expensive": 0, "cheap": 8})
+    monkeypatch.setattr(admission, "ADMISSION_RATE", {})
+    controller = AdmissionController()
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, admission=controller)
+
+    @app.get("/api/v1/ai/slow")
+    def slow():
+        return {"ok": True}
+
+    @app.get("/api/v1/health")
+    def health():
+        return {"ok": True}
+
+    client = TestClient(app)
+    controller.lanes["expensive"].active = 1  # the only slot is taken
+    response = client.get("/api/v1/ai/slow")
+    assert response.status_code == 503 and response.headers["retry-after"] == "2"
+    assert client.get("/api/v1/health").status_code == 200
+    controller.lanes["expensive"].active = 0
+    assert client.get("/api/v1/ai/slow").status_code == 200
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        lane = Lane("expensive", limit=1, max_queue=4, max_wait_s=5)
+        await lane.acquire()
+
+        # Cancelled while queued: leaves the queue
+        waiter = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert not lane.waiters
+
+        # Cancelled after the slot was handed over but before resuming: gives it back
+        waiter = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        lane.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert lane.active == 0 and not lane.waiters
+
+    asyncio.run(main())
+
+
+def test_preflights_bypass_admission_and_cors_wraps_it(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_RATE", {"expensive": (0.5, 1)})
+    controller = AdmissionController()
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, admission=controller)
+
+    @app.post("/api/v1/ai/analyze-cv")
+    def analyze():
+        return {"ok": True}
+
+    client = TestClient(app)
+    for _ in range(3):
+        assert client.options("/api/v1/ai/analyze-cv").status_code != 429
+    assert controller.buckets["expensive"].limited == 0
+
+    from fastapi.middleware.cors import CORSMiddleware
+    from src.main import app as main_app
+
+    order = [m.cls for m in main_app.user_middleware]  # outermost first
+    assert order.index(CORSMiddleware) < order.index(AdmissionMiddleware)
@@ -0,0 +1,49 @@
+import pytest
+
+from src.models.cv_document import CVDocument
+from src.models.job import Job
+from src.utils import compression
+
+TEXT = "Python FastAPI engineer, PostgreSQL and Docker. " * 200
+
+
+@pytest.mark.parametrize("codec", ["zstd", "zlib"])
+def test_round_trip_and_codec_tag(codec):
+    blob = compression.compress_text(TEXT, codec)
+    assert len(blob) < len(TEXT) // 10
+    assert compression.decompress_text(blob) == TEXT
+
+
+def test_model_property_follows_settings(monkeypatch):
+    cv = CVDocument(filename="a.txt", score=1, content=TEXT)
+    assert cv.content_raw == TEXT and cv.content_compressed is None
+
+    monkeypatch.setattr(compression, "TEXT_COMPRESSION", "zlib")
+    cv = CVDocument(filename="a.txt", score=1, content=TEXT)
+    assert cv.content_compressed is not None and cv.content_raw == TEXT
+    assert cv.content == TEXT
+
+    monkeypatch.setattr(compression, "TEXT_COMPRESSION_DROP_RAW", True)
+    job = Job(title="Eng", company="X", description=TEXT)
+    assert job.description_raw is None
+    assert job.description == TEXT
+
+
+def test_backfill_compresses_existing_rows_in_batches(sqlite_db):
+    from src.services.text_backfill import backfill
+
+    db = sqlite_db()()
+    db.add_all([CVDocument(filename=f"{i}.txt", score=0, content=f"{TEXT} {i}") for i in range(7)])
+    db.add(Job(job_id="j1", title="Eng", company="X", description=TEXT))
+    db.commit()
+
+    assert backfill(batch_size=3) == {"cv_documents": 7, "jobs": 1}
+    assert backfill(batch_size=3) == {"cv_documents": 0, "jobs": 0}
+    assert backfill(batch_size=3, drop_raw=True) == {"cv_documents": 7, "jobs": 1}
+
+    db.expire_all()
+    rows = db.query(CVDocument).order_by(CVDocument.id).all()
+    assert all(cv.content_raw is None for cv in rows)
+    assert rows[4].content == f"{TEXT} 4"
+    assert db.query(Job).one().description == TEXT
+    db.close()
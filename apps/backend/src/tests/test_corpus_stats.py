@@ -0,0 +1,46 @@
+from src.services.corpus_stats import CorpusStats, CorpusStatsStore
+from src.services.match_stat_service import compute_match_score
+
+
+def test_store_is_incremental_and_shared(tmp_path):
+    writer = CorpusStatsStore(tmp_path, compact_every=3)
+    reader = CorpusStatsStore(tmp_path, compact_every=3)
+
+    writer.record(["python", "docker", "python"])
+    writer.record(["python", "react"])
+    stats = reader.get()
+    assert stats.n_docs == 2
+    assert stats.df["python"] == 2 and stats.df["react"] == 1
+    assert stats.avgdl == 2.5
+
+    # Third write triggers compaction into a new snapshot; readers reload it
+    writer.record(["react"])
+    assert (tmp_path / "corpus_stats.json").exists()
+    stats = reader.get()
+    assert stats.n_docs == 3 and stats.df["react"] == 2
+
+    writer.record(["go"])
+    assert CorpusStatsStore(tmp_path).get().n_docs == 4
+
+
+def test_bm25_down_weights_common_terms():
+    stats = CorpusStats()
+    for _ in range(50):
+        stats.add_document(["experience", "team", "project"])
+    stats.add_document(["kubernetes", "experience"])
+
+    job = "kubernetes experience"
+    rare = compute_match_score("kubernetes platform", job, algorithm="bm25", stats=stats)
+    common = compute_match_score("experience platform", job, algorithm="bm25", stats=stats)
+    assert rare["score"] > common["score"]
+    # Plain overlap can't tell them apart
+    assert (compute_match_score("kubernetes platform", job)["score"]
+            == compute_match_score("experience platform", job)["score"])
+
+
+def test_tfidf_identical_texts_score_max():
+    stats = CorpusStats()
+    stats.add_document(["python", "fastapi"])
+    result = compute_match_score("python fastapi", "python fastapi", algorithm="tfidf", stats=stats)
+    assert result["details"]["ratio_job_to_cv"] == 1.0
+    assert result["score"] == 0.95
@@ -0,0 +1,114 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.csv as pa_csv  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from src.models.cv_document import CVDocument  # noqa: E402
+from src.models.job import Job  # noqa: E402
+from src.models.match_result import MatchResult  # noqa: E402
+from src.services import export  # noqa: E402
+
+
+@pytest.fixture
+def db(sqlite_db):
+    factory = sqlite_db(export)
+
+    session = factory()
+    for i in range(1, 8):
+        session.add(CVDocument(
+            filename=f"cv{i}.pdf", content=f"CV text {i}", score=i, created_at=datetime(2026, 1, i, 12, 0)
+        ))
+    session.add(Job(job_id="j1", title="Dev", company="ACME", description="Python", created_at=datetime(2026, 1, 1)))
+    session.add(MatchResult(
+        cache_key="k", cv_hash="c", job_hash="j", algorithm="match-stat:bm25", version="1",
+        result=json.dumps({"score": 0.75, "details": {}}), created_at=datetime(2026, 1, 2),
+    ))
+    session.commit()
+    session.close()
+    return factory
+
+
+def _export(table, fmt="parquet", columns=None, since=None, batch_rows=3):
+    plan = export.plan(table, fmt, columns, since)
+    chunks = list(export.stream(plan, batch_rows=batch_rows))
+    return plan, chunks
+
+
+def test_parquet_is_streamed_batch_by_batch(db):
+    plan, chunks = _export("cv_documents")
+    data = b"".join(chunks)
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column("id").to_pylist() == list(range(1, 8))
+    assert table.column("content").to_pylist()[0] == "CV text 1"
+    # One row group per batch, each written out before the next batch is read
+    assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+    assert len(chunks) >= 3
+    assert plan.watermark == datetime(2026, 1, 7, 12, 0)
+
+
+def test_column_projection_skips_content(db):
+    _, chunks = _export("cv_documents", "csv", ["id", "filename"])
+    table = pa_csv.read_csv(io.BytesIO(b"".join(chunks)))
+    assert table.column_names == ["id", "filename"]
+    assert table.num_rows == 7
+
+
+def test_incremental_export_since_watermark(db):
+    _, chunks = _export("cv_documents", columns=["id"], since=datetime(2026, 1, 5, 12, 0))
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).column("id").to_pylist() == [6, 7]
+
+
+def test_rows_without_created_at_are_in_every_export(db):
+    session = db()
+    session.query(CVDocument).filter(CVDocument.id == 2).update({"created_at": None})
+    session.commit()
+    session.close()
+
+    _, chunks = _export("cv_documents", columns=["id"], since=datetime(2026, 1, 5, 12, 0))
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).column("id").to_pylist() == [2, 6, 7]
+
+
+def test_watermark_stays_behind_open_transactions(db):
+    # Stamped by the database clock like a row of a transaction that has not committed yet
+    session = db()
+    session.add(CVDocument(filename="late.pdf", content="late", score=0))
+    session.commit()
+    late = session.query(CVDocument).filter(CVDocument.filename == "late.pdf").one().created_at
+    session.close()
+
+    plan, chunks = _export("cv_documents", columns=["id"], since=datetime(2026, 1, 6, 12, 0))
+    assert plan.watermark < late - timedelta(seconds=export.EXPORT_WATERMARK_LAG_S - 60)
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).column("id").to_pylist() == [7]
+    # The next export, from that watermark, picks it up once it is older than the lag
+    later = export.ExportPlan("cv_documents", "parquet", plan.columns, plan.watermark, late)
+    assert pq.read_table(io.BytesIO(b"".join(export.stream(later)))).column("id").to_pylist() == [8]
+
+
+def test_match_scores_and_jobs(db):
+    _, chunks = _export("match_results", columns=["algorithm", "score"])
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).to_pylist() == [{"algorithm": "match-stat:bm25", "score": 0.75}]
+
+    _, chunks = _export("jobs", "csv")
+    assert pa_csv.read_csv(io.BytesIO(b"".join(chunks))).column("description").to_pylist() == ["Python"]
+
+
+def test_empty_export_still_has_a_schema(db):
+    _, chunks = _export("job_leaderboard")
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.num_rows == 0
+    assert "score" in table.column_names
+
+
+def test_invalid_requests(db):
+    with pytest.raises(LookupError):
+        export.plan("users")
+    with pytest.raises(ValueError):
+        export.plan("cv_documents", columns=["password"])
+    with pytest.raises(ValueError):
+        export.plan("cv_documents", "xlsx")
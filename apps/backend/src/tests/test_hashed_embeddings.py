@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.services import hashed_embeddings, langchain_service
+
+
+def test_embeddings_are_deterministic_and_normalized():
+    a = hashed_embeddings.embed("Senior Python developer, FastAPI and PostgreSQL")
+    b = hashed_embeddings.embed("Senior Python developer, FastAPI and PostgreSQL")
+    assert a.dtype == np.float32 and a.shape == (hashed_embeddings.HASH_EMBED_DIM,)
+    assert np.array_equal(a, b)
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+    assert not hashed_embeddings.embed("").any()
+
+
+def test_related_texts_score_higher_than_unrelated():
+    job = hashed_embeddings.embed("Backend engineer: Python, FastAPI, Docker, AWS")
+    close = hashed_embeddings.embed("Python developer with FastAPI and Docker experience on AWS")
+    far = hashed_embeddings.embed("Pastry chef, croissants and wedding cakes")
+    assert float(job @ close) > float(job @ far) + 0.2
+    # Character n-grams make inflections similar
+    assert float(hashed_embeddings.embed("developers") @ hashed_embeddings.embed("developer")) > 0.5
+
+
+def test_backend_is_selectable_via_config(monkeypatch):
+    monkeypatch.setattr(langchain_service, "EMBEDDING_BACKEND", "hashed")
+    assert langchain_service.embedding_backend_name().startswith("hashed-d")
+    assert langchain_service.embed_text("python").shape == (hashed_embeddings.HASH_EMBED_DIM,)
+    assert langchain_service.compute_similarity("python fastapi", "python fastapi") == 1.0
+
+    monkeypatch.setattr(langchain_service, "EMBEDDING_BACKEND", "bow")
+    assert langchain_service.embed_text("python") is None
@@ -0,0 +1,230 @@
+import asyncio
+
+import pytest
+
+from src.models.cv_document import CVDocument
+from src.services import ingestion
+
+
+@pytest.fixture
+def db(sqlite_db, tmp_path, monkeypatch):
+    factory = sqlite_db(ingestion)
+    monkeypatch.setattr(ingestion, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(ingestion, "INGEST_RETRY_BACKOFF_S", 0)
+    monkeypatch.setattr(ingestion, "index_cv", lambda cv_id, text, duplicate_of=None: None)
+    monkeypatch.setattr(ingestion, "find_duplicate", lambda text: None)
+    return factory
+
+
+def _pending(db, tmp_path, name="cv.txt", body="Python FastAPI Docker"):
+    (tmp_path / name).write_text(body, encoding="utf-8")
+    session = db()
+    cv = CVDocument(filename=name, content=None, score=0, status="pending")
+    session.add(cv)
+    session.commit()
+    cv_id = cv.id
+    session.close()
+    return cv_id
+
+
+def _run(cv_ids):
+    async def main():
+        queue = ingestion.IngestionQueue(concurrency=2)
+        await queue.start(recover=False)
+        for cv_id in cv_ids:
+            queue.submit(cv_id)
+        await queue._queue.join()
+        await queue.stop()
+    asyncio.run(main())
+
+
+def _row(db, cv_id):
+    session = db()
+    try:
+        cv = session.query(CVDocument).filter(CVDocument.id == cv_id).one()
+        return cv.status, cv.attempts, cv.content, cv.error
+    finally:
+        session.close()
+
+
+def test_pending_upload_is_processed(db, tmp_path):
+    cv_id = _pending(db, tmp_path)
+    _run([cv_id, cv_id])  # enqueued twice: processed once
+    assert _row(db, cv_id) == ("done", 1, "Python FastAPI Docker", None)
+
+
+def test_transient_errors_are_retried(db, tmp_path, monkeypatch):
+    cv_id = _pending(db, tmp_path)
+    real, calls = ingestion.extract_upload, []
+
+    def flaky(path):
+        calls.append(path)
+        if len(calls) < 3:
+            raise OSError("storage hiccup")
+        return real(path)
+
+    monkeypatch.setattr(ingestion, "extract_upload", flaky)
+    _run([cv_id])
+    assert _row(db, cv_id)[:2] == ("done", 3)
+
+
+def test_errors_after_the_claim_hand_the_row_back(db, tmp_path, monkeypatch):
+    cv_id = _pending(db, tmp_path)
+    calls = []
+
+    def flaky(text):
+        calls.append(text)
+        if len(calls) < 2:
+            raise RuntimeError("scoring crashed")
+        return 7
+
+    monkeypatch.setattr(ingestion, "score_text", flaky)
+    _run([cv_id])
+    assert _row(db, cv_id)[:2] == ("done", 2)
+
+
+def test_row_stuck_in_processing_is_not_reported_done(db, tmp_path, monkeypatch):
+    cv_id = _pending(db, tmp_path)
+
+    def stuck(cv_id, values):
+        if values["status"] != "processing":
+            raise OSError("database gone")
+
+    # Nothing can reset the row: each retry finds it still processing
+    monkeypatch.setattr(ingestion, "_finish", stuck)
+    _run([cv_id])
+    status, attempts, _, error = _row(db, cv_id)
+    assert (status, attempts) == ("failed", 1)
+    assert "claimed again" in error
+
+
+def test_unreadable_file_fails_without_retry(db, tmp_path):
+    cv_id = _pending(db, tmp_path, name="bad.pdf", body="not a pdf")
+    _run([cv_id])
+    status, attempts, _, error = _row(db, cv_id)
+    assert (status, attempts) == ("failed", 1)
+    assert "PDF" in error
+
+
+def test_pending_rows_are_recovered(db, tmp_path):
+    ids = [_pending(db, tmp_path, name=f"{i}.txt") for i in range(3)]
+    assert ingestion.recoverable_ids() == ids
+
+
+def test_routes_reject_unprocessed_cvs(db, tmp_path):
+    from fastapi import HTTPException
+
+    from src.api.match import MatchRequest, match_cv_to_job
+    from src.api.search import top_jobs
+
+    cv_id = _pending(db, tmp_path)
+    session = db()
+    try:
+        with pytest.raises(HTTPException) as e:
+            match_cv_to_job(MatchRequest(cv_filename="cv.txt", job_id="j1"), db=session)
+        assert e.value.status_code == 409
+        with pytest.raises(HTTPException) as e:
+            top_jobs(cv_id, k=10, db=session)
+        assert e.value.status_code == 409
+    finally:
+        session.close()
+
+
+def test_full_queue_leaves_no_pending_row(db, tmp_path, monkeypatch):
+    from fastapi import HTTPException
+
+    from src.api import upload
+
+    class FullQueue:
+        running = True
+
+        def submit(self, cv_id):
+            raise asyncio.QueueFull()
+
+    monkeypatch.setattr(ingestion, "queue", FullQueue())
+    monkeypatch.setattr(upload, "UPLOAD_DIR", tmp_path)
+    (tmp_path / "0_cv.txt").write_text("Python", encoding="utf-8")
+    session = db()
+    try:
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(upload._enqueue("cv.txt", "0_cv.txt", session))
+        assert e.value.status_code == 503
+        assert session.query(CVDocument).count() == 0
+        assert not (tmp_path / "0_cv.txt").exists()
+    finally:
+        session.close()
+
+
+def test_background_uploads_with_the_same_name_keep_their_own_file(db, tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from src.api import upload
+
+    class Queue:
+        running = True
+
+        def __init__(self):
+            self.ids = []
+
+        def submit(self, cv_id):
+            self.ids.append(cv_id)
+
+    def get_db():
+        session = db()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    queue = Queue()
+    monkeypatch.setattr(ingestion, "queue", queue)
+    monkeypatch.setattr(upload, "UPLOAD_DIR", tmp_path)
+    app = FastAPI()
+    app.include_router(upload.router)
+    app.dependency_overrides[upload.get_db] = get_db
+
+    client = TestClient(app)
+    for body in ("Alice Python", "Bob Java"):
+        response = client.post("/upload-cv?mode=async", files={"file": ("../../etc/cv.txt", body.encode())})
+        assert response.status_code == 202 and response.json()["filename"] == "cv.txt"
+
+    _run(queue.ids)
+    assert [_row(db, cv_id)[2] for cv_id in queue.ids] == ["Alice Python", "Bob Java"]
+    assert len(list(tmp_path.glob("*_cv.txt"))) == 2
+
+
+
+def test_sync_upload_extracts_off_the_event_loop(db, tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from src.api import upload
+
+    on_loop = []
+
+    def failing(path):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        raise OSError("disk error")
+
+    def get_db():
+        session = db()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(upload, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(ingestion, "extract_upload", failing)
+    app = FastAPI()
+    app.include_router(upload.router)
+    app.dependency_overrides[upload.get_db] = get_db
+
+    response = TestClient(app).post("/upload-cv?mode=sync", files={"file": ("cv.pdf", b"%PDF-1.4")})
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error reading PDF: disk error"
+    assert on_loop == [False]
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from src.models.cv_document import CVDocument
+from src.models.job import Job
+from src.services import leaderboard, token_corpus
+
+JOB = "Python FastAPI Docker PostgreSQL Kubernetes"
+CVS = [
+    "Java Spring",
+    "Python FastAPI",
+    "Python FastAPI Docker PostgreSQL Kubernetes",
+    "Python Docker",
+    "Python FastAPI Docker",
+]
+
+
+@pytest.fixture(params=["token_corpus", "tokens"])
+def db(request, sqlite_db, tmp_path, monkeypatch):
+    factory = sqlite_db(leaderboard)
+    monkeypatch.setattr(leaderboard, "LEADERBOARD_SIZE", 3)
+    monkeypatch.setattr(token_corpus, "TOKEN_CORPUS_ENABLED", request.param == "token_corpus")
+    monkeypatch.setattr(token_corpus, "_corpus", token_corpus.TokenCorpus(tmp_path / "corpus"))
+    return factory
+
+
+def _add(db, obj):
+    session = db()
+    session.add(obj)
+    session.commit()
+    session.refresh(obj)
+    session.close()
+    return obj
+
+
+def _board(db, job_id="j1"):
+    session = db()
+    try:
+        return [(e["cv_id"], e["score"]) for e in leaderboard.top(session, job_id)]
+    finally:
+        session.close()
+
+
+def test_incremental_updates_match_a_rebuild(db):
+    _add(db, Job(job_id="j1", title="Dev", company="ACME", description=JOB))
+    for text in CVS:
+        cv = _add(db, CVDocument(filename="cv.txt", content=text, score=0))
+        leaderboard.record_cv(cv.id, text)
+
+    incremental = _board(db)
+    assert [cv_id for cv_id, _ in incremental] == [3, 5, 2]
+
+    assert leaderboard.rebuild_job("j1", JOB) == 3
+    assert _board(db) == incremental
+
+
+def test_description_change_rebuilds_the_board(db):
+    _add(db, Job(job_id="j1", title="Dev", company="ACME", description=JOB))
+    for text in CVS:
+        cv = _add(db, CVDocument(filename="cv.txt", content=text, score=0))
+        leaderboard.record_cv(cv.id, text)
+
+    leaderboard.rebuild_job("j1", "Java Spring")
+    assert _board(db)[0][0] == 1
+
+
+def test_cv_recorded_twice_has_one_entry(db):
+    _add(db, Job(job_id="j1", title="Dev", company="ACME", description=JOB))
+    cv = _add(db, CVDocument(filename="cv.txt", content="Python", score=0))
+    leaderboard.record_cv(cv.id, "Python")
+    leaderboard.record_cv(cv.id, "Python")
+    assert len(_board(db)) == 1
+
+
+def test_job_writes_rebuild_the_board_after_the_response(db, monkeypatch):
+    from fastapi import BackgroundTasks
+
+    from src.api import job as job_api
+    from src.services import indexing
+
+    for text in CVS:
+        _add(db, CVDocument(filename="cv.txt", content=text, score=0))
+    monkeypatch.setattr(indexing.corpus_stats, "record_document", lambda tokens: None)
+    monkeypatch.setattr(indexing.vector_store, "add_document", lambda *args: False)
+
+    tasks, session = BackgroundTasks(), db()
+    try:
+        created = job_api.create_job(job_api.JobDescription(title="Dev", company="ACME", description=JOB), tasks, session)
+        # Answered before any CV was scored
+        assert _board(db, created["job_id"]) == []
+        asyncio.run(tasks())
+        assert [cv_id for cv_id, _ in _board(db, created["job_id"])] == [3, 5, 2]
+
+        tasks = BackgroundTasks()
+        job_api.update_job(created["job_id"], job_api.JobUpdate(description="Java Spring"), tasks, session)
+        assert _board(db, created["job_id"])[0][0] == 3
+        asyncio.run(tasks())
+        assert _board(db, created["job_id"])[0][0] == 1
+    finally:
+        session.close()
@@ -0,0 +1,34 @@
+import httpx
+import pytest
+
+from loadtest.driver import parse_mix, percentile
+from loadtest.stubs import ChatCompletionsStub, StubConfig, SupabaseStorageStub
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_parse_mix_rejects_unknown_operation():
+    assert parse_mix("match=2,match-stat=1") == {"match": 2.0, "match-stat": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("delete-everything=1")
+
+
+def test_chat_stub_returns_openai_shape():
+    with ChatCompletionsStub() as stub:
+        resp = httpx.post(f"{stub.url}/v1/chat/completions", json={"messages": [{"role": "user", "content": "hi"}]})
+    assert resp.status_code == 200
+    assert "score" in resp.json()["choices"][0]["message"]["content"]
+
+
+def test_storage_stub_error_injection():
+    with SupabaseStorageStub(StubConfig(error_rate=1.0, error_status=503)) as stub:
+        stub.put("bucket", "cv.txt", b"hello")
+        resp = httpx.get(f"{stub.url}/storage/v1/object/public/bucket/cv.txt")
+    assert resp.status_code == 503
+    assert stub.errors == 1
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from src.models.match_result import MatchResult
+from src.services import match_cache
+from src.services.match_cache import CacheKey, MatchCache, content_hash
+
+
+@pytest.fixture
+def session_factory(sqlite_db):
+    return sqlite_db()
+
+
+def _key(cv="cv text", job="job text", version="1"):
+    return CacheKey(content_hash(cv), content_hash(job), "match-stat:bm25", version, {"top_n": 15})
+
+
+def test_second_call_is_served_from_cache(session_factory):
+    cache, calls = MatchCache(max_size=4), []
+
+    def compute():
+        calls.append(1)
+        return {"score": 0.8}
+
+    assert cache.get_or_compute(_key(), compute) == ({"score": 0.8}, False)
+    assert cache.get_or_compute(_key(), compute) == ({"score": 0.8}, True)
+    assert len(calls) == 1
+
+    # Another worker (empty LRU) finds the row in match_results
+    assert MatchCache().get_or_compute(_key(), compute) == ({"score": 0.8}, True)
+    assert session_factory().query(MatchResult).count() == 1
+
+
+def test_changed_document_or_version_misses(session_factory):
+    cache = MatchCache()
+    cache.get_or_compute(_key(), lambda: {"score": 0.8})
+    assert cache.get_or_compute(_key(cv="edited cv"), lambda: {"score": 0.7}) == ({"score": 0.7}, False)
+    assert cache.get_or_compute(_key(version="2"), lambda: {"score": 0.6}) == ({"score": 0.6}, False)
+
+
+def test_async_errors_are_not_cached(session_factory):
+    cache = MatchCache()
+
+    async def failing():
+        raise RuntimeError("LLM down")
+
+    async def ok():
+        return {"content": "{}"}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute_async(_key(), failing))
+    assert asyncio.run(cache.get_or_compute_async(_key(), ok)) == ({"content": "{}"}, False)
+    assert asyncio.run(cache.get_or_compute_async(_key(), ok)) == ({"content": "{}"}, True)
+
+
+def test_disabled_cache_always_computes(monkeypatch):
+    monkeypatch.setattr(match_cache, "MATCH_CACHE_ENABLED", False)
+    cache = MatchCache()
+    assert cache.get_or_compute(_key(), lambda: {"score": 1})[1] is False
+    assert cache.get_or_compute(_key(), lambda: {"score": 1})[1] is False
+
+
+def test_fallback_similarity_is_not_cached(session_factory, monkeypatch):
+    from src.services import langchain_service
+
+    class QuotaExceeded:
+        def embed_query(self, text):
+            raise RuntimeError("429 insufficient_quota")
+
+    monkeypatch.setattr(langchain_service, "_backend", lambda: "openai")
+    monkeypatch.setattr(langchain_service, "get_embeddings_model", lambda: QuotaExceeded())
+    assert langchain_service.similarity_with_backend("python", "python") == (1.0, "bow")
+
+    cache, key = MatchCache(), _key()
+
+    def compute():
+        score, used = langchain_service.similarity_with_backend("python", "python")
+        return {"score": score, "backend": used}
+
+    def cacheable(result):
+        return result["backend"] == "openai"
+
+    assert cache.get_or_compute(key, compute, cacheable) == ({"score": 1.0, "backend": "bow"}, False)
+    assert cache.get_or_compute(key, compute, cacheable)[1] is False
+    assert session_factory().query(MatchResult).count() == 0
+
+
+def test_match_stat_caches_neither_errors_nor_time_budget_cuts(session_factory, tmp_path, monkeypatch):
+    from src.services import match_stat_service
+    from src.utils.parsers import PdfExtraction
+
+    (tmp_path / "cv.pdf").write_bytes(b"%PDF-1.4 stub")
+    (tmp_path / "j1.json").write_text('{"description": "Python engineer"}', encoding="utf-8")
+    monkeypatch.setattr(match_stat_service, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(match_stat_service, "JOBS_DIR", tmp_path)
+    monkeypatch.setattr(match_cache, "cache", MatchCache())
+
+    def broken(source):
+        raise RuntimeError("process pool broken")
+
+    monkeypatch.setattr(match_stat_service, "extract_pdf_best", broken)
+    with pytest.raises(RuntimeError):
+        asyncio.run(match_stat_service.match_stat_async("cv.pdf", "j1"))
+
+    def slow(source):
+        return PdfExtraction(text="Python", pages_read=1, page_count=9, truncated=True, reason="time_budget")
+
+    monkeypatch.setattr(match_stat_service, "extract_pdf_best", slow)
+    for _ in range(2):
+        result = asyncio.run(match_stat_service.match_stat_async("cv.pdf", "j1"))
+        assert result["details"]["cv_truncated_by"] == "time_budget" and result["cached"] is False
+    assert session_factory().query(MatchResult).count() == 0
+
+
+def test_malformed_analysis_is_not_cached(session_factory, monkeypatch):
+    from src.services import cv_analysis
+
+    monkeypatch.setattr(match_cache, "cache", MatchCache())
+    replies = iter(["Sure! Here is the analysis:", '```json\n{"score": 80}\n```', "never asked"])
+
+    class FakeLlm:
+        provider = None
+
+        async def chat(self, prompt, **kwargs):
+            return {"content": next(replies)}
+
+    llm = FakeLlm()
+    first = asyncio.run(cv_analysis.analyze("Python CV", "Python job", llm))
+    assert cv_analysis.parse_analysis(first) is None and first["cached"] is False
+    second = asyncio.run(cv_analysis.analyze("Python CV", "Python job", llm))
+    assert cv_analysis.parse_analysis(second) == {"score": 80} and second["cached"] is False
+    assert asyncio.run(cv_analysis.analyze("Python CV", "Python job", llm))["cached"] is True
+    assert session_factory().query(MatchResult).count() == 1
+
+
+def test_bm25_entries_expire_as_the_corpus_grows(session_factory, tmp_path, monkeypatch):
+    from src.services import match_stat_service
+    from src.services.corpus_stats import CorpusStats
+
+    (tmp_path / "cv.txt").write_text("Python FastAPI engineer", encoding="utf-8")
+    (tmp_path / "j1.json").write_text('{"description": "Python engineer"}', encoding="utf-8")
+    monkeypatch.setattr(match_stat_service, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(match_stat_service, "JOBS_DIR", tmp_path)
+    monkeypatch.setattr(match_cache, "cache", MatchCache())
+
+    def cached_with(n_docs, algorithm="bm25"):
+        monkeypatch.setattr(match_stat_service, "get_stats", lambda: CorpusStats(n_docs=n_docs))
+        return asyncio.run(match_stat_service.match_stat_async("cv.txt", "j1", algorithm))["cached"]
+
+    assert cached_with(17) is False
+    assert cached_with(18) is True
+    assert cached_with(100) is False
+    assert cached_with(10, "overlap") is False
+    assert cached_with(100_000, "overlap") is True
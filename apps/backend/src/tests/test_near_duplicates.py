@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import json
+import random
+
+import numpy as np
+import pytest
+
+from src.services import cv_analysis, match_cache, near_duplicates
+from src.services.match_stat_service import tokenize
+
+random.seed(7)
+_WORDS = [f"skill{i}" for i in range(400)]
+BASE = " ".join(random.choice(_WORDS) for _ in range(300))
+
+
+def _edited(text, n_changes):
+    words = text.split()
+    for i in random.sample(range(len(words)), n_changes):
+        words[i] = f"edit{i}"
+    return " ".join(words)
+
+
+def _jaccard(a, b):
+    sa, sb = set(near_duplicates.shingles(tokenize(a))), set(near_duplicates.shingles(tokenize(b)))
+    return len(sa & sb) / len(sa | sb)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    idx = near_duplicates.MinHashIndex(tmp_path, threshold=0.8)
+    monkeypatch.setattr(near_duplicates, "_index", idx)
+    return idx
+
+
+def test_signature_estimates_jaccard():
+    edited = _edited(BASE, 10)
+    sig_a = near_duplicates.signature(tokenize(BASE))
+    sig_b = near_duplicates.signature(tokenize(edited))
+    assert sig_a.dtype == np.uint32 and sig_a.shape == (near_duplicates.NEAR_DUP_NUM_PERM,)
+    assert abs((sig_a == sig_b).mean() - _jaccard(BASE, edited)) < 0.1
+    assert near_duplicates.signature([]) is None
+
+
+def test_lsh_params_put_the_threshold_on_the_steep_part():
+    assert near_duplicates.lsh_params(128, 0.85) == (16, 8)
+    bands, rows = near_duplicates.lsh_params(128, 0.5)
+    assert (1 / bands) ** (1 / rows) <= 0.4
+
+
+def test_near_duplicates_are_found_with_their_root(index, tmp_path):
+    near_duplicates.add_document(1, tokenize(BASE), BASE)
+    other = " ".join(random.choice(_WORDS) for _ in range(300))
+    near_duplicates.add_document(2, tokenize(other), other)
+
+    v2 = _edited(BASE, 3)
+    match = near_duplicates.find_duplicate(tokenize(v2))
+    assert match["cv_id"] == 1 and match["similarity"] >= 0.8
+    near_duplicates.add_document(3, tokenize(v2), v2, duplicate_of=1)
+
+    # Another worker sees the same rows; a later version resolves to the first one
+    other_worker = near_duplicates.MinHashIndex(tmp_path, threshold=0.8)
+    hits = other_worker.query(near_duplicates.signature(tokenize(_edited(v2, 2))))
+    assert {cv_id for cv_id, _ in hits} == {1, 3}
+    assert other_worker.root(3) == 1
+    assert near_duplicates.find_duplicate(tokenize(_edited(BASE, 150))) is None
+
+
+def test_root_hash_points_at_the_root_document(index):
+    near_duplicates.add_document(1, tokenize(BASE), BASE)
+    root_hash = hashlib.sha256(BASE.encode("utf-8")).hexdigest()
+    v2 = _edited(BASE, 3)
+
+    assert near_duplicates.root_hash(v2) == (root_hash, 1)
+    assert near_duplicates.root_hash(BASE) == (None, None)
+    assert near_duplicates.root_hash(v2, lookup=False) == (None, None)
+    assert near_duplicates.root_hash(v2, 1, lookup=False) == (root_hash, 1)
+    assert near_duplicates.root_hash("Java Spring Kafka") == (None, None)
+
+
+def test_near_duplicate_analysis_is_never_stored_for_the_root(index, monkeypatch):
+    monkeypatch.setattr(match_cache, "MATCH_CACHE_PERSIST", False)
+    monkeypatch.setattr(match_cache, "cache", match_cache.MatchCache())
+    near_duplicates.add_document(1, tokenize(BASE), BASE)
+    v2 = _edited(BASE, 3)
+
+    class FakeLlm:
+        provider = None
+
+        async def chat(self, prompt, **kwargs):
+            return {"content": json.dumps({"score": 50, "summary": prompt[-40:]})}
+
+    def summary(result):
+        return cv_analysis.parse_analysis(result)["summary"]
+
+    llm = FakeLlm()
+    # The root has no analysis yet: the duplicate is analyzed from its own text...
+    first = asyncio.run(cv_analysis.analyze(v2, llm=llm))
+    assert summary(first) == v2[-40:] and not first["cached"] and "near_duplicate_of" not in first
+    # ...and that result is not served for the root
+    root = asyncio.run(cv_analysis.analyze(BASE, llm=llm))
+    assert summary(root) == BASE[-40:] and not root["cached"]
+    # Once the root is analyzed, a new near-duplicate reuses it
+    reused = asyncio.run(cv_analysis.analyze(_edited(BASE, 4), llm=llm))
+    assert summary(reused) == BASE[-40:] and reused["cached"] and reused["near_duplicate_of"] == 1
+
+
+def test_unfinished_write_is_discarded(index):
+    near_duplicates.add_document(1, tokenize(BASE), BASE)
+    with open(index._signatures_path, "ab") as fh:  # signature without its id line
+        fh.write(np.ones(index.num_perm, dtype=np.uint32).tobytes())
+    other = "Java Spring Kafka Docker"
+    near_duplicates.add_document(2, tokenize(other), other)
+    assert index.query(near_duplicates.signature(tokenize(other)))[0] == (2, 1.0)
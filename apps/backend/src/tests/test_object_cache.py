@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from loadtest.stubs import SupabaseStorageStub
+from src.services import match_cache, match_stat_service, object_cache
+
+
+@pytest.fixture
+def storage(sqlite_db, tmp_path, monkeypatch):
+    # match_stat_async goes through the match cache: a temporary table and an empty LRU
+    sqlite_db()
+    monkeypatch.setattr(match_cache, "cache", match_cache.MatchCache())
+    monkeypatch.setattr(object_cache, "OBJECT_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(object_cache, "stats", {"downloads": 0, "not_modified": 0, "stale": 0})
+    monkeypatch.setattr(match_stat_service, "UPLOAD_DIR", tmp_path / "uploads")
+    object_cache.reset()
+    with SupabaseStorageStub() as stub:
+        monkeypatch.setattr(match_stat_service, "SUPABASE_URL", stub.url)
+        stub.put(match_stat_service.SUPABASE_BUCKET, "cv.txt", b"Python FastAPI docker engineer")
+        yield stub
+    object_cache.reset()
+
+
+def test_unchanged_objects_are_revalidated_not_downloaded(storage):
+    url = match_stat_service._build_supabase_public_url("cv.txt")
+    assert object_cache.fetch_bytes_sync(url) == b"Python FastAPI docker engineer"
+    assert asyncio.run(object_cache.fetch_bytes(url)) == b"Python FastAPI docker engineer"
+    assert object_cache.stats["downloads"] == 1
+    assert storage.not_modified == 1
+
+    # A changed object fails the ETag check and is downloaded again
+    storage.put(match_stat_service.SUPABASE_BUCKET, "cv.txt", b"Rust engineer")
+    assert object_cache.fetch_bytes_sync(url) == b"Rust engineer"
+    assert object_cache.stats["downloads"] == 2
+
+
+def test_match_stat_async_reads_remote_cv(storage, tmp_path, monkeypatch):
+    jobs = tmp_path / "jobs"
+    jobs.mkdir()
+    (jobs / "j1.json").write_text('{"description": "Python engineer"}', encoding="utf-8")
+    monkeypatch.setattr(match_stat_service, "JOBS_DIR", jobs)
+
+    result = asyncio.run(match_stat_service.match_stat_async("cv.txt", "j1"))
+    assert set(result["details"]["top_common"]) == {"python", "engineer"}
+    assert result["cached"] is False
+    assert asyncio.run(match_stat_service.match_stat_async("cv.txt", "j1"))["cached"] is True
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(match_stat_service.match_stat_async("missing.txt", "j1"))
+
+
+def test_cached_copy_is_served_when_storage_is_down(storage):
+    url = match_stat_service._build_supabase_public_url("cv.txt")
+    object_cache.fetch_bytes_sync(url)
+    storage.stop()
+    object_cache.reset()
+    assert asyncio.run(object_cache.fetch_bytes(url)) == b"Python FastAPI docker engineer"
+    assert object_cache.stats["stale"] == 1
@@ -0,0 +1,150 @@
+import io
+import os
+
+import pytest
+from PyPDF2 import PdfWriter
+
+from src.utils import parsers
+from src.utils.parsers import extract_pdf, iter_pdf_pages
+
+DUMMY_PDF = os.path.join(os.path.dirname(__file__), "dummy_cv.pdf")
+
+
+def _blank_pdf(n_pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(n_pages):
+        writer.add_blank_page(width=200, height=200)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def process_pool():
+    """
+    The PDF process pool is module-global: shut it down after the test, or its
+    children outlive it and leak into later tests.
+    """
+    yield
+    pool, parsers._pool = parsers._pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def test_iter_pdf_pages_yields_one_item_per_page():
+    pages = list(iter_pdf_pages(_blank_pdf(4), start=1))
+    assert len(pages) == 3
+
+
+def test_extract_pdf_stops_at_max_pages():
+    result = extract_pdf(_blank_pdf(10), max_pages=3)
+    assert result.page_count == 10
+    assert result.pages_read == 3
+    assert result.truncated and result.reason == "max_pages"
+
+
+def test_extract_pdf_caps_output_size():
+    result = extract_pdf(DUMMY_PDF, backend="pdfplumber", max_chars=4)
+    assert len(result.text) == 4
+    assert result.truncated and result.reason == "max_chars"
+
+
+def test_extract_pdf_within_limits_is_not_truncated():
+    result = extract_pdf(DUMMY_PDF, backend="pdfplumber")
+    assert "CVScan" in result.text
+    assert not result.truncated
+
+
+def test_parallel_extraction_matches_sequential(process_pool, monkeypatch):
+    data = _blank_pdf(12)
+    sequential = extract_pdf(data, max_pages=100)
+    monkeypatch.setattr(parsers, "PDF_PARALLEL_THRESHOLD", 4)
+    monkeypatch.setattr(parsers, "PDF_PARALLEL_WORKERS", 3)
+    parallel = extract_pdf(data, max_pages=100)
+    assert parallel.pages_read == sequential.pages_read == 12
+    assert parallel.text == sequential.text
+    assert not parallel.truncated
+
+
+def test_cascade_falls_back_when_quality_check_fails():
+    from src.utils.parsers import backends, extract_pdf_best
+
+    assert [b.name for b in backends()][:2] == ["pypdf2", "pdfplumber"]
+    # PyPDF2 finds no text layer in the dummy CV; pdfplumber does
+    result = extract_pdf_best(DUMMY_PDF)
+    assert result.backend == "pdfplumber"
+    assert "CVScan" in result.text
+    assert result.quality["tokens"] >= 2
+
+
+class _Page:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+def test_char_cap_counts_page_separators():
+    from src.utils.parsers import _cap_chars, _extract_sequential
+
+    texts = ["a" * 10, "bbbbb", "ccc"]
+    parts, reason = _extract_sequential([_Page(t) for t in texts], 3, float("inf"), 10)
+    assert "\n".join(parts) == "a" * 10
+    assert reason == "max_chars"
+    assert _cap_chars(texts, 10) == (["a" * 10], "max_chars")
+
+    # Separators count: "aaaa\nbbb" is 8 chars, the next "\n" leaves room for one more
+    parts, _ = _cap_chars(["aaaa", "bbb", "cccc"], 10)
+    assert "\n".join(parts) == "aaaa\nbbb\nc"
+    assert _cap_chars(["aaaa", "bbbbb"], 10) == (["aaaa", "bbbbb"], None)
+
+
+def test_broken_pool_is_shut_down_and_fallback_keeps_max_chars(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+    from contextlib import contextmanager
+
+    class BrokenPool:
+        shutdown_args = None
+
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, **kwargs):
+            BrokenPool.shutdown_args = kwargs
+
+    @contextmanager
+    def fake_open(source, backend):
+        yield 3, [_Page("a" * 10) for _ in range(3)]
+
+    monkeypatch.setattr(parsers, "_pool", BrokenPool())
+    monkeypatch.setattr(parsers, "open_pdf", fake_open)
+    parts, reason = parsers._extract_parallel(b"", "pypdf2", 3, float("inf"), 15)
+
+    assert "\n".join(parts) == "a" * 10 + "\n" + "a" * 4
+    assert reason == "max_chars"
+    assert BrokenPool.shutdown_args == {"wait": False, "cancel_futures": True}
+    assert parsers._pool is None
+
+
+def test_page_range_task_stops_at_the_deadline():
+    from src.utils.parsers import _extract_page_range
+
+    assert len(_extract_page_range(_blank_pdf(6), "pypdf2", 0, 6, deadline=0.0)) == 1
+    assert len(_extract_page_range(_blank_pdf(6), "pypdf2", 0, 6, deadline=float("inf"))) == 6
+
+
+def test_cascade_shares_one_time_budget(monkeypatch):
+    budgets = []
+
+    def slow_extract(source, backend="pypdf2", time_budget_s=None, **limits):
+        budgets.append(time_budget_s)
+        parsers.time.sleep(0.05)
+        return parsers.PdfExtraction(text="", pages_read=1, page_count=1, backend=backend)
+
+    monkeypatch.setattr(parsers, "extract_pdf", slow_extract)
+    result = parsers.extract_pdf_best(b"", time_budget_s=0.03)
+
+    # The first backend used the whole budget: the slower ones are not tried
+    assert len(budgets) == 1 and budgets[0] <= 0.03
+    assert result.backend == "pypdf2"
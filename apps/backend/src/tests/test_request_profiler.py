@@ -0,0 +1,108 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core import request_profiler
+from src.core.request_profiler import RequestProfilingMiddleware, stage
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(RequestProfilingMiddleware)
+
+    @app.get("/api/v1/work")
+    def work():
+        with stage("tokenize"):
+            time.sleep(0.01)
+        with stage("score"):
+            time.sleep(0.02)
+        return {"ok": True}
+
+    return app
+
+
+def test_stage_is_a_shared_noop_when_disabled(monkeypatch):
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILING", False)
+    assert stage("score") is stage("db")
+
+
+def test_server_timing_and_sampled_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILING", True)
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILE_DIR", tmp_path)
+    client = TestClient(_app())
+
+    response = client.get("/api/v1/work")
+    timing = dict(part.split(";dur=") for part in response.headers["server-timing"].split(", "))
+    assert float(timing["tokenize"]) >= 10 and float(timing["score"]) >= 20
+    assert "x-profile-id" not in response.headers
+
+    request_profiler.arm("/api/v1/work")
+    response = client.get("/api/v1/work")
+    profile = tmp_path / (response.headers["x-profile-id"] + ".collapsed")
+    assert "work (test_request_profiler.py" in profile.read_text()
+    # Armed once: the next request is not sampled
+    assert "x-profile-id" not in client.get("/api/v1/work").headers
+    assert "x-profile-id" in client.get("/api/v1/work", headers={"X-Profile": "1"}).headers
+
+
+def test_profile_is_saved_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILING", True)
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILE_DIR", tmp_path)
+    real, on_loop = request_profiler._save_profile, []
+
+    def save(sampler, profile_id):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        real(sampler, profile_id)
+
+    monkeypatch.setattr(request_profiler, "_save_profile", save)
+    response = TestClient(_app()).get("/api/v1/work", headers={"X-Profile": "1"})
+    assert on_loop == [False]
+    assert (tmp_path / (response.headers["x-profile-id"] + ".collapsed")).exists()
+
+
+def test_similarity_times_embedding_once(monkeypatch):
+    from src.services import langchain_service
+
+    class SlowModel:
+        def embed_query(self, text):
+            time.sleep(0.01)
+            return [1.0, 0.0]
+
+    monkeypatch.setattr(request_profiler, "REQUEST_PROFILING", True)
+    monkeypatch.setattr(langchain_service, "_backend", lambda: "openai")
+    monkeypatch.setattr(langchain_service, "get_embeddings_model", lambda: SlowModel())
+    timings = {}
+    token = request_profiler._timings.set(timings)
+    try:
+        langchain_service.similarity_with_backend("a", "b")
+    finally:
+        request_profiler._timings.reset(token)
+    assert list(timings) == ["embed"] and timings["embed"] >= 0.02
+
+
+def test_idle_frames_are_matched_by_module():
+    import queue
+    import sys
+    import threading
+
+    def get():
+        # Application function named like an idle leaf
+        return sys._getframe()
+
+    assert not request_profiler._is_idle(get())
+
+    q = queue.Queue()
+    blocked = threading.Thread(target=q.get)
+    blocked.start()
+    time.sleep(0.05)
+    frames = sys._current_frames()
+    assert request_profiler._is_idle(frames[blocked.ident])
+    q.put(None)
+    blocked.join()
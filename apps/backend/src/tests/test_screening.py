@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from src.models.cv_document import CVDocument
+from src.models.job import Job
+from src.services import cv_analysis, screening, token_corpus, vector_store
+
+JOB = "Python FastAPI Docker PostgreSQL Kubernetes"
+CVS = [
+    "Java Spring",
+    "Python FastAPI",
+    "Python FastAPI Docker PostgreSQL Kubernetes",
+    "Python Docker",
+    "Python FastAPI Docker",
+]
+
+
+class FakeLlm:
+    def __init__(self):
+        self.provider = None
+
+
+@pytest.fixture
+def pool(sqlite_db, tmp_path, monkeypatch):
+    Session = sqlite_db(screening)
+    monkeypatch.setattr(screening, "LlmService", FakeLlm)
+    monkeypatch.setattr(token_corpus, "_corpus", token_corpus.TokenCorpus(tmp_path / "corpus"))
+
+    session = Session()
+    session.add(Job(job_id="j1", title="Dev", company="ACME", description=JOB))
+    session.add_all(CVDocument(filename=f"cv{i}.txt", content=text, score=0) for i, text in enumerate(CVS, 1))
+    session.commit()
+    session.close()
+
+    calls = {"texts": [], "active": 0, "peak": 0}
+
+    async def analyze(text, job=None, llm=None):
+        calls["texts"].append(text)
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        await asyncio.sleep(0.01)
+        calls["active"] -= 1
+        if text == "Python Docker":
+            raise RuntimeError("provider timeout")
+        # The LLM prefers the shortest CV, against the pre-filter order
+        return {"content": json.dumps({"score": 100 - 2 * len(text)}), "cached": text == "Python FastAPI"}
+
+    monkeypatch.setattr(cv_analysis, "analyze", analyze)
+    return calls
+
+
+def _screen(**kwargs):
+    kwargs.setdefault("prefilter", "stat")
+    kwargs.setdefault("algorithm", "overlap")
+    return asyncio.run(screening.screen("j1", **kwargs))
+
+
+def test_only_the_shortlist_goes_to_the_llm(pool):
+    result = _screen(top_k=2)
+
+    assert result["pool_size"] == 5
+    assert sorted(pool["texts"]) == sorted(CVS[2:5:2])
+    assert result["llm_calls"] == 2
+    assert result["llm_calls_saved"] == 3
+    assert [c["cv_id"] for c in result["others"]] == [2, 4, 1]
+    for candidate in result["results"]:
+        assert candidate["prefilter_score"] > 0
+        assert 0 <= candidate["llm_score"] <= 1
+
+
+def test_final_score_merges_both_stages(pool):
+    result = _screen(top_k=3)
+    by_id = {c["cv_id"]: c for c in result["results"]}
+
+    # Pre-filter ranks 3 > 5 > 2; the LLM favours the shortest text, which reorders them
+    assert [by_id[i]["prefilter_rank"] for i in (3, 5, 2)] == [1, 2, 3]
+    assert [c["cv_id"] for c in result["results"]][0] == 2
+    assert by_id[2]["cached"] is True
+    assert result["llm_calls"] == 2 and result["llm_cached"] == 1
+    assert result["llm_calls_saved"] == 3
+
+
+def test_min_score_and_concurrency(pool):
+    result = _screen(top_k=5, min_score=0.61, concurrency=2)
+    assert result["shortlisted"] == 4
+    assert pool["peak"] == 2
+
+
+def test_llm_errors_stay_per_candidate(pool):
+    result = _screen(top_k=5)
+    failed = [c for c in result["results"] if c["error"]]
+
+    assert [c["cv_id"] for c in failed] == [4]
+    assert failed[0]["llm_score"] is None
+    assert failed[0]["final_score"] == failed[0]["prefilter_normalized"]
+
+
+def test_unknown_job_and_missing_llm(pool, monkeypatch):
+    with pytest.raises(LookupError):
+        asyncio.run(screening.screen("nope"))
+
+    def unavailable():
+        raise RuntimeError("No LLM provider configured")
+
+    monkeypatch.setattr(screening, "LlmService", unavailable)
+    with pytest.raises(screening.LlmUnavailable):
+        _screen()
+
+
+class _Index:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get(self, item_id):
+        return self.vectors.get(item_id)
+
+
+def test_embedding_prefilter_never_embeds(pool, monkeypatch):
+    unit = np.array([1.0, 0.0])
+    indexes = {
+        "jobs": _Index({"j1": unit}),
+        "cvs": _Index({str(i): np.array([0.1 * i, 1.0]) / np.hypot(0.1 * i, 1.0) for i in (1, 2, 3, 4)}),
+    }
+    monkeypatch.setattr(vector_store, "get_index", indexes.get)
+
+    def add_document(*args):
+        raise AssertionError("embedded on the request path")
+
+    monkeypatch.setattr(vector_store, "add_document", add_document)
+
+    # 4 of 5 CVs have a vector: below the auto threshold, the whole pool is scored statistically
+    assert _screen(prefilter="auto", top_k=0)["prefilter"]["method"] == "stat"
+
+    monkeypatch.setattr(screening, "SCREENING_MIN_EMBEDDING_COVERAGE", 0.8)
+    result = _screen(prefilter="auto", top_k=0)
+    assert result["prefilter"]["method"] == "embedding" and result["prefilter"]["stat_scored"] == 1
+    # CV 5 has no vector but stays in the pool with its statistical ratio (3/5)
+    assert result["pool_size"] == 5
+    assert [(c["cv_id"], c["prefilter_score"]) for c in result["others"][:2]] == [(5, 0.6), (4, 0.3714)]
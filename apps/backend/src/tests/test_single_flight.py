@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core import single_flight
+from src.core.single_flight import SingleFlight
+from src.services import match_cache
+from src.services.match_cache import CacheKey, MatchCache, content_hash
+
+
+def test_threads_share_one_computation():
+    flights, calls = SingleFlight(), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"score": 0.8}
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: flights.do("k", compute, "match"), range(8)))
+
+    assert len(calls) == 1
+    assert all(value == {"score": 0.8} for value, _ in results)
+    assert sorted(coalesced for _, coalesced in results) == [False] + [True] * 7
+    assert flights.snapshot()["operations"]["match"] == {"executed": 1, "coalesced": 7, "errors_shared": 0}
+    assert flights.snapshot()["in_flight"] == 0
+
+
+def test_threads_share_the_error():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("extraction failed")
+
+    def call(_):
+        try:
+            flights.do("k", fail)
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(4) as pool:
+        first = pool.submit(call, 0)
+        started.wait()
+        rest = list(pool.map(call, range(3)))
+
+    assert [first.result()] + rest == ["extraction failed"] * 4
+    assert flights.stats["default"] == {"executed": 1, "coalesced": 3, "errors_shared": 3}
+    # Nothing is remembered: the next call computes again
+    with pytest.raises(ValueError):
+        flights.do("k", fail)
+    assert flights.stats["default"]["executed"] == 2
+
+
+def test_coroutines_share_one_computation_and_survive_a_cancelled_leader():
+    flights, calls = SingleFlight(), []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do_async("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == [(42, True)] * 3
+    assert len(calls) == 1
+
+
+def test_coroutines_share_the_error():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("provider down")
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("k", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(e, ConnectionError) for e in errors)
+    assert flights.stats["default"] == {"executed": 1, "coalesced": 2, "errors_shared": 2}
+
+
+def test_disabled_runs_every_call(monkeypatch):
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_ENABLED", False)
+    flights, calls = SingleFlight(), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 1
+
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda _: flights.do("k", compute), range(3)))
+    assert len(calls) == 3
+
+
+def test_match_cache_coalesces_misses(monkeypatch):
+    monkeypatch.setattr(match_cache, "MATCH_CACHE_PERSIST", False)
+    monkeypatch.setattr(match_cache, "flights", SingleFlight())
+    cache, calls = MatchCache(), []
+    key = CacheKey(content_hash("cv"), content_hash("job"), "analyze-cv:Fake:", "1")
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"content": "{}"}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute_async(key, compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    # Only the request that computed reports a fresh result
+    assert sorted(cached for _, cached in results) == [False] + [True] * 4
+    assert match_cache.flights.stats["analyze-cv"]["coalesced"] == 4
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.models.cv_document import CVDocument
+from src.models.job import Job
+from src.services import match_stat_service, token_corpus
+from src.services.corpus_stats import CorpusStats
+from src.services.match_stat_service import compute_match_score, tokenize
+
+CV = "Python developer: FastAPI, Docker, PostgreSQL. Python scripts and Docker images."
+JOB = "Backend engineer Python FastAPI Kubernetes PostgreSQL"
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    return token_corpus.TokenCorpus(tmp_path)
+
+
+@pytest.mark.parametrize("algorithm", ["overlap", "bm25", "tfidf"])
+def test_scores_match_compute_match_score(corpus, algorithm):
+    stats = CorpusStats()
+    for text in (CV, JOB, "Java Spring Kafka Docker"):
+        stats.add_document(tokenize(text))
+    cv = corpus.add("cv:1", tokenize(CV))
+    job = corpus.add("job:1", tokenize(JOB))
+
+    expected = compute_match_score(CV, JOB, algorithm=algorithm, stats=stats)
+    result = corpus.score(cv, job, algorithm=algorithm, stats=stats)
+    assert result["score"] == expected["score"]
+    assert result["details"]["n_common"] == expected["details"]["n_common"]
+    assert set(result["details"]["top_common"]) == set(expected["details"]["top_common"])
+
+
+def test_rows_are_shared_through_the_files(corpus, tmp_path):
+    ids, counts = corpus.add("cv:1", ["python", "docker", "python"])
+    assert ids.dtype == np.int32 and counts.tolist() == [2, 1]
+
+    other = token_corpus.TokenCorpus(tmp_path)  # another worker
+    assert other.row("cv:1")[1].tolist() == [2, 1]
+    other.add("cv:1", ["java"])  # supersedes
+    assert [corpus.term(int(i)) for i in corpus.row("cv:1")[0]] == ["java"]
+    assert len(corpus) == 1 and corpus.vocabulary_size() == 3
+
+
+def test_ensure_only_appends_changed_documents(corpus):
+    first = corpus.add("job:1", ["python", "docker"])
+    assert corpus.ensure("job:1", ["docker", "python"])[0].tolist() == first[0].tolist()
+    assert corpus._offsets.shape == (2,)
+    corpus.ensure("job:1", ["python"])
+    assert corpus._offsets.shape == (3,)
+
+
+def test_unfinished_write_is_discarded(corpus):
+    corpus.add("cv:1", ["python"])
+    with open(corpus._path("terms.i32"), "ab") as fh:  # writer died before its commit point
+        fh.write(np.array([7, 7], dtype=np.int32).tobytes())
+    corpus.add("cv:2", ["docker"])
+    assert corpus.term(int(corpus.row("cv:2")[0][0])) == "docker"
+
+
+def test_tokenizer_change_starts_a_new_version(corpus, tmp_path, monkeypatch):
+    corpus.add("cv:1", ["python"])
+    monkeypatch.setattr(token_corpus, "TOKENIZER_VERSION", "2")
+    fresh = token_corpus.TokenCorpus(tmp_path)
+    assert fresh.row("cv:1") is None
+    fresh.add("cv:2", ["python"])
+    assert fresh.version == "v2"
+    assert corpus.row("cv:1") is None  # the old reader follows CURRENT
+
+
+def test_build_snapshot_from_db(sqlite_db, tmp_path, monkeypatch):
+    factory = sqlite_db()
+    monkeypatch.setattr(token_corpus, "TOKEN_CORPUS_DIR", tmp_path / "corpus")
+    session = factory()
+    session.add_all([
+        CVDocument(filename="a.txt", content=CV, score=0),
+        CVDocument(filename="b.txt", content=None, score=0, status="pending"),
+        Job(job_id="j1", title="Dev", company="ACME", description=JOB),
+    ])
+    session.commit()
+    session.close()
+
+    token_corpus.build_snapshot(batch_size=1)
+    version, count = token_corpus.build_snapshot(batch_size=1, keep=1)
+    assert (version, count) == ("v2", 2)
+    assert [p.name for p in (tmp_path / "corpus").glob("v*")] == ["v2"]
+    corpus = token_corpus.TokenCorpus(tmp_path / "corpus")
+    assert corpus.row("cv:1") is not None and corpus.row("job:j1") is not None
@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.services import vector_store
+from src.services.vector_store import VectorIndex
+
+
+def _random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_brute_force_top_k_and_superseded_rows(tmp_path):
+    index = VectorIndex(tmp_path, "cvs")
+    vectors = _random_vectors(20)
+    for i, vec in enumerate(vectors):
+        index.add(str(i), vec)
+
+    hits = index.search(vectors[3], k=3)
+    assert hits[0][0] == "3" and abs(hits[0][1] - 1.0) < 1e-4
+    assert len(hits) == 3
+
+    # Re-adding an id replaces its vector; the old row is never returned
+    index.add("3", -vectors[3])
+    assert len(index) == 20
+    assert "3" not in [item_id for item_id, _ in index.search(vectors[3], k=5)]
+    assert index.search(vectors[3], k=1, exclude="7")[0][0] != "7"
+
+
+def test_other_readers_see_appended_rows(tmp_path):
+    writer, reader = VectorIndex(tmp_path, "jobs"), VectorIndex(tmp_path, "jobs")
+    writer.add("a", np.ones(8))
+    assert len(reader) == 1
+    writer.add("b", -np.ones(8))
+    assert reader.search(-np.ones(8), k=1) == [("b", 1.0)]
+
+
+def test_write_cut_between_row_and_id_is_dropped(tmp_path):
+    vectors = _random_vectors(3, dim=8)
+    writer = VectorIndex(tmp_path, "cvs")
+    writer.add("a", vectors[0])
+    # A writer died after its row (and half of the next one), before the id line was complete
+    with open(tmp_path / "cvs.f32", "ab") as fh:
+        fh.write(vectors[1].tobytes() + b"\0" * 12)
+    with open(tmp_path / "cvs.ids", "ab") as fh:
+        fh.write(b"orph")
+
+    other = VectorIndex(tmp_path, "cvs")
+    other.add("b", vectors[2])
+    fresh = VectorIndex(tmp_path, "cvs")
+    assert len(fresh) == 2
+    assert np.allclose(fresh.get("b"), vectors[2] / np.linalg.norm(vectors[2]), atol=1e-6)
+    assert fresh.search(vectors[0], k=1)[0][0] == "a"
+    assert (tmp_path / "cvs.ids").read_text() == "a\nb\n"
+
+
+def test_ivf_search_finds_exact_neighbours(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VECTOR_ANN_THRESHOLD", 100)
+    monkeypatch.setattr(vector_store, "VECTOR_IVF_NPROBE", 4)
+    index = VectorIndex(tmp_path, "cvs")
+    vectors = _random_vectors(400)
+    for i, vec in enumerate(vectors):
+        index.add(str(i), vec)
+
+    for i in (0, 123, 399):
+        assert index.search(vectors[i], k=1)[0][0] == str(i)
+    assert (tmp_path / "cvs.ivf.centroids.npy").exists()
+
+    # Rows added after the lists were built are still searched
+    index.add("new", vectors[5] + 0.01)
+    assert "new" in [item_id for item_id, _ in index.search(vectors[5], k=2)]
@@ -0,0 +1,79 @@
+# Description: Compressed storage for large text columns (CV content, job descriptions)
+# Notes:
+# - TEXT_COMPRESSION=zstd|zlib|off selects the codec for new writes (off by default)
+# - Every blob starts with a one-byte codec tag, so rows written with any codec stay readable
+# - TEXT_COMPRESSION_DROP_RAW=1 stops writing the uncompressed copy
+# - zstandard is optional: without it, "zstd" falls back to zlib
+
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "off").lower()
+TEXT_COMPRESSION_LEVEL = int(os.getenv("TEXT_COMPRESSION_LEVEL", "6"))
+TEXT_COMPRESSION_DROP_RAW = os.getenv("TEXT_COMPRESSION_DROP_RAW", "0").lower() in ("1", "true", "yes")
+
+_ZLIB = b"z"
+_ZSTD = b"s"
+
+
+def compression_enabled() -> bool:
+    return TEXT_COMPRESSION in ("zstd", "zlib")
+
+
+def compress_text(text: str, codec: Optional[str] = None) -> bytes:
+    """
+    UTF-8 encode and compress `text`; the first byte records the codec.
+    """
+    codec = codec or TEXT_COMPRESSION
+    data = text.encode("utf-8")
+    if codec == "zstd" and zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=TEXT_COMPRESSION_LEVEL).compress(data)
+    return _ZLIB + zlib.compress(data, TEXT_COMPRESSION_LEVEL)
+
+
+def decompress_text(blob: bytes) -> str:
+    blob = bytes(blob)
+    tag, payload = blob[:1], blob[1:]
+    if tag == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    if tag == _ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text compression tag: {tag!r}")
+
+
+def read_text(raw: Optional[str], compressed: Optional[bytes]) -> Optional[str]:
+    """
+    Value of a (raw, compressed) column pair: the compressed copy wins when present.
+    """
+    if compressed is not None:
+        return decompress_text(compressed)
+    return raw
+
+
+def compressed_text(raw_attr: str, compressed_attr: str) -> property:
+    """
+    Model property over a (raw Text, compressed LargeBinary) column pair.
+    Reads decompress transparently; writes follow TEXT_COMPRESSION / TEXT_COMPRESSION_DROP_RAW.
+    """
+    def fget(self) -> Optional[str]:
+        return read_text(getattr(self, raw_attr), getattr(self, compressed_attr))
+
+    def fset(self, value: Optional[str]) -> None:
+        if value is None or not compression_enabled():
+            setattr(self, raw_attr, value)
+            setattr(self, compressed_attr, None)
+            return
+        setattr(self, compressed_attr, compress_text(value))
+        setattr(self, raw_attr, None if TEXT_COMPRESSION_DROP_RAW else value)
+
+    return property(fget, fset)
@@ -1,12 +1,368 @@
-from PyPDF2 import PdfReader
+import io
+import os
+import re
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.core.request_profiler import stage
+from src.core.startup_profiler import profile_step
+
+# Bounds for one document (a 400-page scan must not hold a worker for minutes)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_TIME_BUDGET_S = float(os.getenv("PDF_TIME_BUDGET_S", "10"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+
+# Quality gate of the extractor cascade: a slower backend is tried only if these fail
+PDF_MIN_CHARS_PER_PAGE = float(os.getenv("PDF_MIN_CHARS_PER_PAGE", "200"))
+PDF_MIN_PRINTABLE_RATIO = float(os.getenv("PDF_MIN_PRINTABLE_RATIO", "0.9"))
+PDF_MIN_TOKENS = int(os.getenv("PDF_MIN_TOKENS", "30"))
+
+# Large documents are split across a process pool (PDF_PARALLEL_THRESHOLD=0 disables it)
+PDF_PARALLEL_THRESHOLD = int(os.getenv("PDF_PARALLEL_THRESHOLD", "30"))
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_START_METHOD = os.getenv("PDF_PARALLEL_START_METHOD", "forkserver")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+PdfSource = Union[str, Path, bytes]
+
+# PDF libs are imported lazily (pdfplumber pulls in pdfminer and Pillow)
+pdfplumber = None
+PdfReader = None
+_pdf_libs_loaded = False
+
+
+def load_pdf_libs() -> None:
+    """Import pdfplumber / PyPDF2 once (first PDF, warm-up hook or pre-fork preload)."""
+    global pdfplumber, PdfReader, _pdf_libs_loaded
+    if _pdf_libs_loaded:
+        return
+    with profile_step("pdfplumber"):
+        try:
+            import pdfplumber as _pdfplumber
+            pdfplumber = _pdfplumber
+        except Exception:
+            pdfplumber = None
+    with profile_step("PyPDF2"):
+        try:
+            from PyPDF2 import PdfReader as _PdfReader
+            PdfReader = _PdfReader
+        except Exception:
+            PdfReader = None
+    _pdf_libs_loaded = True
+
+
+@dataclass
+class PdfExtraction:
+    """Result of a bounded extraction. `truncated` is set when a limit stopped it early."""
+    text: str
+    pages_read: int
+    page_count: int
+    truncated: bool = False
+    reason: Optional[str] = None  # "max_pages" | "time_budget" | "max_chars"
+    backend: Optional[str] = None
+    quality: Optional[Dict] = None
+
+
+def _as_file(source: PdfSource):
+    return io.BytesIO(source) if isinstance(source, bytes) else str(source)
+
+
+# ---------- Backend registry ----------
+
+@dataclass
+class PdfBackend:
+    """An extractor: `open(source)` is a context manager yielding (page_count, pages)."""
+    name: str
+    cost: int  # relative cost; the cascade runs cheapest first
+    open: Callable[[PdfSource], ContextManager[Tuple[int, list]]]
+
+
+_BACKENDS: Dict[str, PdfBackend] = {}
+
+
+def register_backend(name: str, cost: int) -> Callable:
+    """Decorator: register a page opener (generator function) as a PDF backend."""
+    def decorator(fn):
+        _BACKENDS[name] = PdfBackend(name=name, cost=cost, open=contextmanager(fn))
+        return fn
+    return decorator
+
+
+def backends() -> List[PdfBackend]:
+    """Registered backends, fastest first."""
+    return sorted(_BACKENDS.values(), key=lambda b: b.cost)
+
+
+@register_backend("pypdf2", cost=10)
+def _open_pypdf2(source: PdfSource):
+    # Text layer only: fast, fine for most CVs
+    load_pdf_libs()
+    if PdfReader is None:
+        raise RuntimeError("PyPDF2 is not installed")
+    reader = PdfReader(_as_file(source))
+    yield len(reader.pages), reader.pages
+
+
+@register_backend("pdfplumber", cost=50)
+def _open_pdfplumber(source: PdfSource):
+    # Layout-aware (pdfminer): slower, better on multi-column or odd encodings
+    load_pdf_libs()
+    if pdfplumber is None:
+        raise RuntimeError("pdfplumber is not installed")
+    with pdfplumber.open(_as_file(source)) as pdf:
+        yield len(pdf.pages), pdf.pages
+
+
+@contextmanager
+def open_pdf(source: PdfSource, backend: str = "pypdf2") -> Iterator[Tuple[int, list]]:
+    """Open a PDF with the given backend and yield (page_count, pages)."""
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    with _BACKENDS[backend].open(source) as opened:
+        yield opened
+
+
+def iter_pdf_pages(
+    source: PdfSource, backend: str = "pypdf2", start: int = 0, stop: Optional[int] = None
+) -> Iterator[str]:
+    """Yield the text of pages [start, stop) one at a time."""
+    with open_pdf(source, backend) as (page_count, pages):
+        for i in range(start, min(stop if stop is not None else page_count, page_count)):
+            yield pages[i].extract_text() or ""
+
+
+def extract_pdf(
+    source: PdfSource,
+    backend: str = "pypdf2",
+    max_pages: Optional[int] = None,
+    time_budget_s: Optional[float] = None,
+    max_chars: Optional[int] = None,
+) -> PdfExtraction:
+    """
+    Stream pages and stop as soon as a limit is hit (page count, time budget
+    checked between pages, output size). Defaults come from PDF_* env vars.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    time_budget_s = PDF_TIME_BUDGET_S if time_budget_s is None else time_budget_s
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+
+    deadline = time.monotonic() + time_budget_s
+    with open_pdf(source, backend) as (page_count, pages):
+        n_pages = min(page_count, max_pages)
+        parallel = _use_parallel(n_pages)
+        if not parallel:
+            parts, reason = _extract_sequential(pages, n_pages, deadline, max_chars)
+    if parallel:
+        parts, reason = _extract_parallel(source, backend, n_pages, deadline, max_chars)
+        parts, size_reason = _cap_chars(parts, max_chars)
+        reason = reason or size_reason
+    if reason is None and page_count > max_pages:
+        reason = "max_pages"
+    return PdfExtraction(
+        text="\n".join(parts),
+        pages_read=len(parts),
+        page_count=page_count,
+        truncated=reason is not None,
+        reason=reason,
+        backend=backend,
+    )
+
+
+def _extract_sequential(pages, n_pages: int, deadline: float, max_chars: int) -> Tuple[List[str], Optional[str]]:
+    """Read pages one by one, stopping on the time budget or output size."""
+    parts: List[str] = []
+    size = 0
+    for i in range(n_pages):
+        if i and time.monotonic() > deadline:
+            return parts, "time_budget"
+        page_text = pages[i].extract_text() or ""
+        if _fits(parts, size, page_text, max_chars):
+            size += bool(parts) + len(page_text)
+            parts.append(page_text)
+        else:
+            return parts, "max_chars"
+    return parts, None
+
+
+def _fits(parts: List[str], size: int, page_text: str, max_chars: int) -> bool:
+    """
+    True if `page_text` can be joined to `parts` (`size` chars so far) within `max_chars`.
+    Otherwise appends the prefix that still fits, separator included.
+    """
+    room = max_chars - size - bool(parts)
+    if len(page_text) <= room:
+        return True
+    if room > 0:
+        parts.append(page_text[:room])
+    return False
+
+
+def _cap_chars(parts: List[str], max_chars: int) -> Tuple[List[str], Optional[str]]:
+    """Apply the output size limit to already extracted pages."""
+    kept: List[str] = []
+    size = 0
+    for page_text in parts:
+        if not _fits(kept, size, page_text, max_chars):
+            return kept, "max_chars"
+        size += bool(kept) + len(page_text)
+        kept.append(page_text)
+    return parts, None
+
+
+# ---------- Parallel extraction (large documents) ----------
+
+def _use_parallel(n_pages: int) -> bool:
+    return PDF_PARALLEL_THRESHOLD > 0 and PDF_PARALLEL_WORKERS > 1 and n_pages > PDF_PARALLEL_THRESHOLD
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all requests of this worker, created on first large PDF."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context(PDF_PARALLEL_START_METHOD)
+            _pool = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS, mp_context=ctx)
+        return _pool
+
+
+def _extract_page_range(source: PdfSource, backend: str, start: int, stop: int, deadline: float) -> List[str]:
+    """
+    Pool task: extract pages [start, stop), stopping between pages once the wall-clock
+    `deadline` has passed (a running task cannot be cancelled, so it must stop itself).
+    """
+    parts: List[str] = []
+    for page_text in iter_pdf_pages(source, backend, start, stop):
+        parts.append(page_text)
+        if time.time() > deadline:
+            break
+    return parts
+
+
+def _reset_pool() -> None:
+    """Drop a broken pool: its processes and queues are released, queued tasks cancelled."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_parallel(
+    source: PdfSource, backend: str, n_pages: int, deadline: float, max_chars: int
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Split [0, n_pages) into one contiguous range per pool worker and merge the
+    results in page order. If the time budget expires, keep the longest
+    extracted prefix of pages. Queued ranges are cancelled; running ones get the
+    same deadline and stop after their current page, so at most one page per
+    pool worker outlives the budget.
+    """
+    chunk = -(-n_pages // PDF_PARALLEL_WORKERS)
+    ranges = [(start, min(start + chunk, n_pages)) for start in range(0, n_pages, chunk)]
+    # Pool processes share the wall clock, not this process's monotonic clock
+    wall_deadline = time.time() + (deadline - time.monotonic())
+    try:
+        futures = [
+            _get_pool().submit(_extract_page_range, source, backend, a, b, wall_deadline) for a, b in ranges
+        ]
+        wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        parts: List[str] = []
+        for future, (a, b) in zip(futures, ranges):
+            if not future.done():
+                for pending in futures:
+                    pending.cancel()
+                return parts, "time_budget"
+            pages = future.result()
+            parts.extend(pages)
+            if len(pages) < b - a:
+                return parts, "time_budget"
+        return parts, None
+    except BrokenProcessPool:
+        # A crashed pool is replaced on the next large document; do this one inline
+        _reset_pool()
+        with open_pdf(source, backend) as (_, pages):
+            return _extract_sequential(pages, n_pages, deadline, max_chars)
+
+
+# ---------- Cascade ----------
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+
+
+def check_quality(result: PdfExtraction) -> Dict:
+    """
+    Cheap heuristics on extracted text: characters per page, share of
+    printable characters and token count. `ok` is False when any is too low
+    (empty text layer, broken font encoding, ...).
+    """
+    text = result.text
+    n_chars = len(text)
+    printable = sum(1 for c in text if c.isprintable() or c.isspace())
+    metrics = {
+        "chars_per_page": round(n_chars / max(1, result.pages_read), 1),
+        "printable_ratio": round(printable / n_chars, 3) if n_chars else 0.0,
+        "tokens": len(_TOKEN_RE.findall(text)),
+    }
+    metrics["ok"] = (
+        metrics["chars_per_page"] >= PDF_MIN_CHARS_PER_PAGE
+        and metrics["printable_ratio"] >= PDF_MIN_PRINTABLE_RATIO
+        and metrics["tokens"] >= PDF_MIN_TOKENS
+    )
+    return metrics
+
+
+def extract_pdf_best(source: PdfSource, **limits) -> PdfExtraction:
+    """
+    Run registered backends fastest first and return the first result that
+    passes `check_quality`. If none passes, return the one with the most
+    tokens. `result.backend` records the winner. Raises the last error if
+    every backend failed.
+    The time budget covers the whole cascade: each backend gets what is left,
+    and no further backend is tried once it is spent.
+    """
+    time_budget_s = limits.pop("time_budget_s", None)
+    deadline = time.monotonic() + (PDF_TIME_BUDGET_S if time_budget_s is None else time_budget_s)
+    best: Optional[PdfExtraction] = None
+    last_error: Optional[Exception] = None
+    for backend in backends():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 and (best is not None or last_error is not None):
+            break
+        try:
+            with stage("extraction"):
+                result = extract_pdf(source, backend=backend.name, time_budget_s=max(0.0, remaining), **limits)
+        except Exception as e:
+            last_error = e
+            continue
+        result.quality = check_quality(result)
+        if result.quality["ok"]:
+            return result
+        if best is None or result.quality["tokens"] > best.quality["tokens"]:
+            best = result
+    if best is None:
+        raise last_error or ValueError("No PDF backend available")
+    return best
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     """Extracts text from a PDF file."""
+    return extract_pdf_document(file_path).text
+
+
+def extract_pdf_document(file_path: str) -> PdfExtraction:
+    """Extracts text from a PDF file within the configured limits."""
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text.strip()
+        result = extract_pdf_best(file_path)
     except Exception as e:
         raise ValueError(f"Error reading PDF: {e}")
+    result.text = result.text.strip()
+    return result
@@ -1,3 +1,7 @@
+# Keywords rewarded by score_text (module-level so it is loaded once and shared across workers)
+KEYWORDS = ("python", "fastapi", "ai", "machine learning", "docker")
+
+
 def score_text(text: str) -> int:
     """Simple scoring function for CV text."""
     if not text:
@@ -9,9 +13,9 @@ def score_text(text: str) -> int:
     score += min(len(text) // 100, 50)  # max 50 points
 
     # Keyword-based score
-    keywords = ["python", "fastapi", "ai", "machine learning", "docker"]
-    for kw in keywords:
-        if kw.lower() in text.lower():
+    lowered = text.lower()
+    for kw in KEYWORDS:
+        if kw in lowered:
             score += 10
 
     return min(score, 100)  # max score = 100